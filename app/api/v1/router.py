@@ -1,9 +1,9 @@
 from app.dependencies.user import get_current_user
-from fastapi import APIRouter, Depends, HTTPException, status, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Form, BackgroundTasks, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, HTTPBearer
-from ...schema.user import UserCreate, UserResponse, UserProfileCreate, OTPCredential, OpenIDCredential
-from ...repositories.userRepository import UserRepository
-from ...core.securityUtils import verify_password, create_access_token, create_refresh_token, create_password_reset_token
+from ...schema.user import UserCreate, UserResponse, UserProfileCreate, OpenIDCredential
+from ...repositories.factory import get_user_repository
+from ...core.securityUtils import verify_password_and_update_async, create_access_token, create_password_reset_token, decode_internal_token
 from datetime import timedelta, datetime, timezone
 from ...core.config import settings
 import secrets
@@ -11,11 +11,14 @@ from typing import Dict, Any
 from fastapi.responses import RedirectResponse
 import httpx
 from ...core.securityUtils import TokenPayload
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import EmailStr
-from ...core.rateLimiter import is_rate_limited
+from ...core.rateLimiter import check_rate_limits, RateLimitRule
 from ...core.emailUtils import send_reset_email
 from ...core.ipUtils import get_client_ip
+from ...core.refreshTokens import get_refresh_token_store
+from ...core.tokenRevocation import get_token_revocation_list
+from ...core.otpStore import get_otp_store
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -23,23 +26,24 @@ security = HTTPBearer()
 
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate, profile: UserProfileCreate):
-    user_repo = UserRepository()
+    user_repo = get_user_repository()
     
-    if user_repo.get_by_email(user.email):
+    created = await user_repo.create_user(user, profile)
+    if created is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    return user_repo.create_user(user, profile)
+    return created
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    current_user: dict = Depends(get_current_user)
+    current_user: TokenPayload = Depends(get_current_user)
 ):
-    user_repo = UserRepository()
-    if current_user["user_id"] != user_id:
+    user_repo = get_user_repository()
+    if current_user.uid != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this user"
@@ -47,7 +51,8 @@ async def delete_user(
 
 
 
-    if user_repo.soft_delete_user(user_id):
+    await get_refresh_token_store().revoke_user(user_id)
+    if await user_repo.soft_delete_user(user_id):
         return {"message": "User successfully deleted"}
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -60,8 +65,8 @@ async def update_user_status(
     is_active: bool,
     current_user: dict = Depends(get_current_user)
 ):
-    user_repo = UserRepository()
-    updated_user = user_repo.update_user_status(user_id, is_active)
+    user_repo = get_user_repository()
+    updated_user = await user_repo.update_user_status(user_id, is_active)
     
     if not updated_user:
         raise HTTPException(
@@ -74,25 +79,31 @@ async def update_user_status(
 #TODO: OID Connect
 @router.post("/token")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    user_repo = UserRepository()
-    user = user_repo.get_by_email(form_data.username)
+    user_repo = get_user_repository()
+    user = await user_repo.get_login_record(form_data.username)
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await verify_password_and_update_async(
+            form_data.password + user.salt, user.password_hash
+        )
     
-    if not user or not verify_password(form_data.password + user["salt"], user["password_hash"]):
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if new_hash:
+        # Stored hash predates the current scheme/cost; upgrade it while we have the password
+        await user_repo.update_password_hash(user.user_id, user.password_hash, new_hash)
     
     # Enrich user data with roles and permissions
-    user_data = {
-        **user,
-        "roles": await user_repo.get_user_roles(user["user_id"]),
-        "permissions": await user_repo.get_user_permissions(user["user_id"])
-    }
+    roles, permissions = await user_repo.get_user_authorization(user.user_id)
+    user_data = {**user.token_claims(), "roles": roles, "permissions": permissions}
     
     access_token = create_access_token(user_data)
-    refresh_token = create_refresh_token(user["user_id"])
+    refresh_token = await get_refresh_token_store().issue(user.user_id)
     
     return {
         "access_token": access_token,
@@ -102,23 +113,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     }
 
 @router.post("/otp/generate")
-async def generate_otp(current_user: dict = Depends(get_current_user)):
-    user_repo = UserRepository()
-    otp = OTPCredential(
-        token=secrets.token_urlsafe(32),
-        source="email",
-        expires_at=datetime.now(timezone.utc) + timedelta(minutes=15)
-    )
-    
-    return user_repo.add_otp_credential(current_user["user_id"], otp)
+async def generate_otp(current_user: TokenPayload = Depends(get_current_user)):
+    return await get_otp_store().issue(current_user.uid, source="email")
 
 @router.post("/otp/verify")
 async def verify_otp(
     token: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: TokenPayload = Depends(get_current_user)
 ):
-    user_repo = UserRepository()
-    if user_repo.verify_otp(current_user["user_id"], token):
+    if await get_otp_store().verify(current_user.uid, token):
         return {"message": "OTP verified successfully"}
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -129,15 +132,18 @@ async def verify_otp(
 async def openid_connect(
     token: str,
     source: str,
-    current_user: dict = Depends(get_current_user)
+    provider_user_id: str,
+    current_user: TokenPayload = Depends(get_current_user)
 ):
-    user_repo = UserRepository()
+    user_repo = get_user_repository()
     openid_cred = OpenIDCredential(
         token=token,
         source=source,
+        provider_user_id=provider_user_id,
+        email=current_user.email,
         expires_at=datetime.now(timezone.utc) + timedelta(days=30)
     )
-    return user_repo.add_openid_credential(current_user["user_id"], openid_cred)
+    return await user_repo.add_openid_credential(current_user.uid, openid_cred)
 
 @router.post("/auth/openid/{provider}")
 async def openid_login(
@@ -145,10 +151,10 @@ async def openid_login(
     access_token: str,
     user_data: Dict[str, Any]
 ):
-    user_repo = UserRepository()
+    user_repo = get_user_repository()
     
     # Check if user exists by provider ID
-    existing_user = user_repo.get_user_by_openid(provider, user_data["sub"])
+    existing_user = await user_repo.get_user_by_openid(provider, user_data["sub"])
     
     if existing_user:
         # Update existing OpenID credential
@@ -159,7 +165,7 @@ async def openid_login(
             email=user_data["email"],
             expires_at=datetime.now(timezone.utc) + timedelta(days=30)
         )
-        user_repo.update_openid_credential(existing_user["user_id"], openid_cred)
+        await user_repo.update_openid_credential(existing_user["user_id"], openid_cred)
     else:
         # Create new user with OpenID
         user = UserCreate(
@@ -171,7 +177,7 @@ async def openid_login(
             last_name=user_data.get("family_name", ""),
             display_name=user_data.get("name", "")
         )
-        new_user = user_repo.create_user_with_openid(user, profile, openid_cred)
+        new_user = await user_repo.create_user_with_openid(user, profile, openid_cred)
         existing_user = new_user
 
     # Generate JWT token
@@ -252,6 +258,17 @@ async def get_my_info(current_user: TokenPayload = Depends(get_current_user)):
         "metadata": current_user.metadata
     }
 
+@router.post("/token/revoke")
+async def revoke_access_token(current_user: TokenPayload = Depends(get_current_user)):
+    """Revoke the access token used for this request on every worker."""
+    if not current_user.jti:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Token cannot be revoked; it will expire on its own"
+        )
+    await get_token_revocation_list().revoke(current_user.jti, current_user.exp.timestamp())
+    return {"message": "Token revoked"}
+
 @router.post("/token/refresh")
 async def refresh_token(
     refresh_token: str = Form(...), # the 3 dots inside the paranthesis is a special thing called 'ellipsis' and it means that the argument is required. This is a Pydantic thing. 
@@ -265,30 +282,25 @@ async def refresh_token(
         )
 
     try:
-        payload = jwt.decode(
-            refresh_token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_internal_token(refresh_token)
         
         if payload["type"] != "refresh":
             raise HTTPException(status_code=400, detail="Invalid token type")
+
+        # Rotate first: a replayed token must not get as far as issuing anything
+        new_refresh_token = await get_refresh_token_store().rotate(payload)
             
-        user_repo = UserRepository()
-        user = user_repo.get_by_id(int(payload["sub"]))
+        user_repo = get_user_repository()
+        user = await user_repo.get_by_id(int(payload["sub"]))
         
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
             
         # Create new tokens with sliding window
-        user_data = {
-            **user,
-            "roles": await user_repo.get_user_roles(user["user_id"]),
-            "permissions": await user_repo.get_user_permissions(user["user_id"])
-        }
+        roles, permissions = await user_repo.get_user_authorization(user["user_id"])
+        user_data = {**user, "roles": roles, "permissions": permissions}
         
         access_token = create_access_token(user_data)
-        new_refresh_token = create_refresh_token(user["user_id"])
         
         return {
             "access_token": access_token,
@@ -307,21 +319,28 @@ async def refresh_token(
 async def request_password_reset(
     email: EmailStr,
     background_tasks: BackgroundTasks,
+    response: Response,
     client_ip: str = Depends(get_client_ip)
 ):
-    # Rate limiting
-    if await is_rate_limited(client_ip, "reset_password", max_attempts=3, window_seconds=3600):
+    # Rate limiting per client IP and per account, checked together
+    rate_limit = await check_rate_limits([
+        RateLimitRule("reset_password", client_ip, max_attempts=3, window_seconds=3600),
+        RateLimitRule("reset_password_account", email.lower(), max_attempts=3, window_seconds=3600)
+    ])
+    if not rate_limit.allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many reset attempts. Please try again later."
+            detail="Too many reset attempts. Please try again later.",
+            headers=rate_limit.headers()
         )
+    response.headers.update(rate_limit.headers())
 
-    user_repo = UserRepository()
-    user = user_repo.get_by_email(email)
+    user_repo = get_user_repository()
+    user = await user_repo.get_by_email(email)
     
     if user:
         reset_token = create_password_reset_token(user["user_id"])
-        user_repo.store_password_reset_token(user["user_id"], reset_token)
+        await user_repo.store_password_reset_token(user["user_id"], reset_token)
         
         # Send email asynchronously
         background_tasks.add_task(
@@ -340,18 +359,17 @@ async def request_password_reset(
 async def reset_password(token: str, new_password: str):
     try:
         # Verify token
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_internal_token(token)
         
-        user_repo = UserRepository()
-        if user_repo.verify_reset_token(payload["sub"], token):
+        user_repo = get_user_repository()
+        user_id = int(payload["sub"])
+        if await user_repo.verify_reset_token(user_id, token):
+            # Sign out every session first, so a store outage leaves the password unchanged
+            await get_refresh_token_store().revoke_user(user_id)
             # Update password
-            user_repo.update_password(payload["sub"], new_password)
+            await user_repo.update_password(user_id, new_password)
             # Invalidate token
-            user_repo.invalidate_reset_token(payload["sub"], token)
+            await user_repo.invalidate_reset_token(user_id, token)
             return {"message": "Password updated successfully"}
             
     except JWTError:
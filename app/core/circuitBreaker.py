@@ -0,0 +1,119 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding of the state for metrics
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a dependency that keeps erroring or timing out.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected with ``CircuitOpenError`` without touching the
+    dependency. Slowness counts only through the client's own timeout, raised
+    as one of ``failure_exceptions``: wall-clock time around an await also
+    includes event loop lag, which would open the circuit on a busy worker
+    talking to a healthy dependency. After
+    ``reset_seconds`` a single probe call is let through; if it succeeds the
+    circuit closes, otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 5.0,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+        ignored_exceptions: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failure_exceptions = failure_exceptions
+        self.ignored_exceptions = ignored_exceptions
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self._calls_total = 0
+        self._failures_total = 0
+        self._rejected_total = 0
+        self._opened_total = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def _allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._state = HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _open(self) -> None:
+        if self._state != OPEN:
+            self._opened_total += 1
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    def _on_success(self) -> None:
+        self._consecutive_failures = 0
+        self._state = CLOSED
+
+    def _on_failure(self) -> None:
+        self._failures_total += 1
+        self._consecutive_failures += 1
+        if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        if not self._allow():
+            self._rejected_total += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        probing = self._state == HALF_OPEN
+        self._calls_total += 1
+        try:
+            result = await fn(*args, **kwargs)
+        except self.ignored_exceptions:
+            # The dependency answered; the error is about the request itself
+            self._on_success()
+            raise
+        except self.failure_exceptions:
+            self._on_failure()
+            raise
+        finally:
+            if probing:
+                self._probe_in_flight = False
+
+        self._on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "state_value": STATE_VALUES[state],
+            "consecutive_failures": self._consecutive_failures,
+            "calls_total": self._calls_total,
+            "failures_total": self._failures_total,
+            "rejected_total": self._rejected_total,
+            "opened_total": self._opened_total,
+        }
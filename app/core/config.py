@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 
 class Settings(BaseSettings):
     # Required (no default)
@@ -11,7 +11,8 @@ class Settings(BaseSettings):
     # Optional (with defaults)
     APP_NAME: str = "Auth Service"  # Optional, has default
     VERSION: str = "1.0.0"         # Optional, has default
-    JWT_ALGORITHM: str = "HS256"   # Optional, has default
+    JWT_ALGORITHM: str = "RS256"   # Access tokens; RS*/ES* use rotating keys, HS* uses JWT_SECRET_KEY
+    JWT_INTERNAL_ALGORITHM: str = "HS256"  # Refresh/reset tokens, only verified by this service
     
     # New variables from error
     DEV_MANIFEST_REPO: Optional[str] = None
@@ -20,12 +21,69 @@ class Settings(BaseSettings):
     
     # JWT Settings
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    TOKEN_CACHE_ENABLED: bool = True            # Cache validated access tokens per worker
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_MAX_FAMILIES: int = 10        # Sessions per user; the oldest is revoked beyond this
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000  # Grows if more tokens are revoked at once
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 60.0  # Full reload; covers missed pub/sub messages
+    OTP_EXPIRE_MINUTES: int = 15
+    OTP_MAX_ATTEMPTS: int = 5                   # Wrong codes before a user is locked out for the OTP lifetime
+
+    # Asymmetric signing keys (JWKS)
+    JWT_RSA_KEY_SIZE: int = 2048
+    JWT_KEY_ROTATION_DAYS: float = 30           # Age at which a new signing key takes over
+    JWT_KEY_PREPUBLISH_SECONDS: int = 3600      # Publish keys this long before they sign
+    JWT_KEY_REFRESH_SECONDS: int = 60           # How often workers sync keys from Redis
+    JWT_KEY_STARTUP_TIMEOUT_SECONDS: float = 30.0  # Wait for another worker's first key before failing startup
+    JWKS_CACHE_MAX_AGE: int = 300               # Must stay well below JWT_KEY_PREPUBLISH_SECONDS
+
+    # Password hashing worker pool
+    PASSWORD_HASH_WORKERS: int = 2              # Processes dedicated to bcrypt
+    PASSWORD_HASH_QUEUE_SIZE: int = 32          # Jobs allowed to wait for a worker
+    PASSWORD_HASH_WAIT_TIMEOUT: float = 2.0     # Max wait for a free worker before answering 503
+    PASSWORD_HASH_SCHEME: str = "bcrypt"        # Or "argon2" (argon2id; needs the argon2 extra)
+    PASSWORD_HASH_CALIBRATE: bool = True        # Pick the cost for this node's hardware at startup
+    PASSWORD_HASH_TARGET_SECONDS: float = 0.25  # Hash/verify time calibration aims for
+    PASSWORD_HASH_BCRYPT_MIN_ROUNDS: int = 10   # Policy bounds on the calibrated cost
+    PASSWORD_HASH_BCRYPT_MAX_ROUNDS: int = 14
+    PASSWORD_HASH_ARGON2_MIN_TIME_COST: int = 2
+    PASSWORD_HASH_ARGON2_MAX_TIME_COST: int = 10
+    PASSWORD_HASH_ARGON2_MEMORY_KIB: int = 65536
+    PASSWORD_HASH_ARGON2_PARALLELISM: int = 2
     
     # Database
     POSTGRES_DB: str
-    
+
+    # Database connection pool (per worker process)
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_ACQUIRE_TIMEOUT: float = 5.0        # Seconds to wait for a free connection
+    DB_POOL_MAX_AGE_SECONDS: float = 1800.0     # Recycle connections older than this
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = 30.0 # Ping connections idle for longer than this
+    DB_PREPARED_STATEMENTS: bool = True         # Disable behind PgBouncer in transaction pooling mode
+    USER_REPOSITORY_BACKEND: str = "postgres"  # "postgres", or "memory" for load tests without a database
+
     # Redis settings
     REDIS_URL: str = "redis://redis:6379/0"  # Default Redis URL for development
+    REDIS_SOCKET_TIMEOUT: float = 0.25          # A command slower than this counts as a breaker failure
+    REDIS_CONNECT_TIMEOUT: float = 0.25
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5    # Consecutive errors/timeouts before opening
+    REDIS_BREAKER_RESET_SECONDS: float = 5.0    # Open time before a probe is let through
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000      # Buckets kept by the per-worker fallback limiter
+    USER_CACHE_LOCAL_TTL_SECONDS: float = 30.0  # Per-worker tier; bounds staleness if an invalidation is missed
+    USER_CACHE_LOCAL_MAX_SIZE: int = 10000
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300     # Shared tier
+    USER_CACHE_TOMBSTONE_SECONDS: float = 5.0   # No caching a user this long after a write; outlasts reads in flight
+    RBAC_DEFAULT_ROLE: str = "user"             # Applied to users with no explicit role grants
+    RBAC_CACHE_TTL_SECONDS: float = 300.0       # Role -> permission map; reloaded sooner on invalidation
+    METRICS_SYNC_SECONDS: float = 5.0           # How often subsystem stats are copied into /metrics
+    CREDENTIAL_REAPER_ENABLED: bool = True
+    CREDENTIAL_REAPER_INTERVAL_SECONDS: int = 3600  # One worker across the deployment runs per interval
+    CREDENTIAL_REAPER_BATCH_SIZE: int = 500
+    CREDENTIAL_REAPER_PAUSE_SECONDS: float = 0.2    # Between batches, to spread lock and WAL load
+    CREDENTIAL_REAPER_MAX_RUN_SECONDS: int = 300    # The rest waits for the next run
     
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -35,7 +93,15 @@ class Settings(BaseSettings):
     OTEL_SERVICE_VERSION: str = "1.0.0"
     OTEL_ENVIRONMENT: str = "development"
     OTEL_TEMPO_ENDPOINT: str = "http://tempo:4318/v1/traces"
-    OTEL_DEBUG: bool = True
+    OTEL_DEBUG: bool = False
+    OTEL_EXPORTER: str = "otlp"                     # "otlp" (to OTEL_TEMPO_ENDPOINT) or "console"
+    OTEL_EXPORT_TIMEOUT_SECONDS: float = 5.0        # Per batch; export runs off the request path
+    OTEL_EXPORT_MAX_QUEUE_SIZE: int = 2048          # Finished spans beyond this are dropped and counted
+    OTEL_EXPORT_BATCH_SIZE: int = 512
+    OTEL_EXPORT_DELAY_SECONDS: float = 1.0          # Longest a span waits before its batch is sent
+    OTEL_SAMPLING_RATIO: float = 1.0                # Root spans; child spans follow their parent
+    OTEL_SAMPLING_OVERRIDES: Dict[str, float] = {}  # Root span name -> ratio, e.g. {"GET /health": 0}
+    OTEL_SAMPLE_ERRORS: bool = True                 # Export failures from unsampled traces anyway
 
     # Development settings (with defaults)
     LOGGING_APP: Optional[str] = None
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import settings
+from .metrics import REAPER_BATCH_SECONDS, REAPER_ROWS_DELETED
+from .redisUtils import redis, redis_lock
+from scholarSparkObservability.core import OTelSetup
+
+REAPER_LOCK_KEY = "credential_reaper:lock"
+# Set for an interval by whoever runs, so workers waking later in it skip
+REAPER_RUN_KEY = "credential_reaper:last_run"
+
+# (after_id, batch_size) -> (rows deleted, next cursor or None when done)
+DeleteBatch = Callable[[int, int], Awaitable[Tuple[int, Optional[int]]]]
+
+
+class CredentialReaper:
+    """
+    Deletes expired credential rows in the background.
+
+    Every worker wakes once per interval, but only the one holding the Redis
+    lock, and only if nobody has run this interval yet, does the work. Rows
+    go in small keyset-paged batches, one short transaction each, with a
+    pause in between so vacuum, replication and the request path keep up.
+    A run is capped at ``max_run_seconds``, split evenly between the tables
+    so a large backlog in one cannot starve the others; whatever is left
+    waits for the next run.
+    """
+
+    def __init__(self, interval_seconds: int, batch_size: int, pause_seconds: float, max_run_seconds: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.max_run_seconds = max_run_seconds
+        self._task: Optional[asyncio.Task] = None
+
+        self._runs = 0
+        self._skipped = 0
+        self._deleted: Dict[str, int] = {}
+        self._last_run_seconds = 0.0
+
+    def _jobs(self) -> Dict[str, DeleteBatch]:
+        from ..repositories.factory import get_user_repository
+        repo = get_user_repository()
+        return {
+            "password_reset_tokens": repo.delete_expired_reset_tokens,
+            "openid_credentials": repo.delete_superseded_openid_credentials,
+        }
+
+    async def run_once(self) -> Dict[str, int]:
+        """Reap every table until done or out of its time. Returns rows deleted per table."""
+        started = time.monotonic()
+        jobs = self._jobs()
+        budget = self.max_run_seconds / len(jobs)
+        deleted: Dict[str, int] = {}
+        for table, delete_batch in jobs.items():
+            histogram, counter = REAPER_BATCH_SECONDS.labels(table), REAPER_ROWS_DELETED.labels(table)
+            deleted[table] = 0
+            table_started = time.monotonic()
+            cursor: Optional[int] = 0
+            while cursor is not None and time.monotonic() - table_started < budget:
+                batch_started = time.perf_counter()
+                rows, cursor = await delete_batch(cursor, self.batch_size)
+                histogram.observe(time.perf_counter() - batch_started)
+                counter.inc(rows)
+                deleted[table] += rows
+                if cursor is not None:
+                    await asyncio.sleep(self.pause_seconds)
+            self._deleted[table] = self._deleted.get(table, 0) + deleted[table]
+        self._runs += 1
+        self._last_run_seconds = time.monotonic() - started
+        return deleted
+
+    async def run_if_leader(self) -> Optional[Dict[str, int]]:
+        """Run unless another worker holds the lock or already ran this interval."""
+        async with redis_lock(REAPER_LOCK_KEY, ttl_seconds=self.max_run_seconds + 60) as acquired:
+            if not acquired or not await redis.set(REAPER_RUN_KEY, 1, nx=True, ex=self.interval_seconds):
+                self._skipped += 1
+                return None
+            return await self.run_once()
+
+    async def _maintain(self) -> None:
+        otel = OTelSetup.get_instance()
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            with otel.create_span("credential_reaper.run") as span:
+                try:
+                    deleted = await self.run_if_leader()
+                    span.set_attributes({"reaper.leader": deleted is not None})
+                    if deleted is not None:
+                        span.set_attributes({f"reaper.deleted.{table}": rows for table, rows in deleted.items()})
+                except Exception as e:
+                    otel.record_exception(span, e)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self._runs,
+            "skipped": self._skipped,
+            "deleted": dict(self._deleted),
+            "last_run_seconds": round(self._last_run_seconds, 3),
+        }
+
+
+_credential_reaper: Optional[CredentialReaper] = None
+
+
+def get_credential_reaper() -> CredentialReaper:
+    global _credential_reaper
+    if _credential_reaper is None:
+        _credential_reaper = CredentialReaper(
+            interval_seconds=settings.CREDENTIAL_REAPER_INTERVAL_SECONDS,
+            batch_size=settings.CREDENTIAL_REAPER_BATCH_SIZE,
+            pause_seconds=settings.CREDENTIAL_REAPER_PAUSE_SECONDS,
+            max_run_seconds=settings.CREDENTIAL_REAPER_MAX_RUN_SECONDS
+        )
+    return _credential_reaper
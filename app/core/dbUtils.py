@@ -1,26 +1,313 @@
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+import psycopg
 import psycopg2
+import psycopg2.extensions
+import psycopg_pool
+from psycopg.rows import dict_row
 from psycopg2.extras import RealDictCursor
 from ..core.config import settings
+from .metrics import DB_POOL_ACQUIRE_SECONDS
 from scholarSparkObservability.core import OTelSetup
 
-def get_db_connection():
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be acquired within the acquire timeout."""
+
+
+class PoolClosed(Exception):
+    """Raised when acquiring from a pool that has been shut down."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of psycopg2 connections.
+
+    Connections are created lazily up to ``max_size`` and kept warm down to
+    ``min_size``. A connection older than ``max_age`` seconds is recycled when
+    it is returned or checked out, and a connection that has been idle for
+    longer than ``health_check_interval`` seconds is pinged before it is
+    handed out.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 5.0,
+        max_age: float = 1800.0,
+        health_check_interval: float = 30.0
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_age = max_age
+        self.health_check_interval = health_check_interval
+
+        # Idle connections as (connection, created_at, last_used_at)
+        self._idle: Deque[Tuple[psycopg2.extensions.connection, float, float]] = deque()
+        self._created_at: Dict[int, float] = {}
+        self._cond = threading.Condition()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Counters reported by stats()
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._recycled_total = 0
+        self._failed_checks_total = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def _connect(self) -> psycopg2.extensions.connection:
+        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn: psycopg2.extensions.connection) -> None:
+        """Close a connection and release its slot. Caller must hold the lock."""
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._cond.notify()
+
+    def _is_expired(self, conn: psycopg2.extensions.connection, now: float) -> bool:
+        created_at = self._created_at.get(id(conn), now)
+        return self.max_age > 0 and now - created_at > self.max_age
+
+    def _is_healthy(self, conn: psycopg2.extensions.connection, last_used_at: float, now: float) -> bool:
+        if conn.closed:
+            return False
+        if now - last_used_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def open(self) -> None:
+        """Pre-create ``min_size`` connections."""
+        with self._cond:
+            if self._closed:
+                raise PoolClosed("Connection pool is closed")
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, now, now))
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> psycopg2.extensions.connection:
+        """Borrow a connection, waiting at most ``timeout`` seconds for a free slot."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("Connection pool is closed")
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts_total += 1
+                        raise PoolTimeout(
+                            f"Timed out after {timeout:.2f}s waiting for a database connection "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if candidate is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                conn, _, last_used_at = candidate
+                now = time.monotonic()
+                if self._is_expired(conn, now):
+                    with self._cond:
+                        self._recycled_total += 1
+                        self._discard(conn)
+                    continue
+                if not self._is_healthy(conn, last_used_at, now):
+                    with self._cond:
+                        self._failed_checks_total += 1
+                        self._discard(conn)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._acquired_total += 1
+                self._wait_seconds_total += waited
+                self._wait_seconds_max = max(self._wait_seconds_max, waited)
+            return conn
+
+    def release(self, conn: psycopg2.extensions.connection) -> None:
+        """Return a borrowed connection to the pool."""
+        now = time.monotonic()
+        reusable = not conn.closed
+        if reusable and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            if not reusable or self._closed:
+                self._discard(conn)
+                return
+            if self._is_expired(conn, now):
+                self._recycled_total += 1
+                self._discard(conn)
+                return
+            self._idle.append((conn, self._created_at.get(id(conn), now), now))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[psycopg2.extensions.connection]:
+        """Borrow a connection for the duration of a ``with`` block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of pool utilisation, used to size the pool per pod."""
+        with self._cond:
+            idle = len(self._idle)
+            acquired = self._acquired_total
+            return {
+                "size": self._size,
+                "in_use": self._size - idle,
+                "idle": idle,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "acquired_total": acquired,
+                "timeouts_total": self._timeouts_total,
+                "recycled_total": self._recycled_total,
+                "failed_checks_total": self._failed_checks_total,
+                "wait_seconds_total": round(self._wait_seconds_total, 6),
+                "wait_seconds_avg": round(self._wait_seconds_total / acquired, 6) if acquired else 0.0,
+                "wait_seconds_max": round(self._wait_seconds_max, 6),
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def init_db_pool() -> ConnectionPool:
+    """Create and warm the process-wide pool. Called from the app lifespan."""
+    global _pool
+    otel = OTelSetup.get_instance()
+
+    with otel.create_span("init_db_pool", {
+        "db.system": "postgresql",
+        "db.pool.min_size": settings.DB_POOL_MIN_SIZE,
+        "db.pool.max_size": settings.DB_POOL_MAX_SIZE
+    }) as span:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    settings.DATABASE_URL,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    acquire_timeout=settings.DB_POOL_ACQUIRE_TIMEOUT,
+                    max_age=settings.DB_POOL_MAX_AGE_SECONDS,
+                    health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL
+                )
+            pool = _pool
+        try:
+            pool.open()
+        except Exception as e:
+            # The pool still works lazily; connections are retried on checkout
+            otel.record_exception(span, e)
+            print(f"Error warming database pool: {e}")
+        return pool
+
+
+def get_db_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it lazily for scripts."""
+    if _pool is None:
+        return init_db_pool()
+    return _pool
+
+
+def close_db_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def get_db_connection() -> Iterator[psycopg2.extensions.connection]:
+    """Borrow a pooled connection; it is returned to the pool on exit."""
     otel = OTelSetup.get_instance()
-    
-    with otel.create_span("get_db_connection", {
+
+    with otel.create_span("get_db_connection", lambda: {
         "db.system": "postgresql",
-        "db.operation": "connect",
+        "db.operation": "acquire",
         "db.url": settings.DATABASE_URL.split("@")[-1]  # Safe part of URL
     }) as span:
+        pool = get_db_pool()
         try:
-            conn = psycopg2.connect(
-                settings.DATABASE_URL,
-                cursor_factory=RealDictCursor
-            )
+            conn = pool.acquire()
             span.set_attributes({
                 "db.connection_success": True
             })
-            return conn
-            
         except Exception as e:
             span.set_attributes({
                 "db.connection_success": False,
@@ -28,4 +315,119 @@ def get_db_connection():
             })
             otel.record_exception(span, e)
             print(f"Error connecting to database: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+_async_pool: Optional[psycopg_pool.AsyncConnectionPool] = None
+# Connection -> when it was last connected or returned to the async pool
+_async_last_used: "weakref.WeakKeyDictionary[psycopg.AsyncConnection, float]" = weakref.WeakKeyDictionary()
+# psycopg_pool only keeps the total wait; the longest one is tracked here
+_async_wait_seconds_max = 0.0
+
+
+async def _mark_used(conn: psycopg.AsyncConnection) -> None:
+    _async_last_used[conn] = time.monotonic()
+
+
+async def _check_if_idle(conn: psycopg.AsyncConnection) -> None:
+    """Ping on checkout only after ``DB_POOL_HEALTH_CHECK_INTERVAL`` idle, as ``ConnectionPool`` does."""
+    last_used = _async_last_used.get(conn)
+    if last_used is not None and time.monotonic() - last_used < settings.DB_POOL_HEALTH_CHECK_INTERVAL:
+        return
+    await psycopg_pool.AsyncConnectionPool.check_connection(conn)
+
+
+async def init_async_db_pool() -> psycopg_pool.AsyncConnectionPool:
+    """Create and open the async pool used by request handlers."""
+    global _async_pool
+    otel = OTelSetup.get_instance()
+
+    with otel.create_span("init_async_db_pool", {
+        "db.system": "postgresql",
+        "db.pool.min_size": settings.DB_POOL_MIN_SIZE,
+        "db.pool.max_size": settings.DB_POOL_MAX_SIZE
+    }) as span:
+        if _async_pool is None:
+            _async_pool = psycopg_pool.AsyncConnectionPool(
+                settings.DATABASE_URL,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                timeout=settings.DB_POOL_ACQUIRE_TIMEOUT,
+                max_lifetime=settings.DB_POOL_MAX_AGE_SECONDS,
+                configure=_mark_used,
+                check=_check_if_idle,
+                reset=_mark_used,
+                kwargs={"row_factory": dict_row},
+                open=False
+            )
+        try:
+            # Don't block startup on the database; connections are filled in the background
+            await _async_pool.open(wait=False)
+        except Exception as e:
+            otel.record_exception(span, e)
+            raise
+        return _async_pool
+
+
+async def get_async_db_pool() -> psycopg_pool.AsyncConnectionPool:
+    if _async_pool is None:
+        return await init_async_db_pool()
+    return _async_pool
+
+
+async def close_async_db_pool() -> None:
+    global _async_pool, _async_wait_seconds_max
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+        _async_wait_seconds_max = 0.0
+
+
+def async_db_pool_stats() -> Dict[str, float]:
+    """Async pool stats, reported with the same keys as ``ConnectionPool.stats``."""
+    if _async_pool is None:
+        return {}
+    raw = _async_pool.get_stats()
+    size = raw.get("pool_size", 0)
+    idle = raw.get("pool_available", 0)
+    acquired = raw.get("requests_num", 0)
+    wait_seconds = raw.get("requests_wait_ms", 0) / 1000
+    return {
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        "waiting": raw.get("requests_waiting", 0),
+        "min_size": raw.get("pool_min", settings.DB_POOL_MIN_SIZE),
+        "max_size": raw.get("pool_max", settings.DB_POOL_MAX_SIZE),
+        "acquired_total": acquired,
+        "timeouts_total": raw.get("requests_errors", 0),
+        "recycled_total": raw.get("returns_bad", 0) + raw.get("connections_lost", 0),
+        "failed_checks_total": raw.get("connections_errors", 0),
+        "wait_seconds_total": round(wait_seconds, 6),
+        "wait_seconds_avg": round(wait_seconds / acquired, 6) if acquired else 0.0,
+        "wait_seconds_max": round(_async_wait_seconds_max, 6),
+    }
+
+
+@asynccontextmanager
+async def get_async_db_connection() -> AsyncIterator[psycopg.AsyncConnection]:
+    """
+    Borrow a connection from the async pool. The block runs in one transaction
+    that is committed on exit, or rolled back if it raises.
+    """
+    global _async_wait_seconds_max
+    pool = await get_async_db_pool()
+    try:
+        started = time.perf_counter()
+        async with pool.connection() as conn:
+            waited = time.perf_counter() - started
+            DB_POOL_ACQUIRE_SECONDS.observe(waited)
+            _async_wait_seconds_max = max(_async_wait_seconds_max, waited)
+            yield conn
+    except psycopg_pool.PoolTimeout as e:
+        raise PoolTimeout(str(e)) from e
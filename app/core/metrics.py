@@ -0,0 +1,291 @@
+"""
+Prometheus metrics.
+
+Run several workers per pod with ``PROMETHEUS_MULTIPROC_DIR`` set (to an
+empty directory, before the workers start): every worker writes its samples
+to memory-mapped files there and ``/metrics`` on any worker reports the sum.
+
+Hot-path updates touch only pre-bound label children, whose locks are per
+series and uncontended on the event loop. Counters the subsystems already keep
+for ``/health/stats`` (cache hits, dropped spans, pool levels) are not
+double-counted per request: a background task copies their deltas in every
+METRICS_SYNC_SECONDS.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+from .config import settings
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUESTS = Counter(
+    "auth_http_requests_total", "HTTP requests by route and status",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "auth_http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+PASSWORD_HASHING_SECONDS = Histogram(
+    "auth_password_hashing_duration_seconds", "Hashing time on a pool worker, queueing excluded",
+    ["operation"],
+    buckets=(0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0)
+)
+PASSWORD_HASHING_WAIT_SECONDS = Histogram(
+    "auth_password_hashing_queue_seconds", "Wait for a free hashing worker",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0)
+)
+DB_POOL_ACQUIRE_SECONDS = Histogram(
+    "auth_db_pool_acquire_seconds", "Wait for a pooled database connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+REPOSITORY_SECONDS = Histogram(
+    "auth_repository_duration_seconds", "User repository method latency, cache hits included",
+    ["repository", "method"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "auth_redis_command_duration_seconds", "Redis round trip by command",
+    ["command"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "auth_rate_limit_decisions_total", "Rate limit checks by outcome and enforcing backend",
+    ["backend", "decision"]
+)
+CACHE_LOOKUPS = Counter(
+    "auth_cache_lookups_total", "Cache lookups by result",
+    ["cache", "result"]
+)
+CACHE_ENTRIES = Gauge(
+    "auth_cache_entries", "Entries held in per-worker caches",
+    ["cache"], multiprocess_mode="livesum"
+)
+SPANS_DROPPED = Counter("auth_spans_dropped_total", "Finished spans dropped instead of exported")
+DB_POOL_CONNECTIONS = Gauge(
+    "auth_db_pool_connections", "Async pool connections by state",
+    ["state"], multiprocess_mode="livesum"
+)
+PASSWORD_HASHING_QUEUE = Gauge(
+    "auth_password_hashing_queue_depth", "Hashing jobs waiting for a worker",
+    multiprocess_mode="livesum"
+)
+CIRCUIT_STATE = Gauge(
+    "auth_circuit_state", "Circuit breaker state: 0 closed, 1 half open, 2 open",
+    ["name"], multiprocess_mode="livemax"
+)
+REAPER_ROWS_DELETED = Counter(
+    "auth_reaper_rows_deleted_total", "Expired credential rows deleted by the reaper",
+    ["table"]
+)
+REAPER_BATCH_SECONDS = Histogram(
+    "auth_reaper_batch_duration_seconds", "Reaper delete batch latency",
+    ["table"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+_PASSWORD_HASHING = {operation: PASSWORD_HASHING_SECONDS.labels(operation) for operation in ("hash", "verify")}
+_PASSWORD_HASHING["queue"] = PASSWORD_HASHING_WAIT_SECONDS
+_RATE_LIMIT = {
+    (backend, allowed): RATE_LIMIT_DECISIONS.labels(backend, "allowed" if allowed else "limited")
+    for backend in ("redis", "local") for allowed in (True, False)
+}
+_REDIS_COMMANDS: Dict[str, Any] = {}
+
+
+def observe_password_hashing(operation: str, seconds: float) -> None:
+    _PASSWORD_HASHING[operation].observe(seconds)
+
+
+def count_rate_limit_decision(backend: str, allowed: bool) -> None:
+    _RATE_LIMIT[backend, allowed].inc()
+
+
+def observe_redis_command(command: str, seconds: float) -> None:
+    child = _REDIS_COMMANDS.get(command)
+    if child is None:
+        child = _REDIS_COMMANDS[command] = REDIS_COMMAND_SECONDS.labels(command)
+    child.observe(seconds)
+
+
+def timed_methods(cls: type) -> type:
+    """Class decorator: time every public method into REPOSITORY_SECONDS."""
+    for name, fn in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(fn):
+            continue
+        setattr(cls, name, _timed(fn, REPOSITORY_SECONDS.labels(cls.__name__, name)))
+    return cls
+
+
+def _timed(fn: Callable, histogram: Any) -> Callable:
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def timed_async(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return timed_async
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return timed
+
+
+class MetricsMiddleware:
+    """
+    Per-route latency and status counts. Routes are labelled by their path
+    template, never the raw path, so series stay bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Optional[Dict[Any, str]] = None
+        self._children: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+
+    def _route(self, scope) -> str:
+        if self._route_paths is None:
+            self._route_paths = {
+                route.endpoint: route.path
+                for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+    def _observe(self, scope, status_code: int, seconds: float) -> None:
+        key = (scope["method"], self._route(scope), status_code)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                HTTP_REQUEST_SECONDS.labels(key[0], key[1]),
+                HTTP_REQUESTS.labels(key[0], key[1], str(status_code))
+            )
+        children[0].observe(seconds)
+        children[1].inc()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._observe(scope, status_code, time.perf_counter() - started)
+
+
+# Stats sync
+
+_last_totals: Dict[Tuple[str, ...], float] = {}
+_sync_task: Optional[asyncio.Task] = None
+
+
+def _add_delta(counter: Any, key: Tuple[str, ...], total: float) -> None:
+    """Advance a counter to a subsystem's running total."""
+    delta = total - _last_totals.get(key, 0)
+    if delta > 0:
+        counter.inc(delta)
+    _last_totals[key] = total
+
+
+def sync_stats() -> None:
+    """Copy this worker's subsystem stats into the Prometheus series."""
+    from .dbUtils import async_db_pool_stats
+    from .passwordHashing import get_hashing_pool
+    from .rbac import get_role_permission_cache
+    from .redisUtils import redis_breaker
+    from .tokenCache import get_token_cache
+    from .userCache import get_user_cache
+    from scholarSparkObservability.core import OTelSetup
+
+    token_cache = get_token_cache().stats()
+    user_cache = get_user_cache().stats()
+    rbac = get_role_permission_cache().stats()
+    for cache, result, total in (
+        ("token", "hit", token_cache["hits"]),
+        ("token", "miss", token_cache["misses"]),
+        ("user", "local_hit", user_cache["local_hits"]),
+        ("user", "redis_hit", user_cache["redis_hits"]),
+        ("user", "miss", user_cache["misses"]),
+        ("rbac", "hit", rbac["hits"]),
+        ("rbac", "miss", rbac["loads"]),
+    ):
+        _add_delta(CACHE_LOOKUPS.labels(cache, result), ("cache", cache, result), total)
+    CACHE_ENTRIES.labels("token").set(token_cache["size"])
+    CACHE_ENTRIES.labels("user").set(user_cache["local_size"])
+
+    pool = async_db_pool_stats()
+    for state in ("in_use", "idle", "waiting"):
+        DB_POOL_CONNECTIONS.labels(state).set(pool.get(state, 0))
+    PASSWORD_HASHING_QUEUE.set(get_hashing_pool().stats()["queue_depth"])
+    CIRCUIT_STATE.labels(redis_breaker.name).set(redis_breaker.stats()["state_value"])
+
+    otel = OTelSetup.get_instance()
+    if hasattr(otel, "stats"):
+        _add_delta(SPANS_DROPPED, ("spans_dropped",), otel.stats()["dropped"])
+
+
+async def _sync_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_SYNC_SECONDS)
+        sync_stats()
+
+
+def start_metrics_sync() -> None:
+    global _sync_task
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_periodically())
+
+
+async def stop_metrics_sync() -> None:
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+    if MULTIPROCESS:
+        # Drops this worker's live gauges; its counters stay in the totals
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition for /metrics: all workers' series in multiprocess mode."""
+    sync_stats()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,140 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.schema.user import OTPCredential
+from .config import settings
+from .redisUtils import redis
+from scholarSparkObservability.core import OTelSetup
+
+# One outstanding OTP per user, stored as a digest only; the attempt counter
+# outlives a reissue so generating new codes does not reset it:
+#   otp:{<user_id>}:token     sha256 of the token, TTL = OTP lifetime
+#   otp:{<user_id>}:attempts  failed verifications, TTL = OTP lifetime from the first failure
+
+# KEYS: token, attempts
+# ARGV: presented digest, max attempts, window seconds
+# Returns 1 consumed, 0 wrong or expired, -<retry after seconds> when locked out
+_CONSUME_SCRIPT = """
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if attempts >= tonumber(ARGV[2]) then
+    return -math.max(redis.call('TTL', KEYS[2]), 1)
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+end
+if redis.call('INCR', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return 0
+"""
+
+_consume = redis.register_script(_CONSUME_SCRIPT)
+
+
+def _token_key(user_id: int) -> str:
+    return f"otp:{{{user_id}}}:token"
+
+
+def _attempts_key(user_id: int) -> str:
+    return f"otp:{{{user_id}}}:attempts"
+
+
+def _digest(token: str) -> str:
+    # Tokens are 256 random bits, so an unsalted digest is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class OTPStore:
+    """
+    Single-use one-time passwords in Redis.
+
+    Expiry is the key's TTL, and verifying compares and deletes in one script,
+    so a code can be consumed at most once even under concurrent requests.
+    After ``max_attempts`` wrong codes the user is locked out until the
+    attempt window expires. If Redis cannot be reached the store fails closed.
+    """
+
+    def __init__(self, ttl_seconds: int, max_attempts: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self.otel = OTelSetup.get_instance()
+
+        self._issued = 0
+        self._consumed = 0
+        self._failed = 0
+        self._locked = 0
+        self._unavailable = 0
+
+    def _store_unavailable(self, e: Exception) -> HTTPException:
+        self._unavailable += 1
+        with self.otel.create_span("otp_store.unavailable") as span:
+            self.otel.record_exception(span, e)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OTP store temporarily unavailable, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+    async def issue(self, user_id: int, source: str) -> OTPCredential:
+        """Create a user's OTP, replacing any outstanding one."""
+        otp = OTPCredential(
+            token=secrets.token_urlsafe(32),
+            source=source,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        )
+        try:
+            await redis.set(_token_key(user_id), _digest(otp.token), ex=self.ttl_seconds)
+        except Exception as e:
+            raise self._store_unavailable(e) from e
+        self._issued += 1
+        return otp
+
+    async def verify(self, user_id: int, token: str) -> bool:
+        """Consume the user's OTP if ``token`` matches it. Raises 429 once locked out."""
+        try:
+            result = await _consume(
+                keys=[_token_key(user_id), _attempts_key(user_id)],
+                args=[_digest(token), self.max_attempts, self.ttl_seconds]
+            )
+        except Exception as e:
+            raise self._store_unavailable(e) from e
+
+        if result == 1:
+            self._consumed += 1
+            return True
+        if result < 0:
+            self._locked += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed OTP attempts",
+                headers={"Retry-After": str(-result)}
+            )
+        self._failed += 1
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "issued": self._issued,
+            "consumed": self._consumed,
+            "failed": self._failed,
+            "locked": self._locked,
+            "unavailable": self._unavailable,
+        }
+
+
+_otp_store: Optional[OTPStore] = None
+
+
+def get_otp_store() -> OTPStore:
+    global _otp_store
+    if _otp_store is None:
+        _otp_store = OTPStore(
+            ttl_seconds=settings.OTP_EXPIRE_MINUTES * 60,
+            max_attempts=settings.OTP_MAX_ATTEMPTS
+        )
+    return _otp_store
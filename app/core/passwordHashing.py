@@ -0,0 +1,342 @@
+import asyncio
+import math
+import multiprocessing
+import secrets
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from passlib import hash as passlib_hash
+from passlib.context import CryptContext
+
+# Password hashing. Kept free of app imports so spawned workers start quickly.
+# Reconfigured in place by PasswordHashingPool.configure.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+SCHEMES = ("bcrypt", "argon2")
+
+
+def scheme_available(scheme: str) -> bool:
+    """argon2 needs the optional argon2-cffi backend."""
+    return scheme == "bcrypt" or (scheme == "argon2" and passlib_hash.argon2.has_backend())
+
+
+@dataclass(frozen=True)
+class HashPolicy:
+    """
+    Scheme and cost for new hashes. ``rounds`` is the bcrypt log2 cost or the
+    argon2id time cost.
+
+    Hashes in another scheme, or below ``min_rounds``, report ``needs_update``
+    and are upgraded on the user's next successful login. ``min_rounds`` is
+    the policy floor, not the calibrated cost, so nodes calibrated higher do
+    not rehash everything written by the others; it defaults to ``rounds``.
+    """
+    scheme: str = "bcrypt"
+    rounds: int = 12
+    memory_kib: int = 65536
+    parallelism: int = 2
+    min_rounds: Optional[int] = None
+
+    def context_config(self) -> Dict[str, Any]:
+        if self.scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme {self.scheme!r}; expected one of {', '.join(SCHEMES)}")
+        if not scheme_available(self.scheme):
+            raise RuntimeError(f"Password hash scheme {self.scheme!r} needs argon2-cffi installed")
+        # Older schemes stay verifiable so existing hashes can be migrated
+        schemes = [self.scheme] + [s for s in SCHEMES if s != self.scheme and scheme_available(s)]
+        config: Dict[str, Any] = {
+            "schemes": schemes,
+            "default": self.scheme,
+            "deprecated": schemes[1:],
+            f"{self.scheme}__default_rounds": self.rounds,
+            f"{self.scheme}__min_rounds": self.rounds if self.min_rounds is None else self.min_rounds,
+        }
+        if self.scheme == "argon2":
+            config.update({
+                "argon2__type": "ID",
+                "argon2__memory_cost": self.memory_kib,
+                "argon2__parallelism": self.parallelism,
+            })
+        return config
+
+
+def calibrate(
+    scheme: str,
+    target_seconds: float,
+    min_rounds: int,
+    max_rounds: int,
+    memory_kib: int = 65536,
+    parallelism: int = 2
+) -> HashPolicy:
+    """
+    The highest cost within ``[min_rounds, max_rounds]`` whose hash should
+    take no longer than ``target_seconds`` on this machine.
+
+    Times the cheapest cost and extrapolates: each bcrypt round doubles the
+    work, argon2 time cost scales it linearly.
+    """
+    context = CryptContext(**HashPolicy(scheme, min_rounds, memory_kib, parallelism).context_config())
+    seconds = math.inf
+    for _ in range(3):
+        started = time.perf_counter()
+        context.hash("calibration")
+        seconds = min(seconds, time.perf_counter() - started)
+
+    if seconds >= target_seconds:
+        rounds = min_rounds
+    elif scheme == "bcrypt":
+        rounds = min_rounds + int(math.log2(target_seconds / seconds))
+    else:
+        rounds = int(min_rounds * target_seconds / seconds)
+    return HashPolicy(scheme, max(min_rounds, min(rounds, max_rounds)), memory_kib, parallelism, min_rounds)
+
+
+def policy_from_settings() -> HashPolicy:
+    """The configured policy, calibrated for this node unless disabled. Blocks while timing."""
+    from .config import settings
+
+    if settings.PASSWORD_HASH_SCHEME == "argon2":
+        bounds = (settings.PASSWORD_HASH_ARGON2_MIN_TIME_COST, settings.PASSWORD_HASH_ARGON2_MAX_TIME_COST)
+    else:
+        bounds = (settings.PASSWORD_HASH_BCRYPT_MIN_ROUNDS, settings.PASSWORD_HASH_BCRYPT_MAX_ROUNDS)
+    memory = (settings.PASSWORD_HASH_ARGON2_MEMORY_KIB, settings.PASSWORD_HASH_ARGON2_PARALLELISM)
+    if not settings.PASSWORD_HASH_CALIBRATE:
+        return HashPolicy(settings.PASSWORD_HASH_SCHEME, bounds[0], *memory, bounds[0])
+    return calibrate(settings.PASSWORD_HASH_SCHEME, settings.PASSWORD_HASH_TARGET_SECONDS, *bounds, *memory)
+
+
+def _configure(config: Dict[str, Any]) -> None:
+    pwd_context.load(config)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _warm_up() -> bool:
+    return True
+
+
+def new_salt(length: int = 16) -> str:
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def hash_password_batch(passwords: Sequence[str]) -> List[Tuple[Optional[str], str]]:
+    """
+    Salt and hash many passwords in one worker call, for bulk jobs.
+
+    Returns ``(password_hash, salt)`` per password, or ``(None, error)`` for a
+    password that could not be hashed, so one bad row does not fail the chunk.
+    """
+    results: List[Tuple[Optional[str], str]] = []
+    for password in passwords:
+        salt = new_salt()
+        try:
+            results.append((pwd_context.hash(password + salt), salt))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+class _LatencyStats:
+    """Running count/sum/max for one operation."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "seconds_avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "seconds_max": round(self.max, 6),
+        }
+
+
+class PasswordHashingPool:
+    """
+    Runs bcrypt in a dedicated process pool so password work never pins the
+    event loop.
+
+    Jobs are handed to the executor only when a worker is free, so none
+    queue inside it. Up to ``queue_size`` jobs wait here for a worker; a job
+    that finds the queue full, or that has not started within
+    ``wait_timeout`` seconds, is rejected with a 503 rather than queueing
+    behind a login burst. Time waiting for a worker and time hashing are
+    measured separately.
+    """
+
+    def __init__(self, max_workers: int = 2, queue_size: int = 32, wait_timeout: float = 2.0):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.wait_timeout = wait_timeout
+
+        self.policy = HashPolicy()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._waiting = 0
+        self._rejected_total = 0
+        self._queue_wait = _LatencyStats()
+        self._latency = {"hash": _LatencyStats(), "verify": _LatencyStats()}
+        self._latency_observers: List[Callable[[str, float], None]] = []
+
+    def configure(self, policy: HashPolicy) -> None:
+        """Set the hashing policy. Workers pick it up when the pool starts."""
+        if self.started:
+            raise RuntimeError("Configure the hashing pool before starting it")
+        _configure(policy.context_config())
+        self.policy = policy
+
+    def add_latency_observer(self, observer: Callable[[str, float], None]) -> None:
+        """Also report each job's ``(operation, seconds)``, e.g. to a metrics histogram."""
+        if observer not in self._latency_observers:
+            self._latency_observers.append(observer)
+
+    def _observe(self, operation: str, seconds: float) -> None:
+        """``operation`` is "hash", "verify", or "queue" for time spent waiting for a worker."""
+        stats = self._queue_wait if operation == "queue" else self._latency[operation]
+        stats.observe(seconds)
+        for observer in self._latency_observers:
+            observer(operation, seconds)
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        if self._executor is not None:
+            return
+        # Spawn rather than fork: the parent runs an event loop and client threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_configure,
+            initargs=(self.policy.context_config(),)
+        )
+        self._workers = asyncio.Semaphore(self.max_workers)
+        loop = asyncio.get_running_loop()
+        # Pay the worker start-up cost before the first login, not during it
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _warm_up) for _ in range(self.max_workers)
+        ))
+
+    async def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def _submit(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._executor is None:
+            # Not started (scripts, one-off jobs): run inline
+            started = time.perf_counter()
+            result = fn(*args)
+            self._observe(operation, time.perf_counter() - started)
+            return result
+
+        if self._waiting >= self.queue_size:
+            self._reject()
+
+        queued = time.perf_counter()
+        self._waiting += 1
+        # Not wait_for: before Python 3.12 it can time out after the acquire
+        # succeeded, and that permit would never be released
+        acquire = asyncio.ensure_future(self._workers.acquire())
+        try:
+            done, _ = await asyncio.wait({acquire}, timeout=self.wait_timeout)
+        except asyncio.CancelledError:
+            self._abandon(acquire)
+            raise
+        finally:
+            self._waiting -= 1
+        if not done:
+            self._abandon(acquire)
+            self._reject()
+
+        self._running += 1
+        self._observe("queue", time.perf_counter() - queued)
+        try:
+            started = time.perf_counter()
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            self._observe(operation, time.perf_counter() - started)
+            return result
+        finally:
+            self._running -= 1
+            self._workers.release()
+
+    def _abandon(self, acquire: "asyncio.Future[bool]") -> None:
+        """Stop waiting for a worker, giving the permit back if the acquire got one anyway."""
+        acquire.add_done_callback(
+            lambda f: self._workers.release() if not f.cancelled() and f.exception() is None else None
+        )
+        acquire.cancel()
+
+    def _reject(self) -> None:
+        self._rejected_total += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", _hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", _verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify, and if the hash is outdated also rehash under the current policy, in one job."""
+        return await self._submit("verify", _verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheme": self.policy.scheme,
+            "rounds": self.policy.rounds,
+            "workers": self.max_workers if self.started else 0,
+            "queue_capacity": self.queue_size,
+            "in_flight": self._running,
+            "queue_depth": self._waiting,
+            "rejected_total": self._rejected_total,
+            "queue_wait": self._queue_wait.as_dict(),
+            "hash": self._latency["hash"].as_dict(),
+            "verify": self._latency["verify"].as_dict(),
+        }
+
+
+_hashing_pool: Optional[PasswordHashingPool] = None
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    global _hashing_pool
+    if _hashing_pool is None:
+        from .config import settings
+
+        _hashing_pool = PasswordHashingPool(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+            wait_timeout=settings.PASSWORD_HASH_WAIT_TIMEOUT,
+        )
+    return _hashing_pool
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from redis import asyncio as aioredis
+from .config import settings
+from .redisUtils import redis
+from scholarSparkObservability.core import OTelSetup
+
+# Called with the message payload, or with None after a reconnect to signal
+# that messages may have been missed and local state should be resynced.
+MessageHandler = Callable[[Optional[str]], None]
+
+_handlers: Dict[str, List[MessageHandler]] = {}
+_listener_task: Optional[asyncio.Task] = None
+
+# Subscriptions sit idle for long periods, so they get their own client
+# without the short socket timeout used for request-path commands.
+_subscriber = aioredis.from_url(
+    settings.REDIS_URL,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    decode_responses=True
+)
+
+
+def subscribe(channel: str, handler: MessageHandler) -> None:
+    """Register a handler for a channel. Takes effect when the listener (re)connects."""
+    _handlers.setdefault(channel, []).append(handler)
+
+
+async def publish(channel: str, message: str) -> None:
+    await redis.publish(channel, message)
+
+
+def _dispatch(channel: str, message: Optional[str]) -> None:
+    otel = OTelSetup.get_instance()
+    for handler in _handlers.get(channel, []):
+        try:
+            handler(message)
+        except Exception as e:
+            with otel.create_span("pubsub.handler_error", {"pubsub.channel": channel}) as span:
+                otel.record_exception(span, e)
+
+
+async def _listen() -> None:
+    backoff = 0.5
+    may_have_missed = False
+    while True:
+        pubsub = _subscriber.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(*_handlers.keys())
+            if may_have_missed:
+                for channel in _handlers:
+                    _dispatch(channel, None)
+                may_have_missed = False
+            backoff = 0.5
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _dispatch(message["channel"], message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            may_have_missed = True
+            print(f"Pub/sub listener disconnected: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+async def start_listener() -> None:
+    global _listener_task
+    if _listener_task is None and _handlers:
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_listener() -> None:
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
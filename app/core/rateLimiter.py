@@ -1,4 +1,202 @@
-from .securityUtils import redis
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+from .config import settings
+from .metrics import count_rate_limit_decision
+from .redisUtils import redis
+
+# Sliding-window log over one sorted set per rule. All rules are checked and,
+# only if every one of them allows the request, recorded, in a single atomic
+# round trip.
+#
+# KEYS: one sorted set per rule
+# ARGV: member, then (limit, window_ms) per rule
+# Returns: {allowed, retry_after_ms, remaining_1, reset_ms_1, remaining_2, ...}
+# Uses the server clock (TIME), which needs Redis 5+ script effects replication.
+_SLIDING_WINDOW_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local member = ARGV[1]
+
+local allowed = 1
+local retry_after = 0
+local counts = {}
+
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+    counts[i] = count
+    if count >= limit then
+        allowed = 0
+        local oldest = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+
+local result = {allowed, retry_after}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local count = counts[i]
+    if allowed == 1 then
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, window)
+        count = count + 1
+    end
+    local reset = window
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window - now
+    end
+    table.insert(result, math.max(limit - count, 0))
+    table.insert(result, reset)
+end
+return result
+"""
+
+_sliding_window = redis.register_script(_SLIDING_WINDOW_SCRIPT)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """One limit, e.g. 5 attempts per hour for a given IP."""
+    action: str
+    identifier: str
+    max_attempts: int
+    window_seconds: int
+
+    @property
+    def key(self) -> str:
+        return f"ratelimit:{self.action}:{self.identifier}"
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int              # Limit of the most restrictive rule
+    remaining: int          # Requests left under the most restrictive rule
+    reset_seconds: int      # Seconds until that rule's window frees a slot
+    retry_after_seconds: int = 0
+
+    def headers(self) -> Dict[str, str]:
+        """IETF ``RateLimit-*`` response headers (plus Retry-After when denied)."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_seconds),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after_seconds)
+        return headers
+
+
+def _ceil_seconds(milliseconds: int) -> int:
+    return max(-(-int(milliseconds) // 1000), 0)
+
+
+class LocalTokenBucketLimiter:
+    """
+    In-process fallback used while Redis is unavailable.
+
+    Each rule key gets a bucket of ``max_attempts`` tokens refilled evenly over
+    the window. Limits are enforced per worker, so a deployment admits up to
+    ``workers x max_attempts`` per window in degraded mode. That is looser
+    than the Redis limiter, but much better than failing open entirely.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> (tokens, last_refill_monotonic)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refilled(self, rule: RateLimitRule, now: float) -> float:
+        tokens, last = self._buckets.get(rule.key, (float(rule.max_attempts), now))
+        rate = rule.max_attempts / rule.window_seconds
+        return min(float(rule.max_attempts), tokens + (now - last) * rate)
+
+    def check(self, rules: Sequence[RateLimitRule]) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            levels = [(rule, self._refilled(rule, now)) for rule in rules]
+            allowed = all(tokens >= 1 for _, tokens in levels)
+
+            retry_after = 0.0
+            for rule, tokens in levels:
+                rate = rule.max_attempts / rule.window_seconds
+                if allowed:
+                    tokens -= 1
+                elif tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                self._buckets[rule.key] = (tokens, now)
+                self._buckets.move_to_end(rule.key)
+
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        rule, tokens = min(
+            ((rule, self._buckets[rule.key][0]) for rule, _ in levels),
+            key=lambda level: level[1]
+        )
+        rate = rule.max_attempts / rule.window_seconds
+        return RateLimitResult(
+            allowed=allowed,
+            limit=rule.max_attempts,
+            remaining=int(tokens),
+            reset_seconds=int(-(-(rule.max_attempts - tokens) // rate)),
+            retry_after_seconds=int(-(-retry_after // 1))
+        )
+
+
+local_limiter = LocalTokenBucketLimiter(max_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+
+
+async def check_rate_limits(rules: Sequence[RateLimitRule]) -> RateLimitResult:
+    """
+    Check and record one request against several rules at once.
+
+    The request is recorded against every rule only if all of them allow it,
+    so a client blocked by one rule does not use up quota on the others.
+    """
+    if not rules:
+        raise ValueError("At least one rate limit rule is required")
+
+    args: List = [secrets.token_hex(8)]
+    for rule in rules:
+        args.extend([rule.max_attempts, rule.window_seconds * 1000])
+
+    try:
+        raw = await _sliding_window(keys=[rule.key for rule in rules], args=args)
+    except Exception:
+        # Redis is down, slow, or its circuit is open: enforce limits locally
+        result = local_limiter.check(rules)
+        count_rate_limit_decision("local", result.allowed)
+        return result
+
+    allowed, retry_after_ms = int(raw[0]), int(raw[1])
+    count_rate_limit_decision("redis", bool(allowed))
+    per_rule = [
+        (rule, int(raw[2 + i * 2]), int(raw[3 + i * 2]))
+        for i, rule in enumerate(rules)
+    ]
+    rule, remaining, reset_ms = min(per_rule, key=lambda r: (r[1], -r[2]))
+    return RateLimitResult(
+        allowed=bool(allowed),
+        limit=rule.max_attempts,
+        remaining=remaining,
+        reset_seconds=_ceil_seconds(reset_ms),
+        retry_after_seconds=_ceil_seconds(retry_after_ms)
+    )
+
 
 async def is_rate_limited(
     identifier: str,
@@ -8,35 +206,14 @@ async def is_rate_limited(
 ) -> bool:
     """
     Check if an action is rate limited
-    
+
     Args:
         identifier: Usually IP address or user_id
         action: Type of action being rate limited
         max_attempts: Maximum number of attempts allowed
         window_seconds: Time window in seconds
     """
-    key = f"ratelimit:{action}:{identifier}"
-    
-    async with redis.pipeline() as pipe:
-        try:
-            # Get current count and increment
-            current = await redis.get(key)
-            
-            if current is None:
-                # First attempt
-                await pipe.set(key, 1, ex=window_seconds)
-                await pipe.execute()
-                return False
-                
-            count = int(current)
-            if count >= max_attempts:
-                return True
-                
-            # Increment counter
-            await pipe.incr(key)
-            await pipe.execute()
-            return False
-            
-        except Exception as e:
-            # If Redis fails, default to allowing the request
-            return False
\ No newline at end of file
+    result = await check_rate_limits([
+        RateLimitRule(action, identifier, max_attempts, window_seconds)
+    ])
+    return not result.allowed
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .config import settings
+from .pubsub import publish, subscribe
+from scholarSparkObservability.core import OTelSetup
+
+INVALIDATION_CHANNEL = "rbac:invalidate"
+
+
+class RolePermissionCache:
+    """
+    Per-worker copy of the role -> permissions expansion.
+
+    The whole mapping is small and read on every token issue, so it is loaded
+    with a single query and kept in memory. Grant changes publish on
+    ``INVALIDATION_CHANNEL`` and every worker reloads on its next lookup; the
+    TTL only bounds staleness if an invalidation is missed.
+
+    The cache does not query the database itself: the repository loads the
+    rows and hands them to ``store``, the same split as ``UserCache``.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._mapping: Optional[Dict[str, FrozenSet[str]]] = None
+        self._expires_at = 0.0
+        # Bumped on every invalidation so a load that raced one is not kept
+        self._generation = 0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+        self._hits = 0
+        self._loads = 0
+        self._invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def refresh_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        return self._refresh_lock
+
+    def get(self) -> Optional[Dict[str, FrozenSet[str]]]:
+        """The current mapping, or None if it must be (re)loaded."""
+        if self._mapping is None or self._expires_at <= time.monotonic():
+            return None
+        self._hits += 1
+        return self._mapping
+
+    def store(self, rows: Iterable[Tuple[str, Optional[str]]], generation: int) -> Dict[str, FrozenSet[str]]:
+        """Build the mapping from ``(role, permission)`` rows and cache it."""
+        grants: Dict[str, set] = {}
+        for role, permission in rows:
+            permissions = grants.setdefault(role, set())
+            if permission is not None:
+                permissions.add(permission)
+        mapping = {role: frozenset(permissions) for role, permissions in grants.items()}
+
+        self._loads += 1
+        if generation == self._generation:
+            self._mapping = mapping
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return mapping
+
+    def invalidate(self, message: Optional[str] = None) -> None:
+        self._generation += 1
+        self._invalidations += 1
+        self._mapping = None
+
+    async def publish_invalidation(self) -> None:
+        """Drop the mapping here and tell every other worker to do the same."""
+        self.invalidate()
+        otel = OTelSetup.get_instance()
+        with otel.create_span("rbac.invalidate") as span:
+            try:
+                await publish(INVALIDATION_CHANNEL, "grants")
+            except Exception as e:
+                # Other workers pick the change up when their TTL runs out
+                otel.record_exception(span, e)
+
+    @staticmethod
+    def expand(mapping: Dict[str, FrozenSet[str]], roles: Iterable[str]) -> List[str]:
+        permissions: set = set()
+        for role in roles:
+            permissions |= mapping.get(role, frozenset())
+        return sorted(permissions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "roles": len(self._mapping) if self._mapping is not None else 0,
+            "hits": self._hits,
+            "loads": self._loads,
+            "invalidations": self._invalidations,
+        }
+
+
+_role_permission_cache: Optional[RolePermissionCache] = None
+
+
+def get_role_permission_cache() -> RolePermissionCache:
+    global _role_permission_cache
+    if _role_permission_cache is None:
+        _role_permission_cache = RolePermissionCache(ttl_seconds=settings.RBAC_CACHE_TTL_SECONDS)
+        subscribe(INVALIDATION_CHANNEL, _role_permission_cache.invalidate)
+    return _role_permission_cache
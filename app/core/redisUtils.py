@@ -0,0 +1,67 @@
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from .circuitBreaker import CircuitBreaker, CircuitOpenError
+from .config import settings
+from .metrics import observe_redis_command
+
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.REDIS_BREAKER_RESET_SECONDS,
+    failure_exceptions=(RedisConnectionError, RedisTimeoutError, OSError),
+    ignored_exceptions=(ResponseError,)
+)
+
+
+class BreakerRedis(aioredis.Redis):
+    """Redis client whose every command goes through ``redis_breaker``."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await redis_breaker.call(super().execute_command, *args, **options)
+        finally:
+            observe_redis_command(str(args[0]), time.perf_counter() - started)
+
+
+# Initialize Redis connection. Short timeouts: a slow Redis should trip the
+# breaker rather than hold requests for the default socket timeout. The
+# timeout is the breaker's only measure of slowness.
+redis = BreakerRedis.from_url(
+    settings.REDIS_URL,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT
+)
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@asynccontextmanager
+async def redis_lock(name: str, ttl_seconds: int) -> AsyncIterator[bool]:
+    """
+    Best-effort distributed lock across workers and pods.
+
+    Yields True if this caller holds the lock for the block, False if someone
+    else does. The lock expires on its own after ``ttl_seconds`` in case the
+    holder dies.
+    """
+    token = secrets.token_hex(16)
+    acquired = bool(await redis.set(name, token, nx=True, ex=ttl_seconds))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await redis.eval(_RELEASE_LOCK_SCRIPT, 1, name, token)
@@ -0,0 +1,197 @@
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .redisUtils import redis
+from .securityUtils import create_refresh_token
+from scholarSparkObservability.core import OTelSetup
+
+# Every login starts a token family; each refresh replaces the family's one
+# current token. Presenting any other token of the family means a token was
+# copied, so the whole family is revoked.
+#
+# Keys share the user's hash tag, so one user's families live in one slot:
+#   refresh:{<user_id>}:family:<family_id>  hash {current: jti}, TTL = token expiry
+#   refresh:{<user_id>}:families            zset family_id -> issued at
+
+# KEYS: family, user's families
+# ARGV: jti, ttl seconds, now, max families, family key prefix, family id
+_ISSUE_SCRIPT = """
+redis.call('HSET', KEYS[1], 'current', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[6])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+-- Drop families that expired on their own so they don't count against the cap
+for _, family in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+    if redis.call('EXISTS', ARGV[5] .. family) == 0 then
+        redis.call('ZREM', KEYS[2], family)
+    end
+end
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    for _, family in ipairs(redis.call('ZRANGE', KEYS[2], 0, excess - 1)) do
+        redis.call('DEL', ARGV[5] .. family)
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+end
+return 1
+"""
+
+# KEYS: family, user's families
+# ARGV: presented jti, new jti, ttl seconds, family id
+# Returns 1 rotated, 0 unknown or expired family, -1 reuse (family revoked)
+_ROTATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'current')
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('ZREM', KEYS[2], ARGV[4])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'current', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+-- The index must outlive every family in it, or revoke_user misses them
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# KEYS: user's families
+# ARGV: family key prefix
+_REVOKE_USER_SCRIPT = """
+local families = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, family in ipairs(families) do
+    redis.call('DEL', ARGV[1] .. family)
+end
+redis.call('DEL', KEYS[1])
+return #families
+"""
+
+_issue = redis.register_script(_ISSUE_SCRIPT)
+_rotate = redis.register_script(_ROTATE_SCRIPT)
+_revoke_user = redis.register_script(_REVOKE_USER_SCRIPT)
+
+
+def _family_prefix(user_id: int) -> str:
+    return f"refresh:{{{user_id}}}:family:"
+
+
+def _families_key(user_id: int) -> str:
+    return f"refresh:{{{user_id}}}:families"
+
+
+def _store_unavailable() -> HTTPException:
+    # Fail closed: without the store, reuse cannot be detected
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Session store temporarily unavailable, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+def _invalid(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+class RefreshTokenStore:
+    """
+    Refresh tokens tracked as rotating families in Redis.
+
+    Issuing and rotating are each one atomic script call, so a refresh costs
+    a single round trip. A user keeps at most ``max_families`` sessions; the
+    oldest is revoked when a new login goes over. If Redis cannot be reached
+    the store fails closed with a 503 rather than accept untracked tokens.
+    """
+
+    def __init__(self, ttl_seconds: int, max_families: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_families = max_families
+        self.otel = OTelSetup.get_instance()
+
+        self._issued = 0
+        self._rotated = 0
+        self._reuse_detected = 0
+        self._rejected = 0
+        self._unavailable = 0
+
+    async def issue(self, user_id: int) -> str:
+        """Start a new family for a login and return its first refresh token."""
+        family_id, jti = secrets.token_urlsafe(16), secrets.token_urlsafe(16)
+        prefix = _family_prefix(user_id)
+        try:
+            await _issue(
+                keys=[prefix + family_id, _families_key(user_id)],
+                args=[jti, self.ttl_seconds, time.time(), self.max_families, prefix, family_id]
+            )
+        except Exception as e:
+            self._unavailable += 1
+            with self.otel.create_span("refresh_tokens.unavailable") as span:
+                self.otel.record_exception(span, e)
+            raise _store_unavailable() from e
+        self._issued += 1
+        return create_refresh_token(user_id, family_id, jti)
+
+    async def rotate(self, payload: Dict[str, Any]) -> str:
+        """Exchange a decoded refresh token for the next token in its family."""
+        user_id, family_id, jti = int(payload["sub"]), payload.get("fid"), payload.get("jti")
+        if not family_id or not jti:
+            # Issued before families were tracked
+            self._rejected += 1
+            raise _invalid("Refresh token no longer accepted, please sign in again")
+
+        new_jti = secrets.token_urlsafe(16)
+        try:
+            result = await _rotate(
+                keys=[_family_prefix(user_id) + family_id, _families_key(user_id)],
+                args=[jti, new_jti, self.ttl_seconds, family_id]
+            )
+        except Exception as e:
+            self._unavailable += 1
+            with self.otel.create_span("refresh_tokens.unavailable") as span:
+                self.otel.record_exception(span, e)
+            raise _store_unavailable() from e
+
+        if result == -1:
+            self._reuse_detected += 1
+            raise _invalid("Refresh token reuse detected; the session has been revoked")
+        if result != 1:
+            self._rejected += 1
+            raise _invalid("Refresh token revoked or expired")
+        self._rotated += 1
+        return create_refresh_token(user_id, family_id, new_jti)
+
+    async def revoke_user(self, user_id: int) -> int:
+        """End every session of a user, e.g. before a password reset. Returns families revoked."""
+        try:
+            return int(await _revoke_user(keys=[_families_key(user_id)], args=[_family_prefix(user_id)]))
+        except Exception as e:
+            self._unavailable += 1
+            with self.otel.create_span("refresh_tokens.unavailable") as span:
+                self.otel.record_exception(span, e)
+            raise _store_unavailable() from e
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "issued": self._issued,
+            "rotated": self._rotated,
+            "reuse_detected": self._reuse_detected,
+            "rejected": self._rejected,
+            "unavailable": self._unavailable,
+        }
+
+
+_refresh_token_store: Optional[RefreshTokenStore] = None
+
+
+def get_refresh_token_store() -> RefreshTokenStore:
+    global _refresh_token_store
+    if _refresh_token_store is None:
+        _refresh_token_store = RefreshTokenStore(
+            ttl_seconds=settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+            max_families=settings.REFRESH_TOKEN_MAX_FAMILIES
+        )
+    return _refresh_token_store
@@ -1,21 +1,17 @@
+import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from app.schema.user import TokenPayload
 from .config import settings
+from .passwordHashing import pwd_context, get_hashing_pool, new_salt
+from .tokenCache import get_token_cache
+from .tokenRevocation import get_token_revocation_list
+from .redisUtils import redis
+from .signingKeys import get_key_ring, is_asymmetric
 from scholarSparkObservability.core import OTelSetup
-import secrets
-import string
-from redis import asyncio as aioredis
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Initialize Redis connection
-redis = aioredis.from_url(settings.REDIS_URL)
 
 def get_otel():
     """Lazy initialization of OpenTelemetry instance"""
@@ -53,6 +49,61 @@ def get_password_hash(password: str) -> str:
             otel.record_exception(span, e)
             raise
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop."""
+    otel = get_otel()
+    with otel.create_span("verify_password", {
+        "security.operation": "password_verification",
+        "security.offloaded": True
+    }) as span:
+        try:
+            result = await get_hashing_pool().verify(plain_password, hashed_password)
+            span.set_attributes({
+                "security.verification_success": result
+            })
+            return result
+        except Exception as e:
+            otel.record_exception(span, e)
+            raise
+
+async def verify_password_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing pool. Also returns a replacement hash
+    when the stored one was made under an outdated scheme or cost, else None.
+    """
+    otel = get_otel()
+    with otel.create_span("verify_password", {
+        "security.operation": "password_verification",
+        "security.offloaded": True
+    }) as span:
+        try:
+            result, new_hash = await get_hashing_pool().verify_and_update(plain_password, hashed_password)
+            span.set_attributes({
+                "security.verification_success": result,
+                "security.rehashed": new_hash is not None
+            })
+            return result, new_hash
+        except Exception as e:
+            otel.record_exception(span, e)
+            raise
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the hashing pool."""
+    otel = get_otel()
+    with otel.create_span("get_password_hash", {
+        "security.operation": "password_hashing",
+        "security.offloaded": True
+    }) as span:
+        try:
+            hashed = await get_hashing_pool().hash(password)
+            span.set_attributes({
+                "security.hash_generated": True
+            })
+            return hashed
+        except Exception as e:
+            otel.record_exception(span, e)
+            raise
+
 def create_access_token(user_data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token using a shallow copy of the data."""
     otel = get_otel()
@@ -85,9 +136,19 @@ def create_access_token(user_data: dict, expires_delta: Optional[timedelta] = No
                 "iat": datetime.now(timezone.utc),
                 "nbf": datetime.now(timezone.utc),
                 "iss": settings.APP_NAME,  # Token issuer
-                "aud": ["scholar-spark-services"]  # Intended audiences
+                "aud": ["scholar-spark-services"],  # Intended audiences
+                "jti": secrets.token_urlsafe(16)  # Lets the token be revoked before exp
             })
 
+            if is_asymmetric(settings.JWT_ALGORITHM):
+                signing_key = get_key_ring().signing_key()
+                return jwt.encode(
+                    user_context,
+                    signing_key.signer,
+                    algorithm=signing_key.algorithm,
+                    headers={"kid": signing_key.kid}
+                )
+
             return jwt.encode(
                 user_context,
                 settings.JWT_SECRET_KEY,
@@ -108,8 +169,7 @@ def generate_salt(length: int = 16) -> str:
         "security.operation": "salt_generation"
     }) as span:
         try:
-            alphabet = string.ascii_letters + string.digits
-            salt = ''.join(secrets.choice(alphabet) for _ in range(length))
+            salt = new_salt(length)
             span.set_attributes({
                 "salt.length": length,
                 "salt.generated": True
@@ -122,11 +182,32 @@ def generate_salt(length: int = 16) -> str:
             otel.record_exception(span, e)
             raise
 
+def _access_token_verification_key(token: str):
+    """Pick the key named by the token's ``kid`` header, or the shared secret for HS*."""
+    if not is_asymmetric(settings.JWT_ALGORITHM):
+        return settings.JWT_SECRET_KEY
+    kid = jwt.get_unverified_header(token).get("kid")
+    signing_key = get_key_ring().verification_key(kid) if kid else None
+    if signing_key is None:
+        raise JWTError("Unknown signing key")
+    return signing_key.verifier
+
 def decode_and_validate_token(token: str, audience: str) -> TokenPayload:
+    """
+    Validate an access token and build its payload. Tokens already validated
+    by this worker are served from the verified-token cache; revoked tokens
+    are rejected either way.
+    """
+    cache = get_token_cache() if settings.TOKEN_CACHE_ENABLED else None
+    if cache is not None:
+        cached = cache.get(token, audience)
+        if cached is not None:
+            return cached
+
     try:
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
+            _access_token_verification_key(token),
             algorithms=[settings.JWT_ALGORITHM],
             audience=audience,
             options={
@@ -142,7 +223,12 @@ def decode_and_validate_token(token: str, audience: str) -> TokenPayload:
             if field in payload:
                 payload[field] = datetime.fromtimestamp(payload[field], tz=timezone.utc)
                 
-        return TokenPayload(**payload)
+        token_payload = TokenPayload(**payload)
+        if get_token_revocation_list().is_revoked(token_payload.jti):
+            raise JWTError("Token has been revoked")
+        if cache is not None:
+            cache.put(token, audience, token_payload)
+        return token_payload
         
     except JWTError as e:
         raise HTTPException(
@@ -151,15 +237,17 @@ def decode_and_validate_token(token: str, audience: str) -> TokenPayload:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def create_refresh_token(user_id: int) -> str:
-    """Create a refresh token for the user"""
+def create_refresh_token(user_id: int, family_id: str, token_id: str) -> str:
+    """Create a refresh token; ``RefreshTokenStore`` tracks its family and id"""
     otel = get_otel()
     with otel.create_span("create_refresh_token") as span:
         try:
-            expires = datetime.now(timezone.utc) + timedelta(days=30)
+            expires = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
             payload = {
                 "sub": str(user_id),
                 "type": "refresh",
+                "fid": family_id,
+                "jti": token_id,
                 "exp": expires,
                 "iat": datetime.now(timezone.utc),
                 "nbf": datetime.now(timezone.utc),
@@ -168,7 +256,7 @@ def create_refresh_token(user_id: int) -> str:
             return jwt.encode(
                 payload,
                 settings.JWT_SECRET_KEY,
-                algorithm=settings.JWT_ALGORITHM
+                algorithm=settings.JWT_INTERNAL_ALGORITHM
             )
         except Exception as e:
             otel.record_exception(span, e)
@@ -191,9 +279,16 @@ def create_password_reset_token(user_id: int) -> str:
             return jwt.encode(
                 payload,
                 settings.JWT_SECRET_KEY,
-                algorithm=settings.JWT_ALGORITHM
+                algorithm=settings.JWT_INTERNAL_ALGORITHM
             )
         except Exception as e:
             otel.record_exception(span, e)
             raise
 
+def decode_internal_token(token: str) -> dict:
+    """Decode a refresh or password reset token issued by this service."""
+    return jwt.decode(
+        token,
+        settings.JWT_SECRET_KEY,
+        algorithms=[settings.JWT_INTERNAL_ALGORITHM]
+    )
@@ -0,0 +1,292 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk
+from jose.backends.base import Key
+
+from .config import settings
+from .redisUtils import redis, redis_lock
+from scholarSparkObservability.core import OTelSetup
+
+# python-jose has no EdDSA support, so Ed25519 is not offered here
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+_EC_CURVES = {
+    "ES256": ec.SECP256R1,
+    "ES384": ec.SECP384R1,
+    "ES512": ec.SECP521R1,
+}
+
+# Redis layout: one hash field per kid, shared by every worker and pod
+SIGNING_KEYS_KEY = "jwt:signing_keys"
+ROTATION_LOCK_KEY = "jwt:signing_keys:rotation_lock"
+
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm in ASYMMETRIC_ALGORITHMS
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _thumbprint(public_jwk: Dict[str, str]) -> str:
+    """RFC 7638 JWK thumbprint, used as the ``kid``."""
+    members = ("e", "kty", "n") if public_jwk["kty"] == "RSA" else ("crv", "kty", "x", "y")
+    canonical = json.dumps({m: public_jwk[m] for m in members}, separators=(",", ":"), sort_keys=True)
+    return _b64url(hashlib.sha256(canonical.encode()).digest())
+
+
+class SigningKey:
+    """One asymmetric key pair with the time it starts signing tokens."""
+
+    __slots__ = ("kid", "algorithm", "created_at", "activates_at", "signer", "verifier", "public_jwk", "_private_key")
+
+    def __init__(self, algorithm: str, private_key, created_at: float, activates_at: float):
+        self.algorithm = algorithm
+        self.created_at = created_at
+        self.activates_at = activates_at
+        self._private_key = private_key
+        # Pre-constructed jose keys so signing/verifying never re-parses PEM
+        self.signer: Key = jwk.construct(private_key, algorithm)
+        self.verifier: Key = self.signer.public_key()
+        public_jwk = self.verifier.to_dict()
+        self.kid = _thumbprint(public_jwk)
+        self.public_jwk = {**public_jwk, "kid": self.kid, "use": "sig"}
+
+    @classmethod
+    def generate(cls, algorithm: str, activates_at: float) -> "SigningKey":
+        if algorithm.startswith("RS"):
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=settings.JWT_RSA_KEY_SIZE)
+        else:
+            private_key = ec.generate_private_key(_EC_CURVES[algorithm]())
+        return cls(algorithm, private_key, created_at=time.time(), activates_at=activates_at)
+
+    def to_record(self) -> str:
+        # Private keys are stored encrypted under JWT_SECRET_KEY
+        pem = self._private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.BestAvailableEncryption(settings.JWT_SECRET_KEY.encode())
+        )
+        return json.dumps({
+            "alg": self.algorithm,
+            "created_at": self.created_at,
+            "activates_at": self.activates_at,
+            "private_key": pem.decode()
+        })
+
+    @classmethod
+    def from_record(cls, record: str) -> "SigningKey":
+        data = json.loads(record)
+        private_key = serialization.load_pem_private_key(
+            data["private_key"].encode(),
+            password=settings.JWT_SECRET_KEY.encode()
+        )
+        return cls(data["alg"], private_key, data["created_at"], data["activates_at"])
+
+
+class SigningKeyRing:
+    """
+    The set of signing keys known to this worker.
+
+    Keys are generated ahead of use and published in the JWKS for
+    ``prepublish_seconds`` before they start signing, so consumers that cache
+    the JWKS already know a key by the time tokens carry its ``kid``. A
+    superseded key stays published for ``verify_window_seconds`` (the access
+    token lifetime plus leeway) after its successor activates.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        rotation_interval_seconds: float,
+        prepublish_seconds: float,
+        verify_window_seconds: float
+    ):
+        self.algorithm = algorithm
+        self.rotation_interval_seconds = rotation_interval_seconds
+        self.prepublish_seconds = prepublish_seconds
+        self.verify_window_seconds = verify_window_seconds
+
+        self._keys: Dict[str, SigningKey] = {}
+        self._jwks_body = b'{"keys":[]}'
+        self._jwks_etag = ""
+        self._jwks_built_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # Local lookups (hot path)
+
+    def signing_key(self, now: Optional[float] = None) -> SigningKey:
+        now = time.time() if now is None else now
+        active = [k for k in self._keys.values() if k.activates_at <= now]
+        if not active:
+            raise RuntimeError("No active JWT signing key loaded")
+        return max(active, key=lambda k: k.activates_at)
+
+    def verification_key(self, kid: str) -> Optional[SigningKey]:
+        key = self._keys.get(kid)
+        if key is None or not self._is_published(key, time.time()):
+            return None
+        return key
+
+    def _successor(self, key: SigningKey) -> Optional[SigningKey]:
+        later = [k for k in self._keys.values() if k.activates_at > key.activates_at]
+        return min(later, key=lambda k: k.activates_at) if later else None
+
+    def _is_published(self, key: SigningKey, now: float) -> bool:
+        successor = self._successor(key)
+        return successor is None or now < successor.activates_at + self.verify_window_seconds
+
+    def jwks(self) -> Tuple[bytes, str]:
+        """Serialized JWKS document and its ETag."""
+        # Rebuild periodically so keys drop out once their window has passed
+        if time.time() - self._jwks_built_at > 60:
+            self._build_jwks()
+        return self._jwks_body, self._jwks_etag
+
+    def _build_jwks(self) -> None:
+        now = time.time()
+        published = sorted(
+            (k for k in self._keys.values() if self._is_published(k, now)),
+            key=lambda k: k.activates_at
+        )
+        self._jwks_body = json.dumps(
+            {"keys": [k.public_jwk for k in published]},
+            separators=(",", ":"),
+            sort_keys=True
+        ).encode()
+        self._jwks_etag = '"' + hashlib.sha256(self._jwks_body).hexdigest()[:32] + '"'
+        self._jwks_built_at = now
+
+    def install(self, key: SigningKey) -> None:
+        """Add a key to this worker's ring without Redis (offline tools and benchmarks)."""
+        self._keys[key.kid] = key
+        self._build_jwks()
+
+    # Shared state in Redis
+
+    async def load(self) -> None:
+        """Sync the local ring with the keys stored in Redis."""
+        records = await redis.hgetall(SIGNING_KEYS_KEY)
+        keys: Dict[str, SigningKey] = {}
+        for field, record in records.items():
+            kid = field.decode() if isinstance(field, bytes) else field
+            # Decrypting is slow; only parse keys we haven't seen yet
+            keys[kid] = self._keys.get(kid) or SigningKey.from_record(
+                record.decode() if isinstance(record, bytes) else record
+            )
+        self._keys = {kid: k for kid, k in keys.items() if k.algorithm == self.algorithm}
+        self._build_jwks()
+
+    async def rotate(self) -> Optional[SigningKey]:
+        """
+        Generate the next key if the newest one is due for rotation, and drop
+        keys that are no longer published. Only one worker across the
+        deployment does this at a time.
+        """
+        async with redis_lock(ROTATION_LOCK_KEY, ttl_seconds=30) as acquired:
+            if not acquired:
+                return None
+            await self.load()
+            now = time.time()
+            newest = max(self._keys.values(), key=lambda k: k.activates_at, default=None)
+
+            new_key = None
+            if newest is None:
+                # First boot: nobody to pre-publish to yet
+                new_key = await self._generate(activates_at=now)
+            elif newest.activates_at <= now - (self.rotation_interval_seconds - self.prepublish_seconds):
+                new_key = await self._generate(activates_at=now + self.prepublish_seconds)
+
+            if new_key is not None:
+                await redis.hset(SIGNING_KEYS_KEY, new_key.kid, new_key.to_record())
+                self._keys[new_key.kid] = new_key
+
+            expired = [kid for kid, k in self._keys.items() if not self._is_published(k, now)]
+            if expired:
+                await redis.hdel(SIGNING_KEYS_KEY, *expired)
+                for kid in expired:
+                    del self._keys[kid]
+
+            self._build_jwks()
+            return new_key
+
+    async def _generate(self, activates_at: float) -> SigningKey:
+        # RSA generation takes long enough to matter on the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, SigningKey.generate, self.algorithm, activates_at
+        )
+
+    async def _maintain(self) -> None:
+        otel = OTelSetup.get_instance()
+        while True:
+            await asyncio.sleep(settings.JWT_KEY_REFRESH_SECONDS)
+            with otel.create_span("signing_keys.maintain") as span:
+                try:
+                    await self.rotate()
+                    await self.load()
+                except Exception as e:
+                    otel.record_exception(span, e)
+
+    def has_active_key(self) -> bool:
+        now = time.time()
+        return any(k.activates_at <= now for k in self._keys.values())
+
+    async def start(self, timeout_seconds: Optional[float] = None) -> None:
+        """
+        Load keys and wait until one can sign. On first boot only the worker
+        holding the rotation lock generates the key, so the others poll
+        Redis until it appears. Raises if none does within the timeout,
+        rather than serving /token with an empty ring.
+        """
+        timeout_seconds = settings.JWT_KEY_STARTUP_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+        otel = OTelSetup.get_instance()
+        deadline = time.monotonic() + timeout_seconds
+        backoff = 0.1
+        with otel.create_span("signing_keys.start", {"jwt.algorithm": self.algorithm}) as span:
+            while True:
+                try:
+                    await self.rotate()
+                    await self.load()
+                except Exception as e:
+                    otel.record_exception(span, e)
+                    print(f"Error loading JWT signing keys: {e}")
+                if self.has_active_key():
+                    break
+                if time.monotonic() + backoff > deadline:
+                    raise RuntimeError(f"No active JWT signing key after {timeout_seconds}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 2.0)
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_key_ring: Optional[SigningKeyRing] = None
+
+
+def get_key_ring() -> SigningKeyRing:
+    global _key_ring
+    if _key_ring is None:
+        _key_ring = SigningKeyRing(
+            algorithm=settings.JWT_ALGORITHM,
+            rotation_interval_seconds=settings.JWT_KEY_ROTATION_DAYS * 86400,
+            prepublish_seconds=settings.JWT_KEY_PREPUBLISH_SECONDS,
+            verify_window_seconds=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 300
+        )
+    return _key_ring
@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.schema.user import TokenPayload
+from .config import settings
+
+# Returns True when the payload must no longer be accepted
+RevocationCheck = Callable[[TokenPayload], bool]
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-validated access tokens.
+
+    Entries are keyed on a digest of the raw token and the expected audience,
+    never on the token itself, and are dropped once the token's ``exp`` has
+    passed. Registered revocation checks run on every hit so a revoked token
+    stops being served from the cache immediately.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[TokenPayload, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._revocation_checks: List[RevocationCheck] = []
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._revocations = 0
+
+    @staticmethod
+    def _key(token: str, audience: str) -> bytes:
+        return hashlib.blake2b(
+            f"{audience}\0{token}".encode(),
+            digest_size=20
+        ).digest()
+
+    def add_revocation_check(self, check: RevocationCheck) -> None:
+        self._revocation_checks.append(check)
+
+    def _is_revoked(self, payload: TokenPayload) -> bool:
+        return any(check(payload) for check in self._revocation_checks)
+
+    def get(self, token: str, audience: str) -> Optional[TokenPayload]:
+        key = self._key(token, audience)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        if self._revocation_checks and self._is_revoked(payload):
+            with self._lock:
+                self._entries.pop(key, None)
+                self._revocations += 1
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return payload
+
+    def put(self, token: str, audience: str, payload: TokenPayload) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(token, audience)
+        expires_at = payload.exp.timestamp()
+
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, token: str, audience: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token, audience), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "revocations": self._revocations,
+            }
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
+    return _token_cache
@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .pubsub import subscribe
+from .redisUtils import redis
+from .tokenCache import get_token_cache
+from scholarSparkObservability.core import OTelSetup
+
+REVOCATION_CHANNEL = "access_tokens:revoked"
+
+# jti -> token exp; members are pruned once their token would have expired anyway
+REVOKED_KEY = "revoked:access_tokens"
+
+# KEYS: revoked set
+# ARGV: jti, token exp, now, channel
+_REVOKE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+local ttl = math.ceil(tonumber(ARGV[2]) - tonumber(ARGV[3]))
+if redis.call('TTL', KEYS[1]) < ttl then
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+redis.call('PUBLISH', ARGV[4], ARGV[1] .. ' ' .. ARGV[2])
+return 1
+"""
+
+_revoke = redis.register_script(_REVOKE_SCRIPT)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings. No false negatives; no removal."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationList:
+    """
+    Access tokens revoked before their ``exp``, keyed by ``jti``.
+
+    Redis holds the shared list and every revocation is broadcast over
+    pub/sub, so each worker keeps its own copy: a Bloom filter answers the
+    common "not revoked" case from memory, and only its positives are looked
+    up in the exact local set. Nothing on the request path touches Redis.
+    The whole list is reloaded at start, after a pub/sub reconnect, and every
+    TOKEN_REVOCATION_SYNC_SECONDS, which also drops expired entries.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._resync: Optional[asyncio.Task] = None
+
+        self._checks = 0
+        self._bloom_positives = 0
+        self._false_positives = 0
+        self._rejected = 0
+        self._loads = 0
+
+    # Request path
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        # Tokens issued before jti was added cannot be revoked individually
+        if not jti:
+            return False
+        self._checks += 1
+        if jti not in self._bloom:
+            return False
+        self._bloom_positives += 1
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            self._false_positives += 1
+            return False
+        self._rejected += 1
+        return True
+
+    # Local copy
+
+    def _add_local(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        if len(self._revoked) > self._bloom.capacity:
+            # Past capacity the false positive rate climbs; grow and rebuild
+            self._rebuild(self._revoked, max(self._bloom.capacity * 2, len(self._revoked)))
+        else:
+            self._bloom.add(jti)
+
+    def _rebuild(self, revoked: Dict[str, float], capacity: int) -> None:
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in revoked:
+            bloom.add(jti)
+        # Swap both at once so a check never sees a filter without its set
+        self._bloom, self._revoked = bloom, revoked
+
+    def _on_revocation(self, message: Optional[str]) -> None:
+        if message is None:
+            # Reconnected: anything published meanwhile was missed
+            if self._resync is None or self._resync.done():
+                self._resync = asyncio.get_running_loop().create_task(self._load_logged())
+            return
+        jti, expires_at = message.rsplit(" ", 1)
+        self._add_local(jti, float(expires_at))
+
+    # Shared state in Redis
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        """Revoke a token everywhere until ``expires_at``, when it expires anyway."""
+        now = time.time()
+        if expires_at <= now:
+            return
+        self._add_local(jti, expires_at)
+        try:
+            await _revoke(keys=[REVOKED_KEY], args=[jti, expires_at, now, REVOCATION_CHANNEL])
+        except Exception as e:
+            otel = OTelSetup.get_instance()
+            with otel.create_span("token_revocation.unavailable") as span:
+                otel.record_exception(span, e)
+            # Only this worker knows; the caller has to retry
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Revocation store temporarily unavailable, please retry",
+                headers={"Retry-After": "1"}
+            ) from e
+
+    async def load(self) -> None:
+        """Replace the local copy with the unexpired entries stored in Redis."""
+        now = time.time()
+        entries = await redis.zrangebyscore(REVOKED_KEY, now, "+inf", withscores=True)
+        revoked = {
+            (jti.decode() if isinstance(jti, bytes) else jti): expires_at
+            for jti, expires_at in entries
+        }
+        # Keep local revocations Redis has not confirmed yet
+        revoked.update({jti: exp for jti, exp in self._revoked.items() if exp > now and jti not in revoked})
+        self._rebuild(revoked, max(self.capacity, len(revoked) * 2))
+        self._loads += 1
+
+    async def _load_logged(self) -> None:
+        otel = OTelSetup.get_instance()
+        with otel.create_span("token_revocation.load") as span:
+            try:
+                await self.load()
+            except Exception as e:
+                otel.record_exception(span, e)
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            await self._load_logged()
+
+    async def start(self) -> None:
+        await self._load_logged()
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._resync):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._resync = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self._revoked),
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bits": self._bloom.size,
+            "checks": self._checks,
+            "bloom_positives": self._bloom_positives,
+            "false_positives": self._false_positives,
+            "rejected": self._rejected,
+            "loads": self._loads,
+        }
+
+
+_revocation_list: Optional[TokenRevocationList] = None
+
+
+def get_token_revocation_list() -> TokenRevocationList:
+    global _revocation_list
+    if _revocation_list is None:
+        _revocation_list = TokenRevocationList(
+            capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+            error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+            sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS
+        )
+        subscribe(REVOCATION_CHANNEL, _revocation_list._on_revocation)
+        # Cached tokens are checked on every hit, so revocation applies to them too
+        get_token_cache().add_revocation_check(lambda payload: _revocation_list.is_revoked(payload.jti))
+    return _revocation_list
@@ -0,0 +1,351 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException
+from opentelemetry import context as otel_context, trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult, TraceIdRatioBased
+from opentelemetry.trace import Link, SpanKind
+from opentelemetry.util.types import Attributes
+from scholarSparkObservability.core import OTelSetup
+
+from .config import settings
+
+# Built only when the span is recorded
+SpanAttributes = Union[Dict[str, Any], Callable[[], Dict[str, Any]], None]
+
+# OpenTracing convention, honoured by AuthSampler to force a span in
+FORCE_SAMPLE_ATTRIBUTE = "sampling.priority"
+
+
+class AuthSampler(Sampler):
+    """
+    Parent-based ratio sampler with per-span-name ratios for root spans.
+
+    Children always follow their parent's decision, so a request is traced
+    end to end or not at all. Root spans use the ratio configured for their
+    name (e.g. ``{"GET /health": 0}``), falling back to the default ratio.
+    Spans started with ``sampling.priority`` > 0 are always sampled.
+    """
+
+    def __init__(self, ratio: float = 1.0, overrides: Optional[Mapping[str, float]] = None):
+        self.configure(ratio, overrides)
+
+    def configure(self, ratio: float, overrides: Optional[Mapping[str, float]] = None) -> None:
+        self.ratio = ratio
+        self._default = TraceIdRatioBased(ratio)
+        self._overrides = {name: TraceIdRatioBased(r) for name, r in (overrides or {}).items()}
+
+    def should_sample(
+        self,
+        parent_context: Optional[otel_context.Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state: Optional[trace.TraceState] = None
+    ) -> SamplingResult:
+        if attributes and attributes.get(FORCE_SAMPLE_ATTRIBUTE, 0) > 0:
+            return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes, trace_state)
+
+        parent = trace.get_current_span(parent_context).get_span_context()
+        if parent.is_valid:
+            decision = Decision.RECORD_AND_SAMPLE if parent.trace_flags.sampled else Decision.DROP
+            return SamplingResult(decision, attributes if decision is Decision.RECORD_AND_SAMPLE else None,
+                                  parent.trace_state)
+
+        sampler = self._overrides.get(name, self._default)
+        return sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+
+    def get_description(self) -> str:
+        return f"AuthSampler{{ratio={self.ratio}, overrides={sorted(self._overrides)}}}"
+
+
+class BoundedBatchSpanProcessor(SpanProcessor):
+    """
+    Exports finished spans in batches from a background thread.
+
+    ``on_end`` never blocks and never does I/O: spans go onto a bounded queue,
+    and when it is full the span is dropped and counted instead of making the
+    request wait for the collector. Each export is bounded by the exporter's
+    own timeout, so a slow or dead collector only costs spans, not latency.
+    Only the worker thread exports while it runs; ``force_flush`` asks it to
+    drain the queue and waits, as the SDK's ``BatchSpanProcessor`` does.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue_size: int = 2048,
+        max_export_batch_size: int = 512,
+        schedule_delay_seconds: float = 1.0
+    ):
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.max_export_batch_size = max_export_batch_size
+        self.schedule_delay_seconds = schedule_delay_seconds
+
+        self._queue: Deque[ReadableSpan] = deque()
+        self._condition = threading.Condition()
+        self._export_lock = threading.Lock()
+        self._shutdown = False
+        # Set by the worker once everything queued before the request is exported
+        self._flush_requests: List[threading.Event] = []
+
+        self.dropped = 0
+        self.exported = 0
+        self.export_failures = 0
+        self.last_export_seconds = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._worker.start()
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if not span.context.trace_flags.sampled or self._shutdown:
+            return
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+            if len(self._queue) == self.max_export_batch_size:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if (
+                    not self._shutdown
+                    and not self._flush_requests
+                    and len(self._queue) < self.max_export_batch_size
+                ):
+                    self._condition.wait(self.schedule_delay_seconds)
+                if self._shutdown:
+                    return
+                flush_requests, self._flush_requests = self._flush_requests, []
+                pending = len(self._queue)
+            if not flush_requests:
+                self._export_batch()
+                continue
+            # Spans queued after the request don't hold it up
+            while pending > 0:
+                exported = self._export_batch()
+                if not exported:
+                    break
+                pending -= exported
+            for request in flush_requests:
+                request.set()
+
+    def _export_batch(self) -> int:
+        with self._export_lock:
+            with self._condition:
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_export_batch_size))]
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                result = self.exporter.export(batch)
+            except Exception:
+                result = SpanExportResult.FAILURE
+            self.last_export_seconds = time.perf_counter() - started
+            if result is SpanExportResult.SUCCESS:
+                self.exported += len(batch)
+            else:
+                self.export_failures += 1
+                self.dropped += len(batch)
+            return len(batch)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        if not self._shutdown and self._worker.is_alive():
+            request = threading.Event()
+            with self._condition:
+                self._flush_requests.append(request)
+                self._condition.notify()
+            return request.wait(timeout_millis / 1000)
+
+        # Shut down: the worker takes no more requests, so drain from this
+        # thread; _export_lock serializes this with a batch it may still be on
+        deadline = time.monotonic() + timeout_millis / 1000
+        while True:
+            with self._condition:
+                if not self._queue:
+                    flush_requests, self._flush_requests = self._flush_requests, []
+                    break
+            if time.monotonic() >= deadline:
+                return False
+            self._export_batch()
+        for request in flush_requests:
+            request.set()
+        return True
+
+    def shutdown(self) -> None:
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify()
+        self._worker.join(self.schedule_delay_seconds)
+        self.force_flush(int(settings.OTEL_EXPORT_TIMEOUT_SECONDS * 1000))
+        self.exporter.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "max_queue_size": self.max_queue_size,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "export_failures": self.export_failures,
+            "last_export_seconds": round(self.last_export_seconds, 4),
+        }
+
+
+def build_span_exporter() -> SpanExporter:
+    """The exporter named by OTEL_EXPORTER: ``otlp`` (Tempo) or ``console``."""
+    if settings.OTEL_EXPORTER == "otlp":
+        return OTLPSpanExporter(
+            endpoint=settings.OTEL_TEMPO_ENDPOINT,
+            timeout=settings.OTEL_EXPORT_TIMEOUT_SECONDS
+        )
+    if settings.OTEL_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    raise ValueError(f"Unknown OTEL_EXPORTER {settings.OTEL_EXPORTER!r}; expected 'otlp' or 'console'")
+
+
+def _is_error(exc: BaseException) -> bool:
+    """Client errors raised as HTTPException are outcomes, not failures."""
+    return not (isinstance(exc, HTTPException) and exc.status_code < 500)
+
+
+_EXPORTED_FLAG = "_otel_error_exported"
+
+# Name and attributes of the innermost unsampled span, for record_exception
+_unsampled_span: ContextVar[Optional[Tuple[str, SpanAttributes]]] = ContextVar("unsampled_span", default=None)
+
+
+class AuthOTelSetup(OTelSetup):
+    """
+    ``OTelSetup`` with configurable sampling and cheap unsampled spans.
+
+    Spans from ``create_span`` become the current span, so repository and
+    security spans nest under the request span and inherit its sampling
+    decision. Inside an unsampled trace ``create_span`` does no tracer work
+    at all and attribute callables are never called. With ``sample_errors``
+    an exception escaping an unsampled span, or caught inside one and passed
+    to ``record_exception``, is still exported, as a sampled root span
+    linked to the trace it came from.
+
+    Registers itself as the ``OTelSetup`` singleton, so existing
+    ``OTelSetup.get_instance()`` callers get this class.
+    """
+
+    def __init__(self, *, sampler: Optional[Sampler] = None, sample_errors: bool = True, **kwargs):
+        self.sampler = sampler or AuthSampler(settings.OTEL_SAMPLING_RATIO, settings.OTEL_SAMPLING_OVERRIDES)
+        self.sample_errors = sample_errors
+        self._tracer: Optional[trace.Tracer] = None
+        super().__init__(**kwargs)
+
+    @classmethod
+    def initialize(cls, **kwargs) -> OTelSetup:
+        if OTelSetup._instance is None:
+            OTelSetup._instance = cls(**kwargs)
+        return OTelSetup._instance
+
+    def _setup_tracing(self, resource: Resource, exporter: SpanExporter) -> None:
+        provider = TracerProvider(resource=resource, sampler=self.sampler)
+        self.span_processor = BoundedBatchSpanProcessor(
+            exporter,
+            max_queue_size=settings.OTEL_EXPORT_MAX_QUEUE_SIZE,
+            max_export_batch_size=settings.OTEL_EXPORT_BATCH_SIZE,
+            schedule_delay_seconds=settings.OTEL_EXPORT_DELAY_SECONDS
+        )
+        provider.add_span_processor(self.span_processor)
+        trace.set_tracer_provider(provider)
+        self.provider = provider
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sampling_ratio": getattr(self.sampler, "ratio", None), **self.span_processor.stats()}
+
+    def get_tracer(self) -> trace.Tracer:
+        # The SDK builds a new Tracer on every get_tracer call
+        if self._tracer is None:
+            self._tracer = self.provider.get_tracer(self.service_name, self.service_version)
+        return self._tracer
+
+    def create_span(self, name: str, attributes: SpanAttributes = None):
+        """Start a span as the current span. ``attributes`` may be a callable, only called if recorded."""
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: SpanAttributes) -> Iterator[trace.Span]:
+        parent = trace.get_current_span()
+        parent_context = parent.get_span_context()
+        if parent_context.is_valid and not parent_context.trace_flags.sampled:
+            # Unsampled trace: the sampler would drop this span anyway
+            token = _unsampled_span.set((name, attributes))
+            try:
+                yield parent
+            except Exception as e:
+                if self.sample_errors and _is_error(e):
+                    self._export_error(name, attributes, parent_context, e)
+                raise
+            finally:
+                _unsampled_span.reset(token)
+            return
+
+        with self.get_tracer().start_as_current_span(name) as span:
+            if span.is_recording():
+                if attributes:
+                    span.set_attributes(attributes() if callable(attributes) else attributes)
+                yield span
+                return
+            token = _unsampled_span.set((name, attributes))
+            try:
+                yield span
+            except Exception as e:
+                if self.sample_errors and _is_error(e):
+                    self._export_error(name, attributes, span.get_span_context(), e)
+                raise
+            finally:
+                _unsampled_span.reset(token)
+
+    def record_exception(self, span: trace.Span, exception: Exception, attributes: Dict[str, Any] = None):
+        """Record an exception on ``span``; on an unsampled span, export it as an error span instead."""
+        if span.is_recording():
+            super().record_exception(span, exception, attributes)
+            return
+        current = _unsampled_span.get()
+        if current is not None and self.sample_errors and _is_error(exception):
+            name, span_attributes = current
+            self._export_error(name, span_attributes, span.get_span_context(), exception, attributes)
+
+    def _export_error(
+        self,
+        name: str,
+        attributes: SpanAttributes,
+        unsampled: trace.SpanContext,
+        exc: Exception,
+        exception_attributes: Optional[Dict[str, Any]] = None
+    ) -> None:
+        # Only the innermost span an exception passes through is exported
+        if getattr(exc, _EXPORTED_FLAG, False):
+            return
+        setattr(exc, _EXPORTED_FLAG, True)
+        attributes = attributes() if callable(attributes) else dict(attributes or {})
+        attributes[FORCE_SAMPLE_ATTRIBUTE] = 1
+        span = self.get_tracer().start_span(
+            name,
+            context=otel_context.Context(),
+            attributes=attributes,
+            links=[Link(unsampled)]
+        )
+        self.record_exception(span, exc, exception_attributes)
+        span.end()
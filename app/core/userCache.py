@@ -0,0 +1,301 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import redis as sync_redis
+
+from .config import settings
+from .pubsub import publish, subscribe
+from .redisUtils import redis
+from scholarSparkObservability.core import OTelSetup
+
+# Never cached in either tier; login reads credentials straight from Postgres
+CREDENTIAL_FIELDS = ("password_hash", "salt")
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+# Follow the email -> user_id pointer and fetch the record in one round trip
+_GET_BY_EMAIL_SCRIPT = """
+local user_id = redis.call('GET', KEYS[1])
+if not user_id then
+    return false
+end
+return redis.call('GET', ARGV[1] .. user_id)
+"""
+
+# Cache a record unless the user was invalidated recently: a read that
+# started before a write may only finish after the write's invalidation
+# KEYS: tombstone, id key, email key
+# ARGV: record, user id, ttl seconds
+_PUT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[3])
+redis.call('SET', KEYS[3], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+_get_by_email = redis.register_script(_GET_BY_EMAIL_SCRIPT)
+_put = redis.register_script(_PUT_SCRIPT)
+
+
+def _id_key(user_id: int) -> str:
+    return f"user:id:{user_id}"
+
+
+def _email_key(email: str) -> str:
+    return f"user:email:{email}"
+
+
+def _tombstone_key(user_id: int) -> str:
+    return f"user:tombstone:{user_id}"
+
+
+def strip_credentials(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in record.items() if k not in CREDENTIAL_FIELDS}
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+def _loads(raw: Any) -> Dict[str, Any]:
+    record = json.loads(raw)
+    for field in _DATETIME_FIELDS:
+        if record.get(field):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+
+class UserCache:
+    """
+    Two-tier read-through cache of user records (without credentials).
+
+    The first tier is a small per-worker LRU with a short TTL; the second is
+    Redis, shared by all workers, with a longer TTL. Records are stored once
+    under the user id; email lookups go through an ``email -> id`` pointer, so
+    invalidating by id is enough. Invalidations are broadcast over pub/sub so
+    every worker drops its local copy straight away, and leave a tombstone
+    for ``tombstone_seconds`` that stops reads still in flight from caching
+    the record as it was before the write.
+    """
+
+    def __init__(
+        self,
+        local_max_size: int,
+        local_ttl_seconds: float,
+        redis_ttl_seconds: int,
+        tombstone_seconds: float
+    ):
+        self.local_max_size = local_max_size
+        self.local_ttl_seconds = local_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.tombstone_seconds = tombstone_seconds
+
+        # ("id", user_id) -> record, ("email", email) -> user_id
+        self._local: "OrderedDict[Tuple[str, Any], Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # user_id -> monotonic expiry, for when Redis cannot hold the tombstone
+        self._tombstones: Dict[int, float] = {}
+
+        self._local_hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._stale_puts = 0
+
+    # Local tier
+
+    def _local_get(self, key: Tuple[str, Any]) -> Any:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _local_put(self, record: Dict[str, Any]) -> None:
+        expires_at = time.monotonic() + self.local_ttl_seconds
+        user_id = record["user_id"]
+        with self._lock:
+            self._local[("id", user_id)] = (record, expires_at)
+            self._local[("email", record["email"])] = (user_id, expires_at)
+            self._local.move_to_end(("id", user_id))
+            self._local.move_to_end(("email", record["email"]))
+            while len(self._local) > self.local_max_size:
+                self._local.popitem(last=False)
+
+    def drop_local(self, user_id: Optional[int] = None) -> None:
+        """Forget one user locally, or everything when ``user_id`` is None."""
+        now = time.monotonic()
+        with self._lock:
+            if user_id is None:
+                self._local.clear()
+            else:
+                self._local.pop(("id", user_id), None)
+                self._tombstones[user_id] = now + self.tombstone_seconds
+            if len(self._tombstones) > self.local_max_size:
+                self._tombstones = {uid: t for uid, t in self._tombstones.items() if t > now}
+
+    def _tombstoned_locally(self, user_id: int) -> bool:
+        with self._lock:
+            expires_at = self._tombstones.get(user_id)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._tombstones[user_id]
+                return False
+            return True
+
+    # Read-through API
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        record = self._local_get(("id", user_id))
+        if record is not None:
+            self._local_hits += 1
+            return record
+
+        try:
+            raw = await redis.get(_id_key(user_id))
+        except Exception:
+            raw = None
+        if raw is None:
+            self._misses += 1
+            return None
+
+        record = _loads(raw)
+        self._redis_hits += 1
+        self._local_put(record)
+        return record
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self._local_get(("email", email))
+        if user_id is not None:
+            record = self._local_get(("id", user_id))
+            if record is not None:
+                self._local_hits += 1
+                return record
+
+        try:
+            raw = await _get_by_email(keys=[_email_key(email)], args=["user:id:"])
+        except Exception:
+            raw = None
+        if raw is None:
+            self._misses += 1
+            return None
+
+        record = _loads(raw)
+        self._redis_hits += 1
+        self._local_put(record)
+        return record
+
+    async def put(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cache a record loaded from Postgres and return it without credentials.
+        Skipped while the user is tombstoned, as the record may predate the write.
+        """
+        record = strip_credentials(record)
+        user_id = record["user_id"]
+        if self._tombstoned_locally(user_id):
+            self._stale_puts += 1
+            return record
+        try:
+            stored = await _put(
+                keys=[_tombstone_key(user_id), _id_key(user_id), _email_key(record["email"])],
+                args=[_dumps(record), user_id, self.redis_ttl_seconds]
+            )
+        except Exception:
+            # Redis is best effort; the local tier still holds it
+            stored = 1
+        if stored:
+            self._local_put(record)
+        else:
+            self._stale_puts += 1
+        return record
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user everywhere after a write."""
+        self._invalidations += 1
+        self.drop_local(user_id)
+        otel = OTelSetup.get_instance()
+        with otel.create_span("user_cache.invalidate", {"user.id": user_id}) as span:
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.set(_tombstone_key(user_id), 1, px=int(self.tombstone_seconds * 1000))
+                    pipe.delete(_id_key(user_id))
+                    await pipe.execute()
+                await publish(INVALIDATION_CHANNEL, str(user_id))
+            except Exception as e:
+                # Other workers fall back on the local TTL
+                otel.record_exception(span, e)
+
+    def _on_invalidation(self, message: Optional[str]) -> None:
+        self.drop_local(int(message) if message is not None else None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._local_hits + self._redis_hits + self._misses
+        hits = self._local_hits + self._redis_hits
+        return {
+            "local_size": len(self._local),
+            "local_hits": self._local_hits,
+            "redis_hits": self._redis_hits,
+            "misses": self._misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self._invalidations,
+            "stale_puts": self._stale_puts,
+        }
+
+
+# Blocking client for invalidate_blocking, created on first use
+_sync_redis: Optional[sync_redis.Redis] = None
+
+
+def invalidate_blocking(user_id: int) -> None:
+    """
+    ``UserCache.invalidate`` for blocking callers such as scripts, which have
+    no event loop and no local tier: tombstone and drop the shared record and
+    tell every worker to drop its local copy.
+    """
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = sync_redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT
+        )
+    otel = OTelSetup.get_instance()
+    with otel.create_span("user_cache.invalidate", {"user.id": user_id}) as span:
+        try:
+            with _sync_redis.pipeline(transaction=True) as pipe:
+                pipe.set(_tombstone_key(user_id), 1, px=int(settings.USER_CACHE_TOMBSTONE_SECONDS * 1000))
+                pipe.delete(_id_key(user_id))
+                pipe.publish(INVALIDATION_CHANNEL, str(user_id))
+                pipe.execute()
+        except Exception as e:
+            # Workers fall back on the local TTL
+            otel.record_exception(span, e)
+
+
+_user_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> UserCache:
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = UserCache(
+            local_max_size=settings.USER_CACHE_LOCAL_MAX_SIZE,
+            local_ttl_seconds=settings.USER_CACHE_LOCAL_TTL_SECONDS,
+            redis_ttl_seconds=settings.USER_CACHE_REDIS_TTL_SECONDS,
+            tombstone_seconds=settings.USER_CACHE_TOMBSTONE_SECONDS
+        )
+        subscribe(INVALIDATION_CHANNEL, _user_cache._on_invalidation)
+    return _user_cache
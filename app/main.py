@@ -1,22 +1,87 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.dbUtils import (
+    PoolTimeout,
+    init_async_db_pool,
+    close_async_db_pool,
+    close_db_pool,
+    async_db_pool_stats
+)
+from app.core.passwordHashing import get_hashing_pool, policy_from_settings
+from app.core.tokenCache import get_token_cache
+from app.core.signingKeys import get_key_ring, is_asymmetric
+from app.core.redisUtils import redis_breaker
+from app.core.pubsub import start_listener, stop_listener
+from app.core.userCache import get_user_cache
+from app.core.rbac import get_role_permission_cache
+from app.core.refreshTokens import get_refresh_token_store
+from app.core.tokenRevocation import get_token_revocation_list
+from app.core.otpStore import get_otp_store
+from app.core.credentialReaper import get_credential_reaper
+from app.core.metrics import (
+    MetricsMiddleware,
+    observe_password_hashing,
+    render_metrics,
+    start_metrics_sync,
+    stop_metrics_sync
+)
 from app.api.v1.router import router as api_router
-from scholarSparkObservability.core import OTelSetup
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from app.core.tracing import AuthOTelSetup, build_span_exporter
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
 # Initialize OpenTelemetry
-otel = OTelSetup.initialize(
+otel = AuthOTelSetup.initialize(
     service_name=settings.OTEL_SERVICE_NAME,
     service_version=settings.OTEL_SERVICE_VERSION,
-    exporter=ConsoleSpanExporter(),  # Use your desired exporter here
+    exporter=build_span_exporter(),
     environment=settings.OTEL_ENVIRONMENT,
-    debug=settings.OTEL_DEBUG
+    debug=settings.OTEL_DEBUG,
+    sample_errors=settings.OTEL_SAMPLE_ERRORS
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resources owned by the app lifecycle
+    if settings.USER_REPOSITORY_BACKEND == "postgres":
+        await init_async_db_pool()
+    # Calibration times a few hashes; keep it off the event loop
+    policy = await asyncio.get_running_loop().run_in_executor(None, policy_from_settings)
+    get_hashing_pool().configure(policy)
+    await get_hashing_pool().start()
+    get_hashing_pool().add_latency_observer(observe_password_hashing)
+    if is_asymmetric(settings.JWT_ALGORITHM):
+        await get_key_ring().start()
+    # Registers the caches' invalidation handlers before the listener subscribes
+    get_user_cache()
+    get_role_permission_cache()
+    get_token_revocation_list()
+    await start_listener()
+    await get_token_revocation_list().start()
+    if settings.CREDENTIAL_REAPER_ENABLED:
+        get_credential_reaper().start()
+    start_metrics_sync()
+    try:
+        yield
+    finally:
+        await stop_metrics_sync()
+        await get_credential_reaper().stop()
+        await stop_listener()
+        await get_token_revocation_list().stop()
+        await get_key_ring().stop()
+        await get_hashing_pool().shutdown()
+        await close_async_db_pool()
+        # Only open if something used the blocking repository in-process
+        close_db_pool()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,9 +93,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
 
+# Request spans are the sampling roots for everything the handlers trace
+FastAPIInstrumentor.instrument_app(app, tracer_provider=otel.provider)
+
 
 # Health check endpoint
 @app.get("/health")
@@ -38,5 +108,48 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """Public keys for verifying access tokens locally."""
+    body, etag = get_key_ring().jwks()
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_CACHE_MAX_AGE}",
+        "ETag": etag
+    }
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/stats")
+async def health_stats():
+    """Runtime statistics used to size resources per pod."""
+    return {
+        "db_pool": async_db_pool_stats(),
+        "password_hashing": get_hashing_pool().stats(),
+        "token_cache": get_token_cache().stats(),
+        "user_cache": get_user_cache().stats(),
+        "rbac": get_role_permission_cache().stats(),
+        "refresh_tokens": get_refresh_token_store().stats(),
+        "token_revocation": get_token_revocation_list().stats(),
+        "otp": get_otp_store().stats(),
+        "credential_reaper": get_credential_reaper().stats(),
+        "redis_breaker": redis_breaker.stats(),
+        "tracing": otel.stats()
+    }
 
 
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"}
+    )
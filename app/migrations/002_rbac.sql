@@ -0,0 +1,47 @@
+-- Roles table
+CREATE TABLE roles (
+    role_id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    description VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Permissions table
+CREATE TABLE permissions (
+    permission_id SERIAL PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    description VARCHAR(255)
+);
+
+-- Role -> permission grants
+CREATE TABLE role_permissions (
+    role_id INTEGER NOT NULL REFERENCES roles(role_id) ON DELETE CASCADE,
+    permission_id INTEGER NOT NULL REFERENCES permissions(permission_id) ON DELETE CASCADE,
+    PRIMARY KEY (role_id, permission_id)
+);
+
+-- User -> role grants
+CREATE TABLE user_roles (
+    user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    role_id INTEGER NOT NULL REFERENCES roles(role_id) ON DELETE CASCADE,
+    granted_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, role_id)
+);
+
+-- Seed the default role with the permissions previously hardcoded in the API
+INSERT INTO roles (name, description) VALUES
+    ('user', 'Default role for every account'),
+    ('admin', 'Manages users and grants');
+
+INSERT INTO permissions (name, description) VALUES
+    ('read:profile', 'Read own profile'),
+    ('update:profile', 'Update own profile'),
+    ('manage:users', 'Activate, deactivate and delete users'),
+    ('manage:roles', 'Grant and revoke roles and permissions');
+
+INSERT INTO role_permissions (role_id, permission_id)
+SELECT r.role_id, p.permission_id
+FROM roles r
+JOIN permissions p ON
+    (r.name = 'user' AND p.name IN ('read:profile', 'update:profile'))
+    OR r.name = 'admin';
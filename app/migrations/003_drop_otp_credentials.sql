@@ -0,0 +1,3 @@
+-- OTPs now live in Redis with TTL expiry (app/core/otpStore.py); codes
+-- outstanding at deploy time are dropped and have to be requested again
+DROP TABLE IF EXISTS otp_credentials;
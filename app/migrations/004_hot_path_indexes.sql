@@ -0,0 +1,31 @@
+-- atlas:txmode none
+
+-- Indexes for every lookup the repositories run. Built CONCURRENTLY, so
+-- writes to the tables continue during the build; that cannot run inside a
+-- transaction, hence txmode none. If a build fails it leaves an INVALID
+-- index behind: drop it and re-apply.
+--
+-- Already covered by existing constraints:
+--   user_profiles(user_id)               user_profiles_user_id_key
+--   password_reset_tokens(token)         password_reset_tokens_token_key
+--   user_roles(user_id, role_id)         primary key
+--   roles(name), permissions(name)       unique constraints
+
+-- Email is unique among live accounts only, so a soft-deleted user's
+-- address can be registered again. Lookups by email always filter on
+-- is_deleted = FALSE and match this predicate; ON CONFLICT clauses name it.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_live_key
+    ON users (email) WHERE is_deleted = FALSE;
+ALTER TABLE users DROP CONSTRAINT IF EXISTS users_email_key;
+
+-- Joined on every login and user lookup, and the target of password updates
+CREATE INDEX CONCURRENTLY IF NOT EXISTS login_credentials_user_id_idx
+    ON login_credentials (user_id);
+
+-- OpenID login resolves the account link by provider and provider user id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS openid_credentials_provider_idx
+    ON openid_credentials (source, provider_user_id);
+
+-- Reset token checks and invalidation only ever look at open tokens
+CREATE INDEX CONCURRENTLY IF NOT EXISTS password_reset_tokens_open_idx
+    ON password_reset_tokens (user_id, token) WHERE used_at IS NULL;
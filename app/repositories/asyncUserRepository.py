@@ -0,0 +1,423 @@
+from typing import Optional, Dict, List, FrozenSet, Tuple
+from ..schema.user import  UserCreate, UserProfileCreate, OpenIDCredential
+from ..core.securityUtils import get_password_hash_async, generate_salt
+from ..core.dbUtils import get_async_db_connection
+from ..core.userCache import get_user_cache
+from ..core.rbac import RolePermissionCache, get_role_permission_cache
+from ..core.config import settings
+from ..core.metrics import timed_methods
+from . import userQueries as queries
+from .records import LoginRecord
+from scholarSparkObservability.core import OTelSetup
+import psycopg
+from psycopg.rows import class_row, tuple_row
+import json
+from datetime import datetime, timezone, timedelta
+
+
+@timed_methods
+class AsyncUserRepository:
+    """
+    Postgres implementation of ``UserRepositoryProtocol`` on top of psycopg 3,
+    used by the request handlers so a slow query only suspends the request
+    that issued it.
+    """
+
+    def __init__(self):
+        self.otel = OTelSetup.get_instance()
+        self.cache = get_user_cache()
+        self.rbac = get_role_permission_cache()
+
+    @staticmethod
+    def get_connection():
+        """Borrow a pooled connection and run the block in a single transaction."""
+        return get_async_db_connection()
+
+    async def create_user(self, user: UserCreate, profile: UserProfileCreate) -> Optional[Dict]:
+        """
+        Create user, credentials and profile in one round trip. Returns None if
+        the email is already registered, as reported by its unique constraint.
+        """
+        with self.otel.create_span("create_user") as span:
+            try:
+                salt = generate_salt()
+                password_hash = await get_password_hash_async(user.password + salt)
+
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.REGISTER_USER, {
+                            "email": user.email,
+                            "password_hash": password_hash,
+                            "salt": salt,
+                            "first_name": profile.first_name,
+                            "last_name": profile.last_name,
+                            "display_name": profile.display_name or f"{profile.first_name} {profile.last_name}",
+                            "preferences": json.dumps(profile.preferences)
+                        })
+                        result = await cur.fetchone()
+                span.set_attributes({"user.duplicate": result is None})
+                return result
+            except psycopg.Error as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def get_by_email(self, email: str, with_credentials: bool = False) -> Optional[Dict]:
+        """
+        Get user by email. Served from the user cache unless the caller needs
+        the password hash and salt, which are never cached.
+        """
+        with self.otel.create_span("get_user_by_email", {
+            "user.email": email,
+            "user.with_credentials": with_credentials
+        }) as span:
+            try:
+                if not with_credentials:
+                    cached = await self.cache.get_by_email(email)
+                    if cached is not None:
+                        span.set_attributes({"user.id": cached["user_id"], "cache.hit": True})
+                        return cached
+
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.SELECT_USER_BY_EMAIL, (email,))
+                        result = await cur.fetchone()
+                if not result:
+                    return None
+                span.set_attributes({"user.id": result["user_id"], "cache.hit": False})
+                record = await self.cache.put(result)
+                return result if with_credentials else record
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def get_login_record(self, email: str) -> Optional[LoginRecord]:
+        """Narrow credential lookup for /token, run as a server-side prepared statement"""
+        with self.otel.create_span("get_login_record") as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor(row_factory=class_row(LoginRecord)) as cur:
+                        await cur.execute(
+                            queries.SELECT_LOGIN_RECORD,
+                            (email,),
+                            prepare=settings.DB_PREPARED_STATEMENTS
+                        )
+                        record = await cur.fetchone()
+                if record:
+                    span.set_attributes({"user.id": record.user_id})
+                return record
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict]:
+        """Get user by ID (without credentials), read through the user cache"""
+        with self.otel.create_span("get_user_by_id", {
+            "user.id": user_id
+        }) as span:
+            try:
+                cached = await self.cache.get_by_id(user_id)
+                if cached is not None:
+                    span.set_attributes({"user.email": cached["email"], "cache.hit": True})
+                    return cached
+
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.SELECT_USER_BY_ID, (user_id,))
+                        result = await cur.fetchone()
+                if not result:
+                    return None
+                span.set_attributes({"user.email": result["email"], "cache.hit": False})
+                return await self.cache.put(result)
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def soft_delete_user(self, user_id: int) -> bool:
+        """Soft delete user"""
+        with self.otel.create_span("soft_delete_user", {
+            "user.id": user_id
+        }) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.SOFT_DELETE_USER, (user_id,))
+                        deleted = await cur.fetchone() is not None
+                await self.cache.invalidate(user_id)
+                return deleted
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                return False
+
+    async def reactivate_user(self, user_id: int) -> bool:
+        """Reactivate both user and profile"""
+        with self.otel.create_span("reactivate_user", {
+            "user.id": user_id
+        }) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.REACTIVATE_USER, (user_id,))
+                        reactivated = await cur.fetchone() is not None
+                await self.cache.invalidate(user_id)
+                return reactivated
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                return False
+
+    async def update_user_status(self, user_id: int, is_active: bool) -> Optional[Dict]:
+        """Update user's active status"""
+        with self.otel.create_span("update_user_status", {
+            "user.id": user_id
+        }) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.UPDATE_USER_STATUS, (is_active, user_id))
+                        result = await cur.fetchone()
+                await self.cache.invalidate(user_id)
+                return result
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def update_password(self, user_id: int, new_password: str) -> bool:
+        """Replace the user's password with a freshly salted hash"""
+        with self.otel.create_span("update_password", {
+            "user.id": user_id
+        }) as span:
+            try:
+                salt = generate_salt()
+                password_hash = await get_password_hash_async(new_password + salt)
+
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.UPDATE_PASSWORD, (password_hash, salt, user_id))
+                        updated = await cur.fetchone() is not None
+                await self.cache.invalidate(user_id)
+                return updated
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """Swap in an upgraded hash of the same password and salt, e.g. after a rehash on login"""
+        with self.otel.create_span("update_password_hash", {
+            "user.id": user_id
+        }) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.UPDATE_PASSWORD_HASH, {
+                            "user_id": user_id,
+                            "old_hash": old_hash,
+                            "new_hash": new_hash
+                        })
+                        updated = await cur.fetchone() is not None
+                span.set_attributes({"credentials.updated": updated})
+                return updated
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def add_openid_credential(self, user_id: int, credential: OpenIDCredential) -> Optional[Dict]:
+        with self.otel.create_span("add_openid_credential", {"openid.source": credential.source}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(
+                            queries.INSERT_OPENID_CREDENTIAL,
+                            (
+                                user_id,
+                                credential.token,
+                                credential.source,
+                                credential.expires_at,
+                                credential.provider_user_id
+                            )
+                        )
+                        return await cur.fetchone()
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def get_user_by_openid(self, provider: str, provider_user_id: str) -> Optional[Dict]:
+        with self.otel.create_span("get_user_by_openid") as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.SELECT_USER_BY_OPENID, (provider, provider_user_id))
+                        return await cur.fetchone()
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def _role_permissions(self) -> Dict[str, FrozenSet[str]]:
+        """Role -> permissions map, loaded once per worker and cached until invalidated"""
+        mapping = self.rbac.get()
+        if mapping is not None:
+            return mapping
+
+        async with self.rbac.refresh_lock:
+            mapping = self.rbac.get()
+            if mapping is not None:
+                return mapping
+            generation = self.rbac.generation
+            async with self.get_connection() as conn:
+                async with conn.cursor(row_factory=tuple_row) as cur:
+                    await cur.execute(queries.SELECT_ROLE_PERMISSIONS)
+                    rows = await cur.fetchall()
+            return self.rbac.store(rows, generation)
+
+    async def get_user_authorization(self, user_id: int) -> Tuple[List[str], List[str]]:
+        """Roles and expanded permissions for a user, with a single query against the database"""
+        with self.otel.create_span("get_user_authorization", {
+            "user.id": user_id
+        }) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor(row_factory=tuple_row) as cur:
+                        await cur.execute(queries.SELECT_USER_ROLE_NAMES, (user_id,))
+                        roles = sorted(row[0] for row in await cur.fetchall())
+                if not roles:
+                    roles = [settings.RBAC_DEFAULT_ROLE]
+
+                permissions = RolePermissionCache.expand(await self._role_permissions(), roles)
+                span.set_attributes({"user.roles": roles})
+                return roles, permissions
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def get_user_roles(self, user_id: int) -> List[str]:
+        roles, _ = await self.get_user_authorization(user_id)
+        return roles
+
+    async def get_user_permissions(self, user_id: int) -> List[str]:
+        _, permissions = await self.get_user_authorization(user_id)
+        return permissions
+
+    async def grant_role(self, user_id: int, role: str) -> bool:
+        """Give a user a role. Takes effect on the user's next token."""
+        with self.otel.create_span("grant_role", {"user.id": user_id, "rbac.role": role}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.INSERT_USER_ROLE, (user_id, role))
+                        return await cur.fetchone() is not None
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def revoke_role(self, user_id: int, role: str) -> bool:
+        with self.otel.create_span("revoke_role", {"user.id": user_id, "rbac.role": role}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.DELETE_USER_ROLE, (user_id, role))
+                        return await cur.fetchone() is not None
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def grant_permission(self, role: str, permission: str) -> bool:
+        """Add a permission to a role and invalidate the cached expansion on every worker"""
+        with self.otel.create_span("grant_permission", {"rbac.role": role, "rbac.permission": permission}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.INSERT_ROLE_PERMISSION, (role, permission))
+                        granted = await cur.fetchone() is not None
+                if granted:
+                    await self.rbac.publish_invalidation()
+                return granted
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def revoke_permission(self, role: str, permission: str) -> bool:
+        """Remove a permission from a role and invalidate the cached expansion on every worker"""
+        with self.otel.create_span("revoke_permission", {"rbac.role": role, "rbac.permission": permission}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.DELETE_ROLE_PERMISSION, (role, permission))
+                        revoked = await cur.fetchone() is not None
+                if revoked:
+                    await self.rbac.publish_invalidation()
+                return revoked
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def store_password_reset_token(self, user_id: int, token: str) -> bool:
+        """Store password reset token with expiration"""
+        with self.otel.create_span("store_password_reset_token") as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        # Invalidate any existing tokens
+                        await cur.execute(queries.INVALIDATE_OPEN_RESET_TOKENS, (user_id,))
+
+                        # Store new token
+                        await cur.execute(
+                            queries.INSERT_RESET_TOKEN,
+                            (
+                                user_id,
+                                token,
+                                datetime.now(timezone.utc) + timedelta(hours=24)
+                            )
+                        )
+                        return await cur.fetchone() is not None
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def verify_reset_token(self, user_id: int, token: str) -> bool:
+        """Verify if reset token is valid and not expired"""
+        with self.otel.create_span("verify_reset_token") as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.SELECT_VALID_RESET_TOKEN, (user_id, token))
+                        return await cur.fetchone() is not None
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def invalidate_reset_token(self, user_id: int, token: str) -> bool:
+        """Mark token as used after successful password reset"""
+        with self.otel.create_span("invalidate_reset_token") as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor() as cur:
+                        await cur.execute(queries.MARK_RESET_TOKEN_USED, (user_id, token))
+                        return await cur.fetchone() is not None
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
+
+    async def delete_expired_reset_tokens(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        """
+        Delete one batch of used or expired reset tokens with ids above ``after_id``.
+        Returns the rows deleted and the cursor for the next batch, None once done.
+        """
+        return await self._delete_batch("delete_expired_reset_tokens", queries.DELETE_EXPIRED_RESET_TOKENS,
+                                         after_id, batch_size)
+
+    async def delete_superseded_openid_credentials(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        """Delete one batch of expired OpenID credentials replaced by a newer one, like the above."""
+        return await self._delete_batch("delete_superseded_openid_credentials",
+                                        queries.DELETE_SUPERSEDED_OPENID_CREDENTIALS, after_id, batch_size)
+
+    async def _delete_batch(self, name: str, query: str, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        with self.otel.create_span(name, {"reaper.after_id": after_id}) as span:
+            try:
+                async with self.get_connection() as conn:
+                    async with conn.cursor(row_factory=tuple_row) as cur:
+                        await cur.execute(query, {"after_id": after_id, "batch_size": batch_size})
+                        ids = [row[0] for row in await cur.fetchall()]
+                span.set_attributes({"reaper.deleted": len(ids)})
+                # A short batch means nothing past the cursor matched
+                return len(ids), (max(ids) if len(ids) >= batch_size else None)
+            except Exception as e:
+                self.otel.record_exception(span, e)
+                raise
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from ..core.config import settings
+from .userRepositoryProtocol import UserRepositoryProtocol
+
+_repository: Optional[UserRepositoryProtocol] = None
+
+
+def get_user_repository() -> UserRepositoryProtocol:
+    """The process-wide user repository for ``settings.USER_REPOSITORY_BACKEND``."""
+    global _repository
+    if _repository is None:
+        backend = settings.USER_REPOSITORY_BACKEND
+        if backend == "postgres":
+            from .asyncUserRepository import AsyncUserRepository
+            _repository = AsyncUserRepository()
+        elif backend == "memory":
+            from .inMemoryUserRepository import InMemoryUserRepository
+            _repository = InMemoryUserRepository()
+        else:
+            raise ValueError(f"Unknown USER_REPOSITORY_BACKEND: {backend!r}")
+    return _repository
@@ -0,0 +1,310 @@
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..core.config import settings
+from ..core.metrics import timed_methods
+from ..core.securityUtils import generate_salt, get_password_hash_async
+from ..schema.user import OpenIDCredential, UserCreate, UserProfileCreate
+from .records import LoginRecord
+
+# Same grants as the 002_rbac migration seeds
+_SEED_ROLE_PERMISSIONS: Dict[str, Set[str]] = {
+    "user": {"read:profile", "update:profile"},
+    "admin": {"read:profile", "update:profile", "manage:users", "manage:roles"},
+}
+
+
+def _next_cursor(ids: List[int], batch_size: int) -> Optional[int]:
+    # A short batch means nothing past the cursor matched
+    return max(ids) if len(ids) >= batch_size else None
+
+
+@timed_methods
+class InMemoryUserRepository:
+    """
+    ``UserRepositoryProtocol`` backed by process memory, for load tests and
+    profiling without Postgres.
+
+    Users are indexed by id, email and OpenID ``(provider, provider_user_id)``.
+    All state sits behind one lock so the repository is safe to share between
+    the event loop and worker threads. Password hashing still goes through the
+    hashing pool, so benchmarks keep the real CPU cost of bcrypt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._credential_ids = itertools.count(1)
+        self._reset_token_ids = itertools.count(1)
+
+        self._users: Dict[int, Dict] = {}
+        self._profiles: Dict[int, Dict] = {}
+        self._credentials: Dict[int, Tuple[str, str]] = {}
+        self._by_email: Dict[str, int] = {}
+        self._by_openid: Dict[Tuple[str, str], int] = {}
+        # Every credential per provider account, oldest first; the newest is the link
+        self._openid: Dict[Tuple[str, str], List[Dict]] = {}
+        self._reset_tokens: Dict[int, Dict[str, Dict]] = {}
+        self._user_roles: Dict[int, Set[str]] = {}
+        self._role_permissions: Dict[str, Set[str]] = {
+            role: set(permissions) for role, permissions in _SEED_ROLE_PERMISSIONS.items()
+        }
+
+    def _record(self, user_id: int) -> Dict:
+        """User and profile columns merged, as ``SELECT u.*, p.*`` would return them."""
+        return {**self._profiles.get(user_id, {}), **self._users[user_id]}
+
+    def _live_user_id(self, user_id: Optional[int]) -> Optional[int]:
+        if user_id is None or user_id not in self._users or self._users[user_id]["is_deleted"]:
+            return None
+        return user_id
+
+    async def create_user(self, user: UserCreate, profile: UserProfileCreate) -> Optional[Dict]:
+        salt = generate_salt()
+        password_hash = await get_password_hash_async(user.password + salt)
+        now = datetime.now(timezone.utc)
+
+        with self._lock:
+            # Emails are unique among live accounts only
+            if self._live_user_id(self._by_email.get(user.email)) is not None:
+                return None
+            user_id = next(self._ids)
+            self._users[user_id] = {
+                "user_id": user_id,
+                "email": user.email,
+                "status": "active",
+                "is_active": True,
+                "is_deleted": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            self._profiles[user_id] = {
+                "profile_id": user_id,
+                "user_id": user_id,
+                "first_name": profile.first_name,
+                "last_name": profile.last_name,
+                "display_name": profile.display_name or f"{profile.first_name} {profile.last_name}",
+                "preferences": dict(profile.preferences),
+                "email": user.email,
+            }
+            self._credentials[user_id] = (password_hash, salt)
+            self._by_email[user.email] = user_id
+            return {**self._users[user_id], "profile_id": user_id}
+
+    async def get_by_email(self, email: str, with_credentials: bool = False) -> Optional[Dict]:
+        with self._lock:
+            user_id = self._live_user_id(self._by_email.get(email))
+            if user_id is None:
+                return None
+            record = self._record(user_id)
+            if with_credentials:
+                record["password_hash"], record["salt"] = self._credentials[user_id]
+            return record
+
+    async def get_login_record(self, email: str) -> Optional[LoginRecord]:
+        with self._lock:
+            user_id = self._live_user_id(self._by_email.get(email))
+            if user_id is None:
+                return None
+            user, profile = self._users[user_id], self._profiles.get(user_id, {})
+            password_hash, salt = self._credentials[user_id]
+            return LoginRecord(
+                user_id=user_id,
+                email=user["email"],
+                is_active=user["is_active"],
+                password_hash=password_hash,
+                salt=salt,
+                first_name=profile.get("first_name"),
+                last_name=profile.get("last_name"),
+                display_name=profile.get("display_name")
+            )
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict]:
+        with self._lock:
+            if self._live_user_id(user_id) is None:
+                return None
+            return self._record(user_id)
+
+    def _update_user(self, user_id: int, **changes) -> Dict:
+        user = self._users[user_id]
+        user.update(changes, updated_at=datetime.now(timezone.utc))
+        return user
+
+    async def soft_delete_user(self, user_id: int) -> bool:
+        with self._lock:
+            if user_id not in self._users:
+                return False
+            self._update_user(user_id, is_deleted=True, is_active=False)
+            return True
+
+    async def reactivate_user(self, user_id: int) -> bool:
+        with self._lock:
+            if user_id not in self._users:
+                return False
+            holder = self._live_user_id(self._by_email.get(self._users[user_id]["email"]))
+            if holder not in (None, user_id):
+                # The email was registered again after the soft delete
+                return False
+            self._by_email[self._users[user_id]["email"]] = user_id
+            self._update_user(user_id, is_deleted=False, is_active=True)
+            return True
+
+    async def update_user_status(self, user_id: int, is_active: bool) -> Optional[Dict]:
+        with self._lock:
+            if self._live_user_id(user_id) is None:
+                return None
+            user = self._update_user(user_id, is_active=is_active)
+            return {key: user[key] for key in ("user_id", "email", "is_active", "is_deleted", "updated_at")}
+
+    async def update_password(self, user_id: int, new_password: str) -> bool:
+        salt = generate_salt()
+        password_hash = await get_password_hash_async(new_password + salt)
+        with self._lock:
+            if user_id not in self._credentials:
+                return False
+            self._credentials[user_id] = (password_hash, salt)
+            return True
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        with self._lock:
+            stored = self._credentials.get(user_id)
+            if stored is None or stored[0] != old_hash:
+                return False
+            self._credentials[user_id] = (new_hash, stored[1])
+            return True
+
+    async def add_openid_credential(self, user_id: int, credential: OpenIDCredential) -> Optional[Dict]:
+        key = (credential.source, credential.provider_user_id)
+        with self._lock:
+            stored = {
+                "credential_id": next(self._credential_ids),
+                "user_id": user_id,
+                "source": credential.source,
+                "provider_user_id": credential.provider_user_id,
+                "expires_at": credential.expires_at,
+                "token": credential.token,
+            }
+            self._openid.setdefault(key, []).append(stored)
+            self._by_openid[key] = user_id
+            return {k: v for k, v in stored.items() if k not in ("user_id", "token")}
+
+    async def get_user_by_openid(self, provider: str, provider_user_id: str) -> Optional[Dict]:
+        key = (provider, provider_user_id)
+        with self._lock:
+            user_id = self._by_openid.get(key)
+            if user_id is None or user_id not in self._users:
+                return None
+            return {**self._record(user_id), "token": self._openid[key][-1]["token"]}
+
+    async def get_user_authorization(self, user_id: int) -> Tuple[List[str], List[str]]:
+        with self._lock:
+            roles = sorted(self._user_roles.get(user_id) or [settings.RBAC_DEFAULT_ROLE])
+            permissions: Set[str] = set()
+            for role in roles:
+                permissions |= self._role_permissions.get(role, set())
+            return roles, sorted(permissions)
+
+    async def get_user_roles(self, user_id: int) -> List[str]:
+        roles, _ = await self.get_user_authorization(user_id)
+        return roles
+
+    async def get_user_permissions(self, user_id: int) -> List[str]:
+        _, permissions = await self.get_user_authorization(user_id)
+        return permissions
+
+    async def grant_role(self, user_id: int, role: str) -> bool:
+        with self._lock:
+            roles = self._user_roles.setdefault(user_id, set())
+            if role not in self._role_permissions or role in roles:
+                return False
+            roles.add(role)
+            return True
+
+    async def revoke_role(self, user_id: int, role: str) -> bool:
+        with self._lock:
+            roles = self._user_roles.get(user_id, set())
+            if role not in roles:
+                return False
+            roles.discard(role)
+            return True
+
+    async def grant_permission(self, role: str, permission: str) -> bool:
+        with self._lock:
+            permissions = self._role_permissions.setdefault(role, set())
+            if permission in permissions:
+                return False
+            permissions.add(permission)
+            return True
+
+    async def revoke_permission(self, role: str, permission: str) -> bool:
+        with self._lock:
+            permissions = self._role_permissions.get(role, set())
+            if permission not in permissions:
+                return False
+            permissions.discard(permission)
+            return True
+
+    async def store_password_reset_token(self, user_id: int, token: str) -> bool:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            tokens = self._reset_tokens.setdefault(user_id, {})
+            # Invalidate any existing tokens
+            for stored in tokens.values():
+                if stored["used_at"] is None:
+                    stored["used_at"] = now
+            tokens[token] = {
+                "token_id": next(self._reset_token_ids),
+                "expires_at": now + timedelta(hours=24),
+                "used_at": None,
+            }
+            return True
+
+    async def verify_reset_token(self, user_id: int, token: str) -> bool:
+        with self._lock:
+            stored = self._reset_tokens.get(user_id, {}).get(token)
+            return (
+                stored is not None
+                and stored["used_at"] is None
+                and stored["expires_at"] > datetime.now(timezone.utc)
+            )
+
+    async def invalidate_reset_token(self, user_id: int, token: str) -> bool:
+        with self._lock:
+            stored = self._reset_tokens.get(user_id, {}).get(token)
+            if stored is None or stored["used_at"] is not None:
+                return False
+            stored["used_at"] = datetime.now(timezone.utc)
+            return True
+
+    async def delete_expired_reset_tokens(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            batch = sorted(
+                (stored["token_id"], user_id, token)
+                for user_id, tokens in self._reset_tokens.items()
+                for token, stored in tokens.items()
+                if stored["token_id"] > after_id and (stored["used_at"] is not None or stored["expires_at"] <= now)
+            )[:batch_size]
+            for _, user_id, token in batch:
+                tokens = self._reset_tokens[user_id]
+                del tokens[token]
+                if not tokens:
+                    del self._reset_tokens[user_id]
+        return len(batch), _next_cursor([token_id for token_id, _, _ in batch], batch_size)
+
+    async def delete_superseded_openid_credentials(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            batch = sorted(
+                (stored["credential_id"], key)
+                for key, credentials in self._openid.items()
+                for i, stored in enumerate(credentials)
+                if stored["credential_id"] > after_id
+                and stored["expires_at"] <= now
+                and any(newer["user_id"] == stored["user_id"] for newer in credentials[i + 1:])
+            )[:batch_size]
+            for credential_id, key in batch:
+                self._openid[key] = [c for c in self._openid[key] if c["credential_id"] != credential_id]
+        return len(batch), _next_cursor([credential_id for credential_id, _ in batch], batch_size)
@@ -0,0 +1,50 @@
+"""
+Compact row types for hot-path queries.
+
+These are built directly by psycopg's ``class_row`` factory, so a row costs
+one small slotted object instead of a dict holding every joined column.
+"""
+from typing import Any, Dict, Optional
+
+
+class LoginRecord:
+    """The columns ``/token`` needs: credentials plus the access token claims."""
+
+    __slots__ = (
+        "user_id", "email", "is_active", "password_hash", "salt",
+        "first_name", "last_name", "display_name"
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        email: str,
+        is_active: bool,
+        password_hash: str,
+        salt: str,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        display_name: Optional[str] = None
+    ):
+        self.user_id = user_id
+        self.email = email
+        self.is_active = is_active
+        self.password_hash = password_hash
+        self.salt = salt
+        self.first_name = first_name
+        self.last_name = last_name
+        self.display_name = display_name
+
+    def token_claims(self) -> Dict[str, Any]:
+        """User data for ``create_access_token``, without the credentials."""
+        return {
+            "user_id": self.user_id,
+            "email": self.email,
+            "is_active": self.is_active,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "display_name": self.display_name,
+        }
+
+    def __repr__(self) -> str:
+        return f"LoginRecord(user_id={self.user_id!r}, email={self.email!r})"
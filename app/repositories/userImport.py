@@ -0,0 +1,319 @@
+"""
+Bulk user import for partner cohort migrations.
+
+Input is streamed from CSV (header row) or NDJSON with the fields ``email``,
+``password``, ``first_name``, ``last_name`` and optionally ``display_name``
+and ``preferences`` (a JSON object). Rows are processed in batches:
+
+1. validated in the parent process,
+2. salted and hashed across a process pool (the next batch is hashed while
+   the current one is written),
+3. ``COPY``-ed into a temporary staging table and merged into ``users``,
+   ``login_credentials`` and ``user_profiles`` with one set-based statement.
+
+A bad row (invalid data, email already registered, duplicate within the
+input) is reported and skipped; the rest of its batch is still imported.
+
+    python -m app.repositories.userImport cohort.csv --failures failures.csv
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import psycopg
+from psycopg.rows import tuple_row
+from pydantic import ValidationError
+
+from ..core.config import settings
+from ..core.passwordHashing import HashPolicy, _configure, hash_password_batch, policy_from_settings
+from ..schema.user import UserCreate, UserProfileCreate
+from . import userQueries as queries
+
+# Column limits from the users / user_profiles schema
+_MAX_EMAIL_LENGTH = 255
+_MAX_NAME_LENGTH = 100
+
+
+@dataclass
+class ImportFailure:
+    line: int
+    email: Optional[str]
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    imported: int = 0
+    failures: List[ImportFailure] = field(default_factory=list)
+    hash_seconds: float = 0.0
+    load_seconds: float = 0.0
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    def summary(self) -> str:
+        rate = self.imported / self.load_seconds if self.load_seconds else 0.0
+        return (
+            f"{self.imported}/{self.total} users imported, {self.failed} failed; "
+            f"hashing {self.hash_seconds:.1f}s, loading {self.load_seconds:.1f}s "
+            f"({rate:.0f} users/s excluding hashing)"
+        )
+
+
+@dataclass
+class _ValidRow:
+    line: int
+    email: str
+    password: str
+    first_name: str
+    last_name: str
+    display_name: str
+    preferences: str
+
+
+def read_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield ``(line_number, record)`` from a CSV or NDJSON stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = {"__error__": f"invalid JSON: {e.msg}"}
+        if not isinstance(record, dict):
+            record = {"__error__": "expected a JSON object"}
+        yield line_number, record
+
+
+def _validate(line: int, record: Dict[str, Any]) -> _ValidRow:
+    """Validate one record with the same models as /register. Raises ValueError."""
+    if "__error__" in record:
+        raise ValueError(record["__error__"])
+
+    preferences = record.get("preferences") or {}
+    if isinstance(preferences, str):
+        try:
+            preferences = json.loads(preferences)
+        except json.JSONDecodeError:
+            raise ValueError("preferences is not valid JSON")
+
+    try:
+        user = UserCreate(email=record.get("email"), password=record.get("password"))
+        profile = UserProfileCreate(
+            first_name=record.get("first_name"),
+            last_name=record.get("last_name"),
+            display_name=record.get("display_name") or None,
+            preferences=preferences
+        )
+    except ValidationError as e:
+        error = e.errors()[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise ValueError(f"{location}: {error['msg']}")
+
+    display_name = profile.display_name or f"{profile.first_name} {profile.last_name}"
+    if len(user.email) > _MAX_EMAIL_LENGTH:
+        raise ValueError("email is too long")
+    if max(len(profile.first_name), len(profile.last_name), len(display_name)) > _MAX_NAME_LENGTH:
+        raise ValueError("name is too long")
+
+    return _ValidRow(
+        line=line,
+        email=user.email,
+        password=user.password,
+        first_name=profile.first_name,
+        last_name=profile.last_name,
+        display_name=display_name,
+        preferences=json.dumps(profile.preferences)
+    )
+
+
+class UserImporter:
+    """Runs the import pipeline over one database connection and a hashing pool."""
+
+    def __init__(
+        self,
+        dsn: str,
+        batch_size: int = 5000,
+        workers: Optional[int] = None,
+        hash_chunk_size: int = 64,
+        policy: Optional[HashPolicy] = None
+    ):
+        self.dsn = dsn
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.hash_chunk_size = hash_chunk_size
+        # Defaults to the configured policy, calibrated when the run starts
+        self.policy = policy
+
+    def _batches(
+        self,
+        rows: Iterator[Tuple[int, Dict[str, Any]]],
+        report: ImportReport
+    ) -> Iterator[List[_ValidRow]]:
+        batch: List[_ValidRow] = []
+        for line, record in rows:
+            report.total += 1
+            try:
+                batch.append(_validate(line, record))
+            except ValueError as e:
+                report.failures.append(ImportFailure(line, record.get("email"), str(e)))
+                continue
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _submit_hashing(self, executor: ProcessPoolExecutor, batch: List[_ValidRow]) -> List[Future]:
+        size = self.hash_chunk_size
+        return [
+            executor.submit(hash_password_batch, [row.password for row in batch[i:i + size]])
+            for i in range(0, len(batch), size)
+        ]
+
+    def _load(
+        self,
+        conn: psycopg.Connection,
+        batch: List[_ValidRow],
+        hashes: List[Tuple[Optional[str], str]],
+        report: ImportReport
+    ) -> None:
+        staged: Dict[int, Tuple[_ValidRow, str, str]] = {}
+        for row, (password_hash, salt) in zip(batch, hashes):
+            if password_hash is None:
+                report.failures.append(ImportFailure(row.line, row.email, f"password: {salt}"))
+            else:
+                staged[row.line] = (row, password_hash, salt)
+        if not staged:
+            return
+
+        try:
+            with conn.transaction():
+                with conn.cursor(row_factory=tuple_row) as cur:
+                    cur.execute(queries.CREATE_IMPORT_STAGING)
+                    with cur.copy(queries.COPY_IMPORT_STAGING) as copy:
+                        for row, password_hash, salt in staged.values():
+                            copy.write_row((
+                                row.line, row.email, password_hash, salt, row.first_name,
+                                row.last_name, row.display_name, row.preferences
+                            ))
+                    cur.execute(queries.MERGE_IMPORT_STAGING)
+                    results = cur.fetchall()
+        except psycopg.Error as e:
+            # The batch was rolled back as a whole; record it and carry on
+            for row, _, _ in staged.values():
+                report.failures.append(ImportFailure(row.line, row.email, f"batch failed: {e}"))
+            return
+
+        for line, user_id, is_candidate in results:
+            if user_id is not None:
+                report.imported += 1
+                continue
+            reason = "email already registered" if is_candidate else "duplicate email in input"
+            report.failures.append(ImportFailure(line, staged[line][0].email, reason))
+
+    def run(self, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> ImportReport:
+        report = ImportReport()
+        policy = self.policy or policy_from_settings()
+        # Spawn rather than fork, as for the request-path hashing pool, and
+        # hash with the same policy as the service
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_configure,
+            initargs=(policy.context_config(),)
+        )
+        pending: Deque[Tuple[List[_ValidRow], List[Future]]] = deque()
+        try:
+            with psycopg.connect(self.dsn, autocommit=True) as conn:
+                for batch in self._batches(rows, report):
+                    pending.append((batch, self._submit_hashing(executor, batch)))
+                    # Keep one batch hashing while the previous one is loaded
+                    if len(pending) > 1:
+                        self._drain_one(conn, pending, report)
+                while pending:
+                    self._drain_one(conn, pending, report)
+        finally:
+            executor.shutdown()
+
+        report.failures.sort(key=lambda failure: failure.line)
+        return report
+
+    def _drain_one(
+        self,
+        conn: psycopg.Connection,
+        pending: Deque[Tuple[List[_ValidRow], List[Future]]],
+        report: ImportReport
+    ) -> None:
+        batch, futures = pending.popleft()
+
+        started = time.perf_counter()
+        hashes: List[Tuple[Optional[str], str]] = []
+        for future in futures:
+            hashes.extend(future.result())
+        report.hash_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        self._load(conn, batch, hashes, report)
+        report.load_seconds += time.perf_counter() - started
+
+
+def write_failures(failures: List[ImportFailure], stream: IO[str]) -> None:
+    writer = csv.writer(stream)
+    writer.writerow(["line", "email", "reason"])
+    for failure in failures:
+        writer.writerow([failure.line, failure.email or "", failure.reason])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or NDJSON.")
+    parser.add_argument("input", help="Path to the input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--failures", help="Write failed rows to this CSV file instead of stderr")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, help="Hashing processes (default: CPU count)")
+    parser.add_argument("--dsn", default=None, help="Defaults to DATABASE_URL")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.input.endswith((".ndjson", ".jsonl")) else "csv")
+    importer = UserImporter(
+        dsn=args.dsn or settings.DATABASE_URL,
+        batch_size=args.batch_size,
+        workers=args.workers
+    )
+
+    stream = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    try:
+        report = importer.run(read_rows(stream, fmt))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    if args.failures:
+        with open(args.failures, "w", newline="", encoding="utf-8") as out:
+            write_failures(report.failures, out)
+    elif report.failures:
+        write_failures(report.failures, sys.stderr)
+
+    print(report.summary())
+    return 0 if report.imported or not report.total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
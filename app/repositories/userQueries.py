@@ -0,0 +1,339 @@
+"""
+SQL shared by the sync (psycopg2) and async (psycopg 3) user repositories.
+
+Both drivers use the ``%s`` / ``%(name)s`` placeholder styles, so each
+statement is written once and executed by either implementation.
+"""
+
+# Registration as one atomic statement. A duplicate email is reported by the
+# unique index on live accounts' emails itself: the users insert returns
+# nothing, so neither dependent insert runs and the statement returns no row.
+REGISTER_USER = """
+    WITH new_user AS (
+        INSERT INTO users
+        (email, status, is_active, is_deleted, versoin)
+        VALUES (%(email)s, 'active', TRUE, FALSE, 1)
+        ON CONFLICT (email) WHERE is_deleted = FALSE DO NOTHING
+        RETURNING user_id, email, status, is_active,
+                is_deleted, created_at, updated_at
+    ), new_credentials AS (
+        INSERT INTO login_credentials
+        (user_id, email, password_hash, salt)
+        SELECT user_id, email, %(password_hash)s, %(salt)s
+        FROM new_user
+    ), new_profile AS (
+        INSERT INTO user_profiles
+        (user_id, first_name, last_name, display_name,
+         preferences, email)
+        SELECT user_id, %(first_name)s, %(last_name)s, %(display_name)s,
+               %(preferences)s::jsonb, email
+        FROM new_user
+        RETURNING profile_id
+    )
+    SELECT new_user.*, new_profile.profile_id
+    FROM new_user, new_profile;
+"""
+
+SELECT_USER_BY_EMAIL = """
+    SELECT
+        u.*,
+        p.*,
+        lc.password_hash,
+        lc.salt
+    FROM users u
+    LEFT JOIN user_profiles p ON u.user_id = p.user_id
+    LEFT JOIN login_credentials lc ON u.user_id = lc.user_id
+    WHERE u.email = %s AND u.is_deleted = FALSE;
+"""
+
+# Login fast path: only the columns /token needs, no SELECT * across the join
+SELECT_LOGIN_RECORD = """
+    SELECT
+        u.user_id,
+        u.email,
+        u.is_active,
+        lc.password_hash,
+        lc.salt,
+        p.first_name,
+        p.last_name,
+        p.display_name
+    FROM users u
+    JOIN login_credentials lc ON u.user_id = lc.user_id
+    LEFT JOIN user_profiles p ON u.user_id = p.user_id
+    WHERE u.email = %s AND u.is_deleted = FALSE;
+"""
+
+SELECT_USER_BY_ID = """
+    SELECT
+        u.*,
+        p.*,
+        lc.password_hash,
+        lc.salt
+    FROM users u
+    LEFT JOIN user_profiles p ON u.user_id = p.user_id
+    LEFT JOIN login_credentials lc ON u.user_id = lc.user_id
+    WHERE u.user_id = %s AND u.is_deleted = FALSE;
+"""
+
+SOFT_DELETE_USER = """
+    UPDATE users
+    SET is_deleted = TRUE,
+        is_active = FALSE,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = %s
+    RETURNING user_id;
+"""
+
+REACTIVATE_USER = """
+    UPDATE users
+    SET is_deleted = FALSE,
+        is_active = TRUE,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = %s
+    RETURNING user_id;
+"""
+
+UPDATE_USER_STATUS = """
+    UPDATE users
+    SET
+        is_active = %s,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE
+        user_id = %s
+        AND is_deleted = FALSE
+    RETURNING
+        user_id,
+        email,
+        is_active,
+        is_deleted,
+        updated_at;
+"""
+
+UPDATE_PASSWORD = """
+    UPDATE login_credentials
+    SET password_hash = %s,
+        salt = %s
+    WHERE user_id = %s
+    RETURNING user_id;
+"""
+
+# Only if the hash is still the one that was verified, so a concurrent
+# password change is never overwritten
+UPDATE_PASSWORD_HASH = """
+    UPDATE login_credentials
+    SET password_hash = %(new_hash)s
+    WHERE user_id = %(user_id)s AND password_hash = %(old_hash)s
+    RETURNING user_id;
+"""
+
+INSERT_OPENID_CREDENTIAL = """
+    INSERT INTO openid_credentials
+    (user_id, token, source, expires_at, provider_user_id)
+    VALUES (%s, %s, %s, %s, %s)
+    RETURNING credential_id, source, provider_user_id, expires_at;
+"""
+
+SELECT_USER_BY_OPENID = """
+    SELECT u.*, p.*, oid.token
+    FROM users u
+    LEFT JOIN user_profiles p ON u.user_id = p.user_id
+    LEFT JOIN openid_credentials oid ON u.user_id = oid.user_id
+    WHERE oid.source = %s
+    AND oid.provider_user_id = %s;
+"""
+
+INVALIDATE_OPEN_RESET_TOKENS = """
+    UPDATE password_reset_tokens
+    SET used_at = CURRENT_TIMESTAMP
+    WHERE user_id = %s AND used_at IS NULL;
+"""
+
+INSERT_RESET_TOKEN = """
+    INSERT INTO password_reset_tokens
+    (user_id, token, expires_at)
+    VALUES (%s, %s, %s)
+    RETURNING token_id;
+"""
+
+SELECT_VALID_RESET_TOKEN = """
+    SELECT token_id
+    FROM password_reset_tokens
+    WHERE user_id = %s
+    AND token = %s
+    AND expires_at > CURRENT_TIMESTAMP
+    AND used_at IS NULL;
+"""
+
+MARK_RESET_TOKEN_USED = """
+    UPDATE password_reset_tokens
+    SET used_at = CURRENT_TIMESTAMP
+    WHERE user_id = %s AND token = %s
+    RETURNING token_id;
+"""
+
+# Reaper batches are keyset-paged on the primary key: each deletes at most
+# batch_size rows past the cursor, and SKIP LOCKED steps around rows a
+# request is holding instead of waiting on them
+
+DELETE_EXPIRED_RESET_TOKENS = """
+    WITH batch AS (
+        SELECT token_id FROM password_reset_tokens
+        WHERE token_id > %(after_id)s
+        AND (expires_at <= CURRENT_TIMESTAMP OR used_at IS NOT NULL)
+        ORDER BY token_id
+        LIMIT %(batch_size)s
+        FOR UPDATE SKIP LOCKED
+    )
+    DELETE FROM password_reset_tokens t
+    USING batch
+    WHERE t.token_id = batch.token_id
+    RETURNING t.token_id;
+"""
+
+# The newest row per provider account is the account link, so expired rows
+# are only deleted once a newer one exists
+DELETE_SUPERSEDED_OPENID_CREDENTIALS = """
+    WITH batch AS (
+        SELECT c.credential_id FROM openid_credentials c
+        WHERE c.credential_id > %(after_id)s
+        AND c.expires_at <= CURRENT_TIMESTAMP
+        AND EXISTS (
+            SELECT 1 FROM openid_credentials newer
+            WHERE newer.user_id = c.user_id
+            AND newer.source = c.source
+            AND newer.provider_user_id = c.provider_user_id
+            AND newer.credential_id > c.credential_id
+        )
+        ORDER BY c.credential_id
+        LIMIT %(batch_size)s
+        FOR UPDATE OF c SKIP LOCKED
+    )
+    DELETE FROM openid_credentials t
+    USING batch
+    WHERE t.credential_id = batch.credential_id
+    RETURNING t.credential_id;
+"""
+
+# RBAC
+
+SELECT_ROLE_PERMISSIONS = """
+    SELECT r.name AS role, p.name AS permission
+    FROM roles r
+    LEFT JOIN role_permissions rp ON r.role_id = rp.role_id
+    LEFT JOIN permissions p ON rp.permission_id = p.permission_id;
+"""
+
+SELECT_USER_ROLE_NAMES = """
+    SELECT r.name
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.role_id
+    WHERE ur.user_id = %s;
+"""
+
+# Roles and permissions in one round trip, falling back to the default role
+# (second parameter) when the user has no explicit grants
+SELECT_USER_AUTHORIZATION = """
+    WITH granted AS (
+        SELECT role_id FROM user_roles WHERE user_id = %s
+    ), effective AS (
+        SELECT role_id FROM granted
+        UNION ALL
+        SELECT role_id FROM roles
+        WHERE name = %s AND NOT EXISTS (SELECT 1 FROM granted)
+    )
+    SELECT r.name AS role, p.name AS permission
+    FROM effective e
+    JOIN roles r ON e.role_id = r.role_id
+    LEFT JOIN role_permissions rp ON r.role_id = rp.role_id
+    LEFT JOIN permissions p ON rp.permission_id = p.permission_id;
+"""
+
+INSERT_USER_ROLE = """
+    INSERT INTO user_roles (user_id, role_id)
+    SELECT %s, role_id FROM roles WHERE name = %s
+    ON CONFLICT DO NOTHING
+    RETURNING user_id;
+"""
+
+DELETE_USER_ROLE = """
+    DELETE FROM user_roles
+    WHERE user_id = %s
+    AND role_id = (SELECT role_id FROM roles WHERE name = %s)
+    RETURNING user_id;
+"""
+
+INSERT_ROLE_PERMISSION = """
+    INSERT INTO role_permissions (role_id, permission_id)
+    SELECT r.role_id, p.permission_id
+    FROM roles r, permissions p
+    WHERE r.name = %s AND p.name = %s
+    ON CONFLICT DO NOTHING
+    RETURNING role_id;
+"""
+
+DELETE_ROLE_PERMISSION = """
+    DELETE FROM role_permissions
+    WHERE role_id = (SELECT role_id FROM roles WHERE name = %s)
+    AND permission_id = (SELECT permission_id FROM permissions WHERE name = %s)
+    RETURNING role_id;
+"""
+
+# Bulk import: rows are COPYed into a per-transaction staging table and merged
+# with set-based statements
+
+CREATE_IMPORT_STAGING = """
+    CREATE TEMP TABLE import_staging (
+        line INTEGER PRIMARY KEY,
+        email TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        salt TEXT NOT NULL,
+        first_name TEXT,
+        last_name TEXT,
+        display_name TEXT,
+        preferences JSONB NOT NULL
+    ) ON COMMIT DROP;
+"""
+
+COPY_IMPORT_STAGING = """
+    COPY import_staging
+    (line, email, password_hash, salt, first_name, last_name,
+     display_name, preferences)
+    FROM STDIN
+"""
+
+# The first row per email is a candidate; later ones are in-batch duplicates.
+# Returns every staged line with the user_id it created (NULL if it did not)
+# and whether it was the candidate for its email.
+MERGE_IMPORT_STAGING = """
+    WITH candidates AS (
+        SELECT DISTINCT ON (email) *
+        FROM import_staging
+        ORDER BY email, line
+    ), new_users AS (
+        INSERT INTO users
+        (email, status, is_active, is_deleted, versoin)
+        SELECT email, 'active', TRUE, FALSE, 1
+        FROM candidates
+        ORDER BY line
+        ON CONFLICT (email) WHERE is_deleted = FALSE DO NOTHING
+        RETURNING user_id, email
+    ), new_credentials AS (
+        INSERT INTO login_credentials
+        (user_id, email, password_hash, salt)
+        SELECT n.user_id, n.email, c.password_hash, c.salt
+        FROM new_users n
+        JOIN candidates c ON c.email = n.email
+    ), new_profiles AS (
+        INSERT INTO user_profiles
+        (user_id, first_name, last_name, display_name,
+         preferences, email)
+        SELECT n.user_id, c.first_name, c.last_name, c.display_name,
+               c.preferences, n.email
+        FROM new_users n
+        JOIN candidates c ON c.email = n.email
+    )
+    SELECT s.line, n.user_id, c.line IS NOT NULL AS is_candidate
+    FROM import_staging s
+    LEFT JOIN candidates c ON c.line = s.line
+    LEFT JOIN new_users n ON n.email = c.email;
+"""
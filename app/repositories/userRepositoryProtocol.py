@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from ..schema.user import OpenIDCredential, UserCreate, UserProfileCreate
+from .records import LoginRecord
+
+
+class UserRepositoryProtocol(Protocol):
+    """
+    What the request handlers need from user storage.
+
+    Implemented by ``AsyncUserRepository`` (Postgres) and
+    ``InMemoryUserRepository``; ``get_user_repository`` picks one from
+    ``settings.USER_REPOSITORY_BACKEND``. User records are plain dicts with
+    the ``users`` and ``user_profiles`` columns and never include credentials,
+    except ``get_by_email(..., with_credentials=True)``.
+    """
+
+    async def create_user(self, user: UserCreate, profile: UserProfileCreate) -> Optional[Dict]:
+        """Create a user; None if the email is already registered."""
+        ...
+
+    async def get_by_email(self, email: str, with_credentials: bool = False) -> Optional[Dict]:
+        ...
+
+    async def get_login_record(self, email: str) -> Optional[LoginRecord]:
+        ...
+
+    async def get_by_id(self, user_id: int) -> Optional[Dict]:
+        ...
+
+    async def soft_delete_user(self, user_id: int) -> bool:
+        ...
+
+    async def reactivate_user(self, user_id: int) -> bool:
+        ...
+
+    async def update_user_status(self, user_id: int, is_active: bool) -> Optional[Dict]:
+        ...
+
+    async def update_password(self, user_id: int, new_password: str) -> bool:
+        ...
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        ...
+
+    async def add_openid_credential(self, user_id: int, credential: OpenIDCredential) -> Optional[Dict]:
+        ...
+
+    async def get_user_by_openid(self, provider: str, provider_user_id: str) -> Optional[Dict]:
+        ...
+
+    async def get_user_authorization(self, user_id: int) -> Tuple[List[str], List[str]]:
+        """``(roles, permissions)`` for a user."""
+        ...
+
+    async def get_user_roles(self, user_id: int) -> List[str]:
+        ...
+
+    async def get_user_permissions(self, user_id: int) -> List[str]:
+        ...
+
+    async def grant_role(self, user_id: int, role: str) -> bool:
+        ...
+
+    async def revoke_role(self, user_id: int, role: str) -> bool:
+        ...
+
+    async def grant_permission(self, role: str, permission: str) -> bool:
+        ...
+
+    async def revoke_permission(self, role: str, permission: str) -> bool:
+        ...
+
+    async def store_password_reset_token(self, user_id: int, token: str) -> bool:
+        ...
+
+    async def verify_reset_token(self, user_id: int, token: str) -> bool:
+        ...
+
+    async def invalidate_reset_token(self, user_id: int, token: str) -> bool:
+        ...
+
+    async def delete_expired_reset_tokens(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        ...
+
+    async def delete_superseded_openid_credentials(self, after_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        ...
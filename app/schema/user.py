@@ -57,6 +57,7 @@ class TokenPayload(BaseModel):
     iss: str
     aud: List[str]
     metadata: Dict[str, Any]
+    jti: Optional[str] = None  # Absent from tokens issued before revocation support
 
 class OpenIDCredential(BaseModel):
     token: str
@@ -0,0 +1,78 @@
+"""
+Run the service in-process without Postgres, Redis or a telemetry backend.
+
+Import this module before anything under ``app``: it selects the in-memory
+user repository through the environment before settings are loaded. Then
+``install_stand_ins()`` points every Redis client at a shared fakeredis
+server and routes spans to a no-op exporter, and ``app_client()`` yields an
+httpx client bound to the FastAPI app with its lifespan running.
+"""
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+os.environ.setdefault("USER_REPOSITORY_BACKEND", "memory")
+
+import httpx
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+_server = None
+
+
+class NullSpanExporter(SpanExporter):
+    """Keeps span creation and batching in the measurement, drops the export."""
+
+    def export(self, spans) -> SpanExportResult:
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def install_stand_ins() -> None:
+    """Swap Redis for fakeredis and telemetry export for a no-op. Idempotent."""
+    global _server
+    if _server is not None:
+        return
+
+    import fakeredis
+    from app.core.config import settings
+    from app.core.tracing import AuthOTelSetup
+
+    # The app initializes the OTel singleton at import; claim it first
+    AuthOTelSetup.initialize(
+        service_name=settings.OTEL_SERVICE_NAME,
+        service_version=settings.VERSION,
+        exporter=NullSpanExporter()
+    )
+
+    from app.core import pubsub, redisUtils, userCache
+
+    _server = fakeredis.FakeServer()
+    # Replace the pools rather than the clients: registered Lua scripts keep a
+    # reference to the client object they were created from
+    redisUtils.redis.connection_pool = fakeredis.FakeAsyncRedis(server=_server).connection_pool
+    pubsub._subscriber.connection_pool = fakeredis.FakeAsyncRedis(
+        server=_server, decode_responses=True
+    ).connection_pool
+    userCache._sync_redis = fakeredis.FakeRedis(server=_server)
+
+
+@asynccontextmanager
+async def app_client() -> AsyncIterator[httpx.AsyncClient]:
+    """An httpx client talking to the app over ASGI, with startup/shutdown run."""
+    install_stand_ins()
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://auth.local") as client:
+            yield client
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, len(sorted_values) - 1)
+    return sorted_values[max(index, 0)]
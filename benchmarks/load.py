@@ -0,0 +1,274 @@
+"""
+In-process end-to-end load generator.
+
+Drives the FastAPI app over an ASGI transport (no sockets, no uvicorn) with
+Postgres replaced by the in-memory repository and Redis by fakeredis, so the
+numbers are the service's own cost: routing, validation, JWT, bcrypt, caches
+and telemetry. Reports throughput and p50/p95/p99/max latency per route.
+
+    python -m benchmarks.load --concurrency 32 --duration 30
+    python -m benchmarks.load --mix token=5,refresh=25,me=60,register=5,reset=5 --output load.json
+
+Each worker owns its own accounts, so refresh tokens are never used by two
+workers at once. Password reset requests use unknown emails and random
+client IPs: they exercise the rate limiter and lookup without sending mail.
+"""
+from benchmarks.harness import app_client, percentile  # Must precede app imports
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+ROUTES = ("token", "refresh", "me", "register", "reset")
+DEFAULT_MIX = "token=10,refresh=25,me=50,register=5,reset=10"
+PASSWORD = "load-test-password"
+
+
+@dataclass
+class Account:
+    email: str
+    access_token: str = ""
+    refresh_token: str = ""
+
+
+class RouteStats:
+    __slots__ = ("latencies", "statuses")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+
+    def observe(self, seconds: float, status_code: int) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status_code] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+        return {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "errors": sum(n for code, n in self.statuses.items() if code >= 400),
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+            "p50_ms": to_ms(percentile(latencies, 50)),
+            "p95_ms": to_ms(percentile(latencies, 95)),
+            "p99_ms": to_ms(percentile(latencies, 99)),
+            "max_ms": to_ms(latencies[-1] if latencies else None),
+        }
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {route!r}; expected one of {', '.join(ROUTES)}")
+        mix[route] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("The request mix needs at least one positive weight")
+    return mix
+
+
+class LoadGenerator:
+    """Runs a weighted request mix against the app from many concurrent workers."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        concurrency: int,
+        mix: Dict[str, int],
+        accounts_per_worker: int = 2,
+        seed: int = 0
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.routes = [route for route in mix if mix[route] > 0]
+        self.weights = [mix[route] for route in self.routes]
+        self.accounts_per_worker = accounts_per_worker
+        self.seed = seed
+        self.accounts: List[List[Account]] = []
+        self.stats: Dict[str, RouteStats] = {route: RouteStats() for route in ROUTES}
+        self.completed = 0
+        self._registered = 0
+
+    # Setup
+
+    async def _create_account(self, email: str) -> Account:
+        response = await self.client.post(f"{API}/register", json={
+            "user": {"email": email, "password": PASSWORD},
+            "profile": {"first_name": "Load", "last_name": "Test", "display_name": None}
+        })
+        response.raise_for_status()
+        account = Account(email)
+        await self._login(account)
+        return account
+
+    async def setup(self) -> None:
+        """Register and log in every worker's accounts."""
+        self.accounts = [
+            await asyncio.gather(*(
+                self._create_account(f"load-{worker}-{i}@example.edu")
+                for i in range(self.accounts_per_worker)
+            ))
+            for worker in range(self.concurrency)
+        ]
+
+    # Requests
+
+    async def _login(self, account: Account) -> int:
+        response = await self.client.post(
+            f"{API}/token", data={"username": account.email, "password": PASSWORD}
+        )
+        if response.status_code == 200:
+            tokens = response.json()
+            account.access_token, account.refresh_token = tokens["access_token"], tokens["refresh_token"]
+        return response.status_code
+
+    async def _refresh(self, account: Account) -> int:
+        response = await self.client.post(f"{API}/token/refresh", data={
+            "refresh_token": account.refresh_token, "grant_type": "refresh_token"
+        })
+        if response.status_code == 200:
+            tokens = response.json()
+            account.access_token, account.refresh_token = tokens["access_token"], tokens["refresh_token"]
+        return response.status_code
+
+    async def _me(self, account: Account) -> int:
+        response = await self.client.get(
+            f"{API}/me", headers={"Authorization": f"Bearer {account.access_token}"}
+        )
+        return response.status_code
+
+    async def _register(self, worker: int) -> int:
+        self._registered += 1
+        response = await self.client.post(f"{API}/register", json={
+            "user": {"email": f"new-{worker}-{self._registered}@example.edu", "password": PASSWORD},
+            "profile": {"first_name": "New", "last_name": "User", "display_name": None}
+        })
+        return response.status_code
+
+    async def _reset(self, rng: random.Random) -> int:
+        response = await self.client.post(
+            f"{API}/password/reset-request",
+            params={"email": f"unknown-{rng.randrange(10 ** 9)}@example.edu"},
+            headers={"X-Forwarded-For": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"}
+        )
+        return response.status_code
+
+    async def _request(self, route: str, worker: int, rng: random.Random) -> int:
+        if route == "register":
+            return await self._register(worker)
+        if route == "reset":
+            return await self._reset(rng)
+        account = rng.choice(self.accounts[worker])
+        if route == "token":
+            return await self._login(account)
+        if route == "refresh":
+            return await self._refresh(account)
+        return await self._me(account)
+
+    # Driving
+
+    async def _worker(self, worker: int, should_stop: Callable[[], bool]) -> None:
+        rng = random.Random(self.seed * 100003 + worker)
+        while not should_stop():
+            route = rng.choices(self.routes, self.weights)[0]
+            started = time.perf_counter()
+            status_code = await self._request(route, worker, rng)
+            self.stats[route].observe(time.perf_counter() - started, status_code)
+            self.completed += 1
+
+    async def run(self, duration: Optional[float] = None, requests: Optional[int] = None) -> float:
+        """Run until ``duration`` seconds or ``requests`` requests; returns elapsed seconds."""
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+        target = self.completed + requests if requests else None
+
+        def should_stop() -> bool:
+            if target is not None and self.completed >= target:
+                return True
+            return deadline is not None and time.perf_counter() >= deadline
+
+        await asyncio.gather(*(self._worker(w, should_stop) for w in range(self.concurrency)))
+        return time.perf_counter() - started
+
+    def reset_stats(self) -> None:
+        self.stats = {route: RouteStats() for route in ROUTES}
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        routes = {route: s.summary(elapsed) for route, s in self.stats.items() if s.latencies}
+        everything = RouteStats()
+        for s in self.stats.values():
+            everything.latencies.extend(s.latencies)
+            everything.statuses.update(s.statuses)
+        return {"elapsed_seconds": round(elapsed, 3), "total": everything.summary(elapsed), "routes": routes}
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    header = f"{'route':<10} {'requests':>9} {'rps':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["routes"].items()) + [("total", report["total"])]
+    for route, s in rows:
+        print(f"{route:<10} {s['requests']:>9} {s['throughput_rps']:>9} {s['errors']:>7} "
+              f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    async with app_client() as client:
+        generator = LoadGenerator(
+            client, args.concurrency, args.mix,
+            accounts_per_worker=args.accounts_per_worker, seed=args.seed
+        )
+        print(f"Setting up {args.concurrency * args.accounts_per_worker} accounts...")
+        await generator.setup()
+        if args.warmup:
+            await generator.run(duration=args.warmup)
+            generator.reset_stats()
+
+        elapsed = await generator.run(duration=args.duration, requests=args.requests)
+        report = generator.report(elapsed)
+        report["config"] = {
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "accounts_per_worker": args.accounts_per_worker,
+        }
+        report["service_stats"] = (await client.get("/health/stats")).json()
+        return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run (ignored with --requests)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests instead")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unrecorded traffic first")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Route weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--accounts-per-worker", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+    if args.requests:
+        args.duration = None
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Compare the generic ``SELECT_USER_BY_EMAIL`` lookup with the narrow
+``SELECT_LOGIN_RECORD`` fast path used by ``/token``.
+
+Runs both queries against a real database for an existing account and
+reports latency percentiles, bytes of row data returned (from libpq's
+result lengths) and the in-memory size of the materialised row.
+
+    python -m benchmarks.login_query --email someone@example.edu --iterations 2000
+"""
+import argparse
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import psycopg
+from psycopg.rows import class_row, dict_row
+
+from app.core.config import settings
+from app.repositories import userQueries as queries
+from app.repositories.records import LoginRecord
+
+
+def _result_bytes(cur: psycopg.Cursor) -> Dict[str, int]:
+    """Bytes of field names and values in the last result."""
+    result = cur.pgresult
+    names = sum(len(result.fname(col) or b"") for col in range(result.nfields))
+    values = sum(
+        result.get_length(row, col)
+        for row in range(result.ntuples)
+        for col in range(result.nfields)
+    )
+    return {"columns": result.nfields, "header_bytes": names, "value_bytes": values}
+
+
+def _object_bytes(row: Any) -> int:
+    if isinstance(row, dict):
+        return sys.getsizeof(row) + sum(sys.getsizeof(k) for k in row)
+    return sys.getsizeof(row)
+
+
+def _run(
+    conn: psycopg.Connection,
+    query: str,
+    email: str,
+    row_factory: Callable,
+    prepare: bool,
+    iterations: int
+) -> Dict[str, Any]:
+    timings: List[float] = []
+    with conn.cursor(row_factory=row_factory) as cur:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            cur.execute(query, (email,), prepare=prepare)
+            row = cur.fetchone()
+            timings.append((time.perf_counter() - started) * 1000)
+        if row is None:
+            raise SystemExit(f"No active user with email {email!r}")
+        sizes = _result_bytes(cur)
+
+    timings.sort()
+    return {
+        **sizes,
+        "row_object_bytes": _object_bytes(row),
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--email", required=True, help="Existing, non-deleted account")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--dsn", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    with psycopg.connect(args.dsn, autocommit=True) as conn:
+        cases = {
+            "select_user_by_email": (queries.SELECT_USER_BY_EMAIL, dict_row, False),
+            "select_login_record": (queries.SELECT_LOGIN_RECORD, class_row(LoginRecord), True),
+        }
+        results = {}
+        for name, (query, row_factory, prepare) in cases.items():
+            # Warm up the plan cache and, for the prepared case, PREPARE
+            _run(conn, query, args.email, row_factory, prepare, 10)
+            results[name] = _run(conn, query, args.email, row_factory, prepare, args.iterations)
+
+    metrics = list(next(iter(results.values())))
+    print(f"{'metric':<20}" + "".join(f"{name:>24}" for name in results))
+    for metric in metrics:
+        print(f"{metric:<20}" + "".join(f"{results[name][metric]:>24}" for name in results))
+
+
+if __name__ == "__main__":
+    main()
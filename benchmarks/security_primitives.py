@@ -0,0 +1,227 @@
+"""
+Microbenchmarks for the security primitives on the request path.
+
+Covers token creation and validation for each JWT algorithm, refresh token
+creation, salt generation, ``TokenPayload`` construction and bcrypt
+verification at several cost factors. For each case it reports ops/sec,
+p50/p99 latency and memory allocated (tracemalloc peak, and bytes still
+retained per op). Runs fully offline: no Postgres or Redis is needed;
+asymmetric keys are generated in-process and spans go to a no-op exporter.
+
+    python -m benchmarks.security_primitives --output results/3.1.1.json
+    python -m benchmarks.security_primitives --compare results/3.1.1.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from passlib.context import CryptContext
+
+from app.core import signingKeys
+from app.core.config import settings
+from app.core.securityUtils import (
+    create_access_token,
+    create_refresh_token,
+    decode_and_validate_token,
+    generate_salt,
+    verify_password
+)
+from app.core.tokenCache import get_token_cache
+from app.core.tokenRevocation import get_token_revocation_list
+from app.core.tracing import AuthOTelSetup
+from app.schema.user import TokenPayload
+from benchmarks.harness import NullSpanExporter
+
+AUDIENCE = "scholar-spark-services"
+
+USER = {
+    "user_id": 42,
+    "email": "benchmark@example.edu",
+    "first_name": "Bench",
+    "last_name": "Mark",
+    "display_name": "Bench Mark",
+    "is_active": True,
+    "roles": ["user"],
+    "permissions": ["read:profile", "update:profile"],
+}
+
+
+def measure(fn: Callable[[], Any], seconds: float, min_iterations: int = 5) -> Dict[str, Any]:
+    """Time ``fn`` for roughly ``seconds``, then measure its allocations separately."""
+    for _ in range(3):
+        fn()
+    started = time.perf_counter()
+    fn()
+    estimate = max(time.perf_counter() - started, 1e-7)
+    iterations = max(min_iterations, min(int(seconds / estimate), 200000))
+
+    gc.collect()
+    timings: List[int] = []
+    clock = time.perf_counter_ns
+    for _ in range(iterations):
+        t0 = clock()
+        fn()
+        timings.append(clock() - t0)
+
+    # Allocation pass, kept apart because tracemalloc slows every call down
+    alloc_iterations = min(iterations, 1000)
+    gc.collect()
+    tracemalloc.start()
+    for _ in range(alloc_iterations):
+        fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    total_seconds = sum(timings) / 1e9
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total_seconds, 1),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 2),
+        "p99_us": round(timings[min(int(len(timings) * 0.99), len(timings) - 1)] / 1000, 2),
+        "mean_us": round(statistics.fmean(timings) / 1000, 2),
+        "alloc_peak_bytes": peak,
+        "alloc_retained_bytes_per_op": round(retained / alloc_iterations, 1),
+    }
+
+
+def _use_algorithm(algorithm: str) -> None:
+    settings.JWT_ALGORITHM = algorithm
+    if signingKeys.is_asymmetric(algorithm):
+        ring = signingKeys.SigningKeyRing(
+            algorithm=algorithm,
+            rotation_interval_seconds=settings.JWT_KEY_ROTATION_DAYS * 86400,
+            prepublish_seconds=0,
+            verify_window_seconds=3600
+        )
+        ring.install(signingKeys.SigningKey.generate(algorithm, activates_at=0))
+        signingKeys._key_ring = ring
+
+
+def run(algorithms: Sequence[str], bcrypt_rounds: Sequence[int], seconds: float) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    cache = get_token_cache()
+
+    def record(name: str, fn: Callable[[], Any], **kwargs: Any) -> None:
+        results[name] = measure(fn, seconds, **kwargs)
+        print(f"{name:<45} {results[name]['ops_per_sec']:>12,.0f} ops/s  "
+              f"p50 {results[name]['p50_us']:>10,.1f}us  p99 {results[name]['p99_us']:>10,.1f}us")
+
+    record("generate_salt", generate_salt)
+    record("create_refresh_token", lambda: create_refresh_token(USER["user_id"], "benchmark-family", "benchmark-token"))
+
+    original_algorithm, original_cache = settings.JWT_ALGORITHM, settings.TOKEN_CACHE_ENABLED
+    try:
+        for algorithm in algorithms:
+            _use_algorithm(algorithm)
+            token = create_access_token(USER)
+            record(f"create_access_token[{algorithm}]", lambda: create_access_token(USER))
+
+            settings.TOKEN_CACHE_ENABLED = False
+            record(f"decode_and_validate_token[{algorithm},uncached]",
+                   lambda: decode_and_validate_token(token, AUDIENCE))
+
+            settings.TOKEN_CACHE_ENABLED = True
+            cache.clear()
+            decode_and_validate_token(token, AUDIENCE)
+            record(f"decode_and_validate_token[{algorithm},cached]",
+                   lambda: decode_and_validate_token(token, AUDIENCE))
+
+        revocations = get_token_revocation_list()
+        record("token_revocation.is_revoked[miss]", lambda: revocations.is_revoked("not-revoked-jti"))
+
+        claims = decode_and_validate_token(token, AUDIENCE).model_dump()
+        record("TokenPayload", lambda: TokenPayload(**claims))
+    finally:
+        settings.JWT_ALGORITHM, settings.TOKEN_CACHE_ENABLED = original_algorithm, original_cache
+
+    password = "correct horse battery staple" + generate_salt()
+    for rounds in bcrypt_rounds:
+        hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(password)
+        record(f"verify_password[bcrypt-{rounds}]", lambda: verify_password(password, hashed), min_iterations=3)
+
+    return results
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "service_version": settings.VERSION,
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> bool:
+    """Print throughput against a baseline run; True if any case regressed beyond ``threshold``."""
+    regressed = False
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["ops_per_sec"], result["ops_per_sec"]
+        change = after / before - 1
+        flag = ""
+        if change < -threshold:
+            regressed, flag = True, "  REGRESSION"
+        print(f"{name:<45} {before:>12,.0f} {after:>12,.0f} {change:>+8.1%}{flag}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--algorithms", nargs="+", default=["HS256", "RS256", "ES256"])
+    parser.add_argument("--bcrypt-rounds", nargs="+", type=int, default=[10, 12])
+    parser.add_argument("--seconds", type=float, default=1.0, help="Target run time per case")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare throughput against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Fractional throughput drop that counts as a regression")
+    args = parser.parse_args()
+
+    AuthOTelSetup.initialize(
+        service_name="auth-service-benchmarks",
+        service_version=settings.VERSION,
+        exporter=NullSpanExporter()
+    )
+
+    report = {
+        "metadata": _metadata(),
+        "results": run(args.algorithms, args.bcrypt_rounds, args.seconds),
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(report["results"], baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Soak test: run millions of mixed requests against the in-process app and
+watch memory.
+
+Every ``--sample-every`` requests it records RSS, open file descriptors, GC
+counters and object count, the service's own /health/stats (cache and pool
+sizes), and the top tracemalloc allocators by growth since the baseline
+taken after warmup. At the end it fits RSS against requests served and fails
+if memory grows faster than ``--max-growth-mib`` per million requests.
+
+    python -m benchmarks.soak --requests 2000000 --output soak.json
+
+RSS is for this process only; bcrypt workers are separate processes with
+fixed memory. The default mix leaves out /register, whose in-memory users
+are expected growth rather than a leak.
+"""
+from benchmarks.harness import app_client  # Must precede app imports
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from benchmarks.load import LoadGenerator, parse_mix
+
+DEFAULT_MIX = "token=1,refresh=30,me=60,reset=9"
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size; peak RSS where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+def open_fds() -> Optional[int]:
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def top_allocators(baseline: Optional[tracemalloc.Snapshot], limit: int) -> List[Dict[str, Any]]:
+    if baseline is None or not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [
+        {
+            "location": str(stat.traceback[0]),
+            "size_bytes": stat.size,
+            "growth_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_growth": stat.count_diff,
+        }
+        for stat in snapshot.compare_to(baseline, "lineno")[:limit]
+    ]
+
+
+def growth_per_million(samples: List[Dict[str, Any]]) -> Optional[float]:
+    """Least-squares slope of RSS (MiB) against requests, per million requests."""
+    points = [(s["requests"], s["rss_bytes"] / 2 ** 20) for s in samples if s["rss_bytes"] is not None]
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+    return slope * 1_000_000
+
+
+async def sample(generator: LoadGenerator, baseline: Optional[tracemalloc.Snapshot], top: int, started: float) -> Dict[str, Any]:
+    gc.collect()
+    return {
+        "requests": generator.completed,
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+        "rss_bytes": rss_bytes(),
+        "open_fds": open_fds(),
+        "gc_counts": list(gc.get_count()),
+        "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+        "gc_uncollectable": sum(generation["uncollectable"] for generation in gc.get_stats()),
+        "objects": len(gc.get_objects()),
+        "traced_bytes": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+        "top_allocators": top_allocators(baseline, top),
+        "service_stats": (await generator.client.get("/health/stats")).json(),
+    }
+
+
+async def soak(args: argparse.Namespace) -> Dict[str, Any]:
+    async with app_client() as client:
+        generator = LoadGenerator(client, args.concurrency, args.mix, seed=args.seed)
+        await generator.setup()
+        # Let caches, pools and interned state reach steady size first
+        await generator.run(requests=args.warmup_requests)
+        generator.reset_stats()
+
+        if args.tracemalloc_frames:
+            tracemalloc.start(args.tracemalloc_frames)
+        gc.collect()
+        baseline = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+        started = time.perf_counter()
+        start_requests = generator.completed
+        samples = [await sample(generator, baseline, args.top, started)]
+        while generator.completed - start_requests < args.requests:
+            await generator.run(requests=min(args.sample_every, args.requests - (generator.completed - start_requests)))
+            samples.append(await sample(generator, baseline, args.top, started))
+            last = samples[-1]
+            print(f"{last['requests'] - start_requests:>10} requests  "
+                  f"rss {last['rss_bytes'] / 2 ** 20 if last['rss_bytes'] else float('nan'):8.1f} MiB  "
+                  f"fds {last['open_fds']}  objects {last['objects']}")
+            # The latency lists would otherwise be the biggest growth here
+            generator.reset_stats()
+
+        tracemalloc.stop()
+
+    for s in samples:
+        s["requests"] -= start_requests
+    growth = growth_per_million(samples)
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "sample_every": args.sample_every,
+            "max_growth_mib_per_million": args.max_growth_mib,
+        },
+        "rss_growth_mib_per_million": round(growth, 2) if growth is not None else None,
+        "fd_growth": (samples[-1]["open_fds"] or 0) - (samples[0]["open_fds"] or 0),
+        "passed": growth is None or growth <= args.max_growth_mib,
+        "samples": samples,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--sample-every", type=int, default=50_000)
+    parser.add_argument("--warmup-requests", type=int, default=20_000,
+                        help="Unsampled requests first; enough for the bounded caches to fill")
+    parser.add_argument("--max-growth-mib", type=float, default=32.0,
+                        help="Fail if RSS grows faster than this many MiB per million requests")
+    parser.add_argument("--tracemalloc-frames", type=int, default=1, help="0 disables allocation tracing")
+    parser.add_argument("--top", type=int, default=10, help="Allocators listed per sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(soak(args))
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+
+    growth = report["rss_growth_mib_per_million"]
+    print(f"RSS growth: {growth} MiB per million requests (limit {args.max_growth_mib}); "
+          f"fd growth: {report['fd_growth']}")
+    if not report["passed"]:
+        print("FAILED: memory growth above threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+What tracing costs: the same work at several sampling ratios.
+
+Primitives (salt, access and refresh token creation) are timed inside a
+request-like root span, so their spans follow its sampling decision the way
+they do in the app. End to end, the load generator runs a bcrypt-free mix
+(/me and /token/refresh) through the instrumented app. Spans go to a no-op
+exporter, so the numbers are span creation, attributes and batching only.
+
+    python -m benchmarks.tracing_overhead --ratios 1 0.1 0 --output tracing.json
+"""
+from benchmarks.harness import app_client  # Must precede app imports
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Callable, Dict, List
+
+from app.core.securityUtils import create_access_token, create_refresh_token, generate_salt
+from benchmarks.load import LoadGenerator, parse_mix
+from benchmarks.security_primitives import USER, measure
+from scholarSparkObservability.core import OTelSetup
+
+MIX = "me=60,refresh=40"
+
+
+def _in_request(fn: Callable[[], Any]) -> Callable[[], Any]:
+    otel = OTelSetup.get_instance()
+
+    def run():
+        with otel.create_span("POST /api/v1/token"):
+            return fn()
+    return run
+
+
+def primitives(seconds: float) -> Dict[str, Dict[str, Any]]:
+    cases = {
+        "generate_salt": generate_salt,
+        "create_access_token": lambda: create_access_token(USER),
+        "create_refresh_token": lambda: create_refresh_token(USER["user_id"], "benchmark-family", "benchmark-token"),
+    }
+    return {name: measure(_in_request(fn), seconds) for name, fn in cases.items()}
+
+
+async def run(ratios: List[float], seconds: float, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Both passes run inside the app's lifespan, which loads the signing keys."""
+    report: Dict[str, Any] = {"primitives": {}, "end_to_end": {}}
+    async with app_client() as client:
+        sampler = OTelSetup.get_instance().sampler
+        for ratio in ratios:
+            sampler.configure(ratio)
+            report["primitives"][str(ratio)] = primitives(seconds)
+
+        generator = LoadGenerator(client, concurrency, parse_mix(MIX))
+        await generator.setup()
+        await generator.run(requests=requests // 5)
+        for ratio in ratios:
+            sampler.configure(ratio)
+            generator.reset_stats()
+            elapsed = await generator.run(requests=requests)
+            report["end_to_end"][str(ratio)] = generator.report(elapsed)["total"]
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ratios", nargs="+", type=float, default=[1.0, 0.1, 0.0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="Target run time per primitive")
+    parser.add_argument("--requests", type=int, default=5000, help="End-to-end requests per ratio")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.ratios, args.seconds, args.requests, args.concurrency))
+
+    baseline = str(args.ratios[-1])
+    print(f"{'case':<25} {'ratio':>6} {'p50 us':>10} {'overhead':>9}")
+    for ratio, cases in report["primitives"].items():
+        for name, result in cases.items():
+            overhead = result["p50_us"] / report["primitives"][baseline][name]["p50_us"] - 1
+            print(f"{name:<25} {ratio:>6} {result['p50_us']:>10,.1f} {overhead:>+8.1%}")
+    print(f"\n{'end to end':<25} {'ratio':>6} {'rps':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for ratio, total in report["end_to_end"].items():
+        print(f"{MIX:<25} {ratio:>6} {total['throughput_rps']:>10,.0f} {total['p50_ms']:>9} {total['p99_ms']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
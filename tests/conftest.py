@@ -0,0 +1,8 @@
+"""
+Tests run without Redis or a collector: every Redis client points at one
+shared fakeredis server and spans go to a no-op exporter. This has to
+happen before any app module creates its clients, hence at import.
+"""
+from benchmarks.harness import install_stand_ins
+
+install_stand_ins()
@@ -0,0 +1,34 @@
+import asyncio
+
+from benchmarks.harness import app_client
+
+API = "/api/v1"
+PASSWORD = "deletion-test-password"
+
+
+async def _delete_account_then_refresh() -> int:
+    async with app_client() as client:
+        response = await client.post(f"{API}/register", json={
+            "user": {"email": "deleted@example.edu", "password": PASSWORD},
+            "profile": {"first_name": "Deleted", "last_name": "Account", "display_name": None}
+        })
+        assert response.status_code == 200
+        user_id = response.json()["user_id"]
+
+        response = await client.post(f"{API}/token", data={"username": "deleted@example.edu", "password": PASSWORD})
+        assert response.status_code == 200
+        tokens = response.json()
+
+        response = await client.delete(
+            f"{API}/users/{user_id}", headers={"Authorization": f"Bearer {tokens['access_token']}"}
+        )
+        assert response.status_code == 200
+
+        response = await client.post(f"{API}/token/refresh", data={
+            "refresh_token": tokens["refresh_token"], "grant_type": "refresh_token"
+        })
+        return response.status_code
+
+
+def test_deleting_an_account_revokes_its_refresh_tokens():
+    assert asyncio.run(_delete_account_then_refresh()) == 401
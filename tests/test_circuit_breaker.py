@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.circuitBreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Unavailable(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise Unavailable()
+
+
+async def _reject():
+    raise BadRequest()
+
+
+def _breaker(reset_seconds: float = 60.0) -> CircuitBreaker:
+    return CircuitBreaker(
+        "test",
+        failure_threshold=3,
+        reset_seconds=reset_seconds,
+        failure_exceptions=(Unavailable,),
+        ignored_exceptions=(BadRequest,)
+    )
+
+
+def _fail_times(breaker: CircuitBreaker, n: int) -> None:
+    for _ in range(n):
+        with pytest.raises(Unavailable):
+            asyncio.run(breaker.call(_fail))
+
+
+def test_opens_after_consecutive_failures():
+    breaker = _breaker()
+    _fail_times(breaker, 2)
+    assert breaker.state == CLOSED
+
+    _fail_times(breaker, 1)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(breaker.call(_ok))
+    assert breaker.stats()["rejected_total"] == 1
+    assert breaker.stats()["opened_total"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = _breaker()
+    _fail_times(breaker, 2)
+    assert asyncio.run(breaker.call(_ok)) == "ok"
+    _fail_times(breaker, 2)
+    assert breaker.state == CLOSED
+
+
+def test_ignored_exceptions_count_as_success():
+    breaker = _breaker()
+    _fail_times(breaker, 2)
+    with pytest.raises(BadRequest):
+        asyncio.run(breaker.call(_reject))
+    assert breaker.stats()["consecutive_failures"] == 0
+    assert breaker.state == CLOSED
+
+
+def test_slow_success_does_not_open():
+    breaker = _breaker()
+
+    async def slow():
+        # Event loop lag looks like this from the breaker's side
+        time.sleep(0.05)
+        return "ok"
+
+    for _ in range(5):
+        asyncio.run(breaker.call(slow))
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_on_success():
+    breaker = _breaker(reset_seconds=0.05)
+    _fail_times(breaker, 3)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+
+    assert asyncio.run(breaker.call(_ok)) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_reopens_on_failure():
+    breaker = _breaker(reset_seconds=0.05)
+    _fail_times(breaker, 3)
+    time.sleep(0.06)
+
+    _fail_times(breaker, 1)
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened_total"] == 2
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = _breaker(reset_seconds=0.05)
+    _fail_times(breaker, 3)
+    time.sleep(0.06)
+
+    async def probe_and_second_call():
+        release = asyncio.Event()
+
+        async def held():
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.create_task(breaker.call(held))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_ok)
+        release.set()
+        return await probe
+
+    assert asyncio.run(probe_and_second_call()) == "ok"
+    assert breaker.state == CLOSED
@@ -0,0 +1,31 @@
+import asyncio
+
+from benchmarks.harness import app_client
+
+API = "/api/v1"
+PASSWORD = "openid-test-password"
+
+
+async def _connect_openid():
+    async with app_client() as client:
+        response = await client.post(f"{API}/register", json={
+            "user": {"email": "linked@example.edu", "password": PASSWORD},
+            "profile": {"first_name": "Linked", "last_name": "Account", "display_name": None}
+        })
+        assert response.status_code == 200
+
+        response = await client.post(f"{API}/token", data={"username": "linked@example.edu", "password": PASSWORD})
+        assert response.status_code == 200
+        access_token = response.json()["access_token"]
+
+        return await client.post(
+            f"{API}/connect/openid",
+            params={"token": "provider-token", "source": "google", "provider_user_id": "google-123"},
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+
+def test_connect_openid_links_the_current_user():
+    response = asyncio.run(_connect_openid())
+    assert response.status_code == 200
+    assert response.json()["provider_user_id"] == "google-123"
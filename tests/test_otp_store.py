@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.otpStore import OTPStore
+
+
+def _store() -> OTPStore:
+    return OTPStore(ttl_seconds=900, max_attempts=3)
+
+
+def test_otp_is_single_use():
+    async def run():
+        store = _store()
+        otp = await store.issue(201, "email")
+        return await store.verify(201, otp.token), await store.verify(201, otp.token)
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_reissue_replaces_the_outstanding_otp():
+    async def run():
+        store = _store()
+        old = await store.issue(202, "email")
+        new = await store.issue(202, "email")
+        return await store.verify(202, old.token), await store.verify(202, new.token)
+
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_wrong_codes_lock_the_user_out():
+    async def run():
+        store = _store()
+        otp = await store.issue(203, "email")
+        results = [await store.verify(203, "wrong") for _ in range(3)]
+        with pytest.raises(HTTPException) as locked:
+            await store.verify(203, otp.token)
+        # Reissuing does not reset the attempts
+        otp = await store.issue(203, "email")
+        with pytest.raises(HTTPException):
+            await store.verify(203, otp.token)
+        return results, locked.value
+
+    results, locked = asyncio.run(run())
+    assert results == [False, False, False]
+    assert locked.status_code == 429
+    assert 0 < int(locked.headers["Retry-After"]) <= 900
+
+
+def test_success_clears_failed_attempts():
+    async def run():
+        store = _store()
+        otp = await store.issue(204, "email")
+        await store.verify(204, "wrong")
+        await store.verify(204, "wrong")
+        assert await store.verify(204, otp.token)
+
+        otp = await store.issue(204, "email")
+        await store.verify(204, "wrong")
+        await store.verify(204, "wrong")
+        return await store.verify(204, otp.token)
+
+    assert asyncio.run(run())
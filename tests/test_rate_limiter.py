@@ -0,0 +1,49 @@
+import time
+
+from app.core.rateLimiter import LocalTokenBucketLimiter, RateLimitRule
+
+
+def test_allows_up_to_the_limit_then_denies():
+    limiter = LocalTokenBucketLimiter()
+    rule = RateLimitRule("login", "ip", max_attempts=3, window_seconds=60)
+
+    results = [limiter.check([rule]) for _ in range(4)]
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after_seconds == 20
+    assert results[-1].headers()["Retry-After"] == "20"
+
+
+def test_refills_over_the_window():
+    limiter = LocalTokenBucketLimiter()
+    rule = RateLimitRule("login", "ip", max_attempts=2, window_seconds=0.1)
+    assert limiter.check([rule]).allowed
+    assert limiter.check([rule]).allowed
+    assert not limiter.check([rule]).allowed
+
+    time.sleep(0.06)
+    assert limiter.check([rule]).allowed
+
+
+def test_denied_request_consumes_from_no_rule():
+    limiter = LocalTokenBucketLimiter()
+    tight = RateLimitRule("login", "ip", max_attempts=1, window_seconds=60)
+    loose = RateLimitRule("login", "email", max_attempts=10, window_seconds=60)
+
+    assert limiter.check([tight, loose]).allowed
+    denied = limiter.check([tight, loose])
+    assert not denied.allowed
+    # Reported against the most restrictive rule
+    assert denied.limit == 1
+    assert limiter.check([loose]).remaining == 8
+
+
+def test_evicts_least_recently_used_keys():
+    limiter = LocalTokenBucketLimiter(max_keys=2)
+    rules = [RateLimitRule("login", f"ip-{i}", max_attempts=1, window_seconds=60) for i in range(3)]
+    for rule in rules:
+        assert limiter.check([rule]).allowed
+
+    # The first bucket was evicted and starts full again
+    assert limiter.check([rules[0]]).allowed
+    assert not limiter.check([rules[2]]).allowed
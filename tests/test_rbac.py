@@ -0,0 +1,45 @@
+from app.core.rbac import RolePermissionCache
+
+ROWS = [("user", "read:profile"), ("admin", "read:profile"), ("admin", "manage:users"), ("guest", None)]
+
+
+def test_store_builds_and_caches_the_mapping():
+    cache = RolePermissionCache(ttl_seconds=60)
+    assert cache.get() is None
+
+    cache.store(ROWS, cache.generation)
+    mapping = cache.get()
+    assert mapping == {
+        "user": frozenset({"read:profile"}),
+        "admin": frozenset({"read:profile", "manage:users"}),
+        "guest": frozenset(),
+    }
+    assert RolePermissionCache.expand(mapping, ["user", "admin"]) == ["manage:users", "read:profile"]
+
+
+def test_invalidate_drops_the_mapping():
+    cache = RolePermissionCache(ttl_seconds=60)
+    cache.store(ROWS, cache.generation)
+    cache.invalidate()
+    assert cache.get() is None
+
+
+def test_load_that_raced_an_invalidation_is_not_kept():
+    cache = RolePermissionCache(ttl_seconds=60)
+    generation = cache.generation
+    # A grant changes while the rows are being read
+    cache.invalidate()
+
+    mapping = cache.store(ROWS, generation)
+    # The caller still gets its rows, but the next lookup reloads
+    assert mapping["user"] == frozenset({"read:profile"})
+    assert cache.get() is None
+
+    cache.store(ROWS, cache.generation)
+    assert cache.get() is not None
+
+
+def test_mapping_expires_after_ttl():
+    cache = RolePermissionCache(ttl_seconds=0)
+    cache.store(ROWS, cache.generation)
+    assert cache.get() is None
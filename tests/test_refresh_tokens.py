@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.redisUtils import redis
+from app.core.refreshTokens import RefreshTokenStore, _families_key, _family_prefix
+from app.core.securityUtils import decode_internal_token
+
+TTL_SECONDS = 3600
+
+
+def _store(max_families: int = 5) -> RefreshTokenStore:
+    return RefreshTokenStore(ttl_seconds=TTL_SECONDS, max_families=max_families)
+
+
+def test_rotation_replaces_the_current_token():
+    async def run():
+        store = _store()
+        first = decode_internal_token(await store.issue(101))
+        second = decode_internal_token(await store.rotate(first))
+        third = decode_internal_token(await store.rotate(second))
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first["fid"] == second["fid"] == third["fid"]
+    assert len({first["jti"], second["jti"], third["jti"]}) == 3
+
+
+def test_reuse_revokes_the_family():
+    async def run():
+        store = _store()
+        first = decode_internal_token(await store.issue(102))
+        second = decode_internal_token(await store.rotate(first))
+
+        with pytest.raises(HTTPException) as reused:
+            await store.rotate(first)
+        # The legitimate holder is logged out too
+        with pytest.raises(HTTPException) as revoked:
+            await store.rotate(second)
+        return store, reused.value, revoked.value
+
+    store, reused, revoked = asyncio.run(run())
+    assert reused.status_code == revoked.status_code == 401
+    assert "reuse" in reused.detail
+    assert store.stats()["reuse_detected"] == 1
+
+
+def test_rotate_keeps_the_family_index_alive():
+    async def run():
+        store = _store()
+        first = decode_internal_token(await store.issue(103))
+        await redis.expire(_families_key(103), 5)
+        await store.rotate(first)
+        return await redis.ttl(_families_key(103))
+
+    assert asyncio.run(run()) > TTL_SECONDS - 5
+
+
+def test_oldest_family_is_revoked_over_the_cap():
+    async def run():
+        store = _store(max_families=2)
+        tokens = [decode_internal_token(await store.issue(104)) for _ in range(3)]
+        with pytest.raises(HTTPException):
+            await store.rotate(tokens[0])
+        return [await store.rotate(token) for token in tokens[1:]]
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_expired_families_do_not_count_against_the_cap():
+    async def run():
+        store = _store(max_families=2)
+        tokens = [decode_internal_token(await store.issue(105)) for _ in range(2)]
+        # The first family expires on its own; its index entry is left behind
+        await redis.delete(_family_prefix(105) + tokens[0]["fid"])
+        tokens.append(decode_internal_token(await store.issue(105)))
+        families = await redis.zcard(_families_key(105))
+        return families, [await store.rotate(token) for token in tokens[1:]]
+
+    families, rotated = asyncio.run(run())
+    assert families == 2
+    assert len(rotated) == 2
+
+
+def test_revoke_user_ends_every_family():
+    async def run():
+        store = _store()
+        tokens = [decode_internal_token(await store.issue(106)) for _ in range(3)]
+        revoked = await store.revoke_user(106)
+        for token in tokens:
+            with pytest.raises(HTTPException):
+                await store.rotate(token)
+        return revoked
+
+    assert asyncio.run(run()) == 3
@@ -0,0 +1,83 @@
+"""
+Concurrency check for ``REGISTER_USER``: many connections register the same
+email at once and exactly one of them must get a row back. The others must
+see the duplicate as an empty result, not as an error.
+
+Needs a migrated database at DATABASE_URL; skipped when none is reachable.
+Every email it creates is deleted again afterwards.
+"""
+import asyncio
+import json
+import secrets
+from typing import List, Optional
+
+import psycopg
+import pytest
+from psycopg.rows import dict_row
+
+from app.core.config import settings
+from app.repositories import userQueries as queries
+
+CONCURRENCY = 20
+ROUNDS = 10
+
+
+def _database_reachable() -> bool:
+    try:
+        with psycopg.connect(settings.DATABASE_URL, connect_timeout=2):
+            return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _database_reachable(), reason="no database reachable at DATABASE_URL")
+
+
+def _params(email: str) -> dict:
+    return {
+        "email": email,
+        "password_hash": "not-a-real-hash",
+        "salt": secrets.token_hex(16),
+        "first_name": "Race",
+        "last_name": "Check",
+        "display_name": None,
+        "preferences": json.dumps({}),
+    }
+
+
+async def _attempt(conn: psycopg.AsyncConnection, email: str, start: asyncio.Event) -> Optional[int]:
+    await start.wait()
+    async with conn.transaction():
+        async with conn.cursor() as cur:
+            await cur.execute(queries.REGISTER_USER, _params(email))
+            row = await cur.fetchone()
+    return row["user_id"] if row else None
+
+
+async def _round(connections: List[psycopg.AsyncConnection]) -> int:
+    email = f"race-{secrets.token_hex(6)}@example.invalid"
+    start = asyncio.Event()
+    tasks = [asyncio.create_task(_attempt(conn, email, start)) for conn in connections]
+    start.set()
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        async with connections[0].cursor() as cur:
+            await cur.execute("DELETE FROM users WHERE email = %s", (email,))
+    return sum(1 for user_id in results if user_id is not None)
+
+
+async def _winners_per_round() -> List[int]:
+    connections = [
+        await psycopg.AsyncConnection.connect(settings.DATABASE_URL, autocommit=True, row_factory=dict_row)
+        for _ in range(CONCURRENCY)
+    ]
+    try:
+        return [await _round(connections) for _ in range(ROUNDS)]
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+def test_concurrent_registration_has_exactly_one_winner():
+    assert asyncio.run(_winners_per_round()) == [1] * ROUNDS
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.trace import TraceFlags
+
+from app.core.tracing import BoundedBatchSpanProcessor
+
+
+class RecordingExporter(SpanExporter):
+    def __init__(self):
+        self.exported = 0
+        self.threads = set()
+        self._active = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+        self.threads.add(threading.current_thread().name)
+        time.sleep(0.005)
+        with self._lock:
+            self._active -= 1
+            self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+class SampledSpan:
+    class context:
+        trace_flags = TraceFlags(TraceFlags.SAMPLED)
+
+
+def test_concurrent_flushes_export_everything_once_from_the_worker():
+    exporter = RecordingExporter()
+    processor = BoundedBatchSpanProcessor(exporter, max_export_batch_size=50, schedule_delay_seconds=60)
+    for _ in range(500):
+        processor.on_end(SampledSpan)
+
+    results = []
+    flushes = [threading.Thread(target=lambda: results.append(processor.force_flush(5000))) for _ in range(4)]
+    for flush in flushes:
+        flush.start()
+    for flush in flushes:
+        flush.join()
+
+    assert results == [True] * 4
+    assert exporter.exported == 500
+    assert exporter.threads == {"span-exporter"}
+    assert exporter.max_concurrent == 1
+    processor.shutdown()
+
+
+def test_shutdown_drains_the_queue():
+    exporter = RecordingExporter()
+    processor = BoundedBatchSpanProcessor(exporter, max_export_batch_size=50, schedule_delay_seconds=60)
+    for _ in range(120):
+        processor.on_end(SampledSpan)
+
+    processor.shutdown()
+    assert exporter.exported == 120
+    assert processor.stats()["queued"] == 0
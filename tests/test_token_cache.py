@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.tokenCache import VerifiedTokenCache
+from app.schema.user import TokenPayload
+
+
+def _payload(expires_in: float, jti: str = "jti-1") -> TokenPayload:
+    now = datetime.now(timezone.utc)
+    return TokenPayload(
+        sub="ada@example.edu", uid=1, name="Ada Lovelace", given_name="Ada", family_name="Lovelace",
+        email="ada@example.edu", roles=["user"], permissions=["read:profile"],
+        exp=now + timedelta(seconds=expires_in), iat=now, nbf=now,
+        iss="test", aud=["api"], metadata={}, jti=jti
+    )
+
+
+def test_hit_is_scoped_to_token_and_audience():
+    cache = VerifiedTokenCache(max_size=10)
+    payload = _payload(60)
+    cache.put("token", "api", payload)
+
+    assert cache.get("token", "api") is payload
+    assert cache.get("token", "admin") is None
+    assert cache.get("other", "api") is None
+
+
+def test_expired_entry_is_dropped():
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("token", "api", _payload(-1))
+
+    assert cache.get("token", "api") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_revocation_check_runs_on_every_hit():
+    cache = VerifiedTokenCache(max_size=10)
+    revoked = set()
+    cache.add_revocation_check(lambda payload: payload.jti in revoked)
+    cache.put("token", "api", _payload(60, jti="jti-1"))
+    assert cache.get("token", "api") is not None
+
+    revoked.add("jti-1")
+    assert cache.get("token", "api") is None
+    assert cache.stats()["revocations"] == 1
+    # Dropped, not just hidden
+    revoked.clear()
+    assert cache.get("token", "api") is None
+
+
+def test_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.put("a", "api", _payload(60))
+    cache.put("b", "api", _payload(60))
+    cache.get("a", "api")
+    cache.put("c", "api", _payload(60))
+
+    assert cache.get("b", "api") is None
+    assert cache.get("a", "api") is not None
+    assert cache.stats()["evictions"] == 1
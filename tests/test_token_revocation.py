@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from app.core.redisUtils import redis
+from app.core.tokenRevocation import REVOKED_KEY, BloomFilter, TokenRevocationList
+
+
+def _revocation_list(capacity: int = 100) -> TokenRevocationList:
+    return TokenRevocationList(capacity=capacity, error_rate=0.001, sync_seconds=60)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.001)
+    members = [f"jti-{i}" for i in range(1000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 50
+
+
+def test_is_revoked_checks_the_exact_set_behind_the_filter():
+    revocations = _revocation_list()
+    revocations._add_local("revoked", time.time() + 60)
+
+    assert revocations.is_revoked("revoked")
+    assert not revocations.is_revoked("other")
+    # Tokens issued without a jti cannot be revoked individually
+    assert not revocations.is_revoked(None)
+
+
+def test_add_local_past_capacity_grows_the_filter():
+    revocations = _revocation_list(capacity=4)
+    for i in range(10):
+        revocations._add_local(f"jti-{i}", time.time() + 60)
+
+    assert revocations.stats()["bloom_capacity"] >= 10
+    assert all(revocations.is_revoked(f"jti-{i}") for i in range(10))
+
+
+def test_load_merges_unconfirmed_local_revocations():
+    async def run():
+        now = time.time()
+        await redis.delete(REVOKED_KEY)
+        await redis.zadd(REVOKED_KEY, {"stored": now + 60, "stored-expired": now - 1})
+
+        revocations = _revocation_list()
+        revocations._add_local("local-only", now + 60)
+        revocations._add_local("local-expired", now - 1)
+        await revocations.load()
+        return revocations
+
+    revocations = asyncio.run(run())
+    assert revocations.is_revoked("stored")
+    assert revocations.is_revoked("local-only")
+    assert not revocations.is_revoked("stored-expired")
+    assert not revocations.is_revoked("local-expired")
+
+
+def test_revoke_reaches_other_workers_on_load():
+    async def run():
+        await redis.delete(REVOKED_KEY)
+        await _revocation_list().revoke("revoked", time.time() + 60)
+
+        other = _revocation_list()
+        await other.load()
+        return other
+
+    assert asyncio.run(run()).is_revoked("revoked")
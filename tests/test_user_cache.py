@@ -0,0 +1,37 @@
+import asyncio
+
+from app.core.userCache import UserCache, invalidate_blocking
+
+RECORD = {"user_id": 301, "email": "cached@example.edu", "first_name": "Cached"}
+
+
+def _cache() -> UserCache:
+    return UserCache(local_max_size=100, local_ttl_seconds=30, redis_ttl_seconds=300, tombstone_seconds=5)
+
+
+def test_stale_put_after_invalidate_is_dropped():
+    async def run():
+        cache = _cache()
+        await cache.put(dict(RECORD))
+        await cache.invalidate(301)
+        # A read that started before the write finishes now
+        await cache.put(dict(RECORD))
+        return await _cache().get_by_id(301), cache.stats()["stale_puts"]
+
+    assert asyncio.run(run()) == (None, 1)
+
+
+def test_blocking_invalidation_reaches_the_shared_tier():
+    async def put():
+        await _cache().put({**RECORD, "user_id": 302})
+
+    async def after():
+        other = _cache()
+        missed = await other.get_by_id(302)
+        await other.put({**RECORD, "user_id": 302})
+        return missed, other.stats()["stale_puts"]
+
+    asyncio.run(put())
+    # As a maintenance script would after deactivating the user
+    invalidate_blocking(302)
+    assert asyncio.run(after()) == (None, 1)